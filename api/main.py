@@ -1,16 +1,9 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from textblob import TextBlob
 import requests
-from bs4 import BeautifulSoup
-import nltk
 from typing import Optional
 
-# Download required NLTK data
-nltk.download('punkt')
-nltk.download('averaged_perceptron_tagger')
-
 app = FastAPI(title="SentimentScope API")
 
 # Configure CORS
@@ -43,6 +36,9 @@ class HashtagResponse(BaseModel):
 
 def analyze_sentiment(text: str) -> SentimentResponse:
     """Analyze sentiment of given text using TextBlob."""
+    # TextBlob (and the NLTK it imports) is loaded on the first analysis, not at startup;
+    # its sentiment analyzer needs no NLTK data, so nothing is ever downloaded
+    from textblob import TextBlob
     blob = TextBlob(text)
     polarity = blob.sentiment.polarity
     subjectivity = blob.sentiment.subjectivity
@@ -83,7 +79,8 @@ async def analyze_url(input: URLInput):
         response = requests.get(input.url)
         response.raise_for_status()
         
-        # Parse HTML and extract text
+        # Parse HTML and extract text; bs4 is only imported by the route that needs it
+        from bs4 import BeautifulSoup
         soup = BeautifulSoup(response.text, 'html.parser')
         text = ' '.join([p.get_text() for p in soup.find_all('p')])
         
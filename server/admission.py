@@ -0,0 +1,83 @@
+import math
+import threading
+import time
+
+
+def queue_latency(request_start, now=None):
+    """Seconds a request waited between the load balancer and this process, from its ``X-Request-Start`` header.
+
+    Accepts milliseconds since the epoch (Heroku) or ``t=<seconds>`` (nginx);
+    returns None for a missing or implausible value.
+    """
+    if not request_start:
+        return None
+    try:
+        started = float(request_start.strip().removeprefix('t='))
+    except ValueError:
+        return None
+    if started > 1e11:
+        started /= 1000
+    waited = (time.time() if now is None else now) - started
+    # Clock skew between the balancer and this host; anything negative or over an hour is noise
+    if not 0 <= waited < 3600:
+        return None
+    return waited
+
+
+class AdmissionController:
+    """Decides, before any work starts, whether this process takes on another request.
+
+    A request is rejected when ``max_in_flight`` admitted requests are already
+    running here, or when requests are queueing in front of the process: its
+    own queue latency, or the smoothed latency of recent requests, is over
+    ``max_queue_seconds``. Rejected requests cost almost nothing, so clients get
+    a fast 503 instead of a slow timeout. Either limit is off when 0.
+    """
+
+    def __init__(self, max_in_flight=0, max_queue_seconds=0, retry_after=1, smoothing=0.2):
+        self.max_in_flight = max_in_flight
+        self.max_queue_seconds = max_queue_seconds
+        self.min_retry_after = retry_after
+        self.smoothing = smoothing
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = {"in_flight": 0, "queue_latency": 0}
+        self.queue_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def admit(self, queue_seconds=None):
+        """Return None if the request is admitted (call ``release`` when it is done), else why it was rejected."""
+        with self._lock:
+            if queue_seconds is not None:
+                # Rejected requests are observed too, so the average comes back down as the queue drains
+                self.queue_seconds += self.smoothing * (queue_seconds - self.queue_seconds)
+            if self.max_in_flight and self.in_flight >= self.max_in_flight:
+                reason = 'in_flight'
+            elif self.max_queue_seconds and queue_seconds is not None and (
+                    queue_seconds > self.max_queue_seconds or self.queue_seconds > self.max_queue_seconds):
+                reason = 'queue_latency'
+            else:
+                self.in_flight += 1
+                self.admitted += 1
+                return None
+            self.rejected[reason] += 1
+            return reason
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def retry_after(self):
+        # Whole seconds, at least long enough for the current queue to drain
+        return max(self.min_retry_after, math.ceil(self.queue_seconds))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "inFlight": self.in_flight,
+                "maxInFlight": self.max_in_flight,
+                "queueSeconds": self.queue_seconds,
+                "maxQueueSeconds": self.max_queue_seconds,
+                "admitted": self.admitted,
+                "rejected": dict(self.rejected)
+            }
@@ -0,0 +1,221 @@
+import heapq
+import os
+import re
+from collections import Counter
+from functools import partial
+from operator import itemgetter
+
+from deadline import DeadlineExceeded, map_within
+from engine import get_engine, resolve_tier
+from metrics import stage
+
+# Texts whose cleaned length reaches LONG_DOC_THRESHOLD characters are scored in
+# sentence chunks of about LONG_DOC_CHUNK_CHARS characters
+LONG_DOC_THRESHOLD = int(os.environ.get('LONG_DOC_THRESHOLD', 20000))
+LONG_DOC_CHUNK_CHARS = int(os.environ.get('LONG_DOC_CHUNK_CHARS', 2000))
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|\n\s*\n')
+
+HTML_TAG = re.compile(r'<[^>]+>')
+# URLs and special characters in one scan; same result as removing URLs first
+URL_OR_SYMBOL = re.compile(r'http\S+|www.\S+|[^\w\s]')
+
+# Words NLTK's word_tokenize splits even without punctuation ("cannot" -> "can not")
+TOKENIZER_SPLITS = {
+    'cannot': ('can', 'not'),
+    'gimme': ('gim', 'me'),
+    'gonna': ('gon', 'na'),
+    'gotta': ('got', 'ta'),
+    'lemme': ('lem', 'me'),
+    'wanna': ('wan', 'na'),
+}
+
+
+def clean_text(text):
+    # Remove HTML tags (first, since removing them can join a URL back together)
+    text = HTML_TAG.sub('', text)
+    # Remove URLs and special characters, then convert to lowercase
+    return URL_OR_SYMBOL.sub('', text).lower()
+
+def count_words(cleaned_text):
+    # Cleaned text has no punctuation left, so whitespace splitting matches word_tokenize
+    # apart from the handful of words it splits on its own
+    engine = get_engine()
+    if not engine.ready:
+        engine.warm_up()
+    stop_words = engine.stop_words
+    tokens = cleaned_text.split()
+    if not TOKENIZER_SPLITS.keys().isdisjoint(tokens):
+        tokens = [part for token in tokens for part in TOKENIZER_SPLITS.get(token, (token,))]
+    return Counter(token for token in tokens if len(token) > 2 and token.lower() not in stop_words)
+
+def top_words(counts, top_n=10):
+    # Heap selection; ties keep first-seen order, exactly like Counter.most_common
+    word_freq = heapq.nlargest(top_n, counts.items(), key=itemgetter(1))
+    return [{"word": word, "count": count} for word, count in word_freq]
+
+def get_word_frequency(text, top_n=10):
+    return top_words(count_words(text), top_n)
+
+def clean_and_count(text, top_n=10):
+    # Fused pipeline stage: cleaned text for scoring plus its top-N word frequencies
+    with stage('clean'):
+        cleaned_text = clean_text(text)
+    with stage('words'):
+        word_frequency = top_words(count_words(cleaned_text), top_n)
+    return cleaned_text, word_frequency
+
+def analyze_sentiment(text, tier='full'):
+    # Score with the shared VADER + TextBlob engine (VADER alone in the "fast" tier)
+    return get_engine().score(text, tier)
+
+def sentiment_label(score):
+    if score > 0.1:
+        return "positive"
+    elif score < -0.1:
+        return "negative"
+    return "neutral"
+
+def split_sentence_chunks(text, chunk_chars=LONG_DOC_CHUNK_CHARS):
+    # Group whole sentences into (start, end) spans of about chunk_chars characters,
+    # hard-splitting at a space only when a single sentence is longer than that
+    spans = []
+    chunk_start = 0
+    sentence_start = 0
+    boundaries = [m.end() for m in SENTENCE_BOUNDARY.finditer(text)] + [len(text)]
+    for sentence_end in boundaries:
+        if sentence_end - chunk_start > chunk_chars and sentence_start > chunk_start:
+            spans.append((chunk_start, sentence_start))
+            chunk_start = sentence_start
+        while sentence_end - chunk_start > chunk_chars:
+            cut = text.rfind(' ', chunk_start + 1, chunk_start + chunk_chars)
+            if cut <= chunk_start:
+                cut = chunk_start + chunk_chars
+            spans.append((chunk_start, cut))
+            chunk_start = cut
+        sentence_start = sentence_end
+    if chunk_start < len(text):
+        spans.append((chunk_start, len(text)))
+    return spans
+
+def score_text_chunks(chunks, tier='full'):
+    # Clean and score raw text chunks; runs in the scoring processes
+    cleaned = [clean_text(chunk) for chunk in chunks]
+    analyses = get_engine().score_batch(cleaned, tier)
+    return [(analysis, len(text.split())) for analysis, text in zip(analyses, cleaned)]
+
+def analyze_long_text(text, chunk_chars=LONG_DOC_CHUNK_CHARS, scoring_pool=None, tier='full', deadline=None):
+    spans = split_sentence_chunks(text, chunk_chars)
+    chunks = [text[start:end] for start, end in spans]
+    coverage = None
+    if deadline is not None:
+        # Score as many chunks as the deadline allows and leave the rest out
+        func = partial(score_text_chunks, tier=tier)
+        with stage('chunks'):
+            if scoring_pool is not None and scoring_pool.executor is not None:
+                size = -(-len(chunks) // (scoring_pool.workers * 4))
+                scored = scoring_pool.call(lambda executor: map_within(func, chunks, deadline, size, executor))
+            else:
+                scored = map_within(func, chunks, deadline)
+        if None in scored:
+            kept = [(span, result) for span, result in zip(spans, scored) if result is not None]
+            if not kept:
+                raise DeadlineExceeded("Deadline exceeded before any of the text was scored")
+            spans, scored = [span for span, _ in kept], [result for _, result in kept]
+            coverage = sum(end - start for start, end in spans) / len(text)
+    elif scoring_pool is not None:
+        # Stages inside the scoring processes are not visible here, so the whole map is one stage
+        with stage('chunks'):
+            scored = scoring_pool.map_chunks(partial(score_text_chunks, tier=tier), chunks)
+    else:
+        scored = score_text_chunks(chunks, tier)
+
+    # Weight every chunk by its number of words so short fragments do not dominate
+    weights = [words for _, words in scored]
+    total = sum(weights)
+    if not total:
+        weights, total = [1] * len(scored), len(scored) or 1
+
+    def weighted(values):
+        return sum(value * weight for value, weight in zip(values, weights)) / total
+
+    analyses = [analysis for analysis, _ in scored]
+    vader_scores = {
+        key: round(weighted([a['vader_scores'][key] for a in analyses]), 4 if key == 'compound' else 3)
+        for key in ('neg', 'neu', 'pos', 'compound')
+    }
+    sentiment_analysis = {
+        'score': weighted([a['score'] for a in analyses]),
+        'confidence': weighted([a['confidence'] for a in analyses]),
+        'vader_scores': vader_scores,
+        'textblob_score': weighted([a['textblob_score'] for a in analyses]) if tier == 'full' else None
+    }
+    if coverage is not None:
+        sentiment_analysis['coverage'] = coverage
+    sections = [
+        {
+            "start": start,
+            "end": end,
+            "words": words,
+            "sentiment": sentiment_label(analysis['score']),
+            "score": analysis['score'],
+            "confidence": analysis['confidence']
+        }
+        for (start, end), (analysis, words) in zip(spans, scored)
+    ]
+    return sentiment_analysis, sections
+
+def is_long_document(cleaned_text, long_document=None):
+    # Whether the sentence-chunked mode runs: the request's longDocument if given, else the cleaned length
+    if long_document is None:
+        return len(cleaned_text) >= LONG_DOC_THRESHOLD
+    return bool(long_document)
+
+def analyze_document(text, cleaned_text, long_document=None, scoring_pool=None, tier='full', deadline=None):
+    # Returns (sentiment_analysis, sections); sections is None unless the long-document mode ran.
+    # "auto" is settled here on the whole text's length, so a long document's chunks all get the same tier.
+    # Past the deadline a long document keeps the chunks scored so far ("coverage" < 1); a short one fails
+    tier = resolve_tier(tier, len(cleaned_text))
+    if not is_long_document(cleaned_text, long_document):
+        if deadline is not None:
+            deadline.check('scoring')
+        return analyze_sentiment(cleaned_text, tier), None
+    return analyze_long_text(text, scoring_pool=scoring_pool, tier=tier, deadline=deadline)
+
+def partial_details(details, sentiment_analysis):
+    # Marks a result whose deadline ran out part way, with the fraction of the text that was scored
+    if 'coverage' in sentiment_analysis:
+        details["partial"] = True
+        details["coverage"] = round(sentiment_analysis['coverage'], 3)
+
+def analyze_page_text(text, long_document=None, sections=False, scoring_pool=None, tier='full', deadline=None):
+    # Clean text and count words
+    cleaned_text, word_frequency = clean_and_count(text)
+
+    # Analyze sentiment, in sentence chunks for long pages
+    sentiment_analysis, section_scores = analyze_document(text, cleaned_text, long_document, scoring_pool, tier, deadline)
+
+    # Determine sentiment label
+    sentiment = sentiment_label(sentiment_analysis['score'])
+
+    result = {
+        "sentiment": sentiment,
+        "score": sentiment_analysis['score'],
+        "confidence": sentiment_analysis['confidence'],
+        "wordFrequency": word_frequency,
+        "details": {
+            "vader_scores": sentiment_analysis['vader_scores'],
+            "textblob_score": sentiment_analysis['textblob_score'],
+            "tier": resolve_tier(tier, len(cleaned_text))
+        }
+    }
+    partial_details(result["details"], sentiment_analysis)
+    if section_scores is not None:
+        result["details"]["chunks"] = len(section_scores)
+        if sections:
+            result["sections"] = section_scores
+    return result
+
+def init_scoring_worker(engine_options):
+    # Runs once in each scoring process so the first task does not pay for lexicon loading
+    get_engine(**engine_options).warm_up()
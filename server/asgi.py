@@ -0,0 +1,554 @@
+"""Async (ASGI) serving mode for the analysis server.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8000 --workers 4
+
+/analyze/url and /analyze/urls are served natively: pages are fetched with
+non-blocking I/O on the event loop, and HTML parsing and VADER/TextBlob scoring
+run on bounded executors, so a single process can hold hundreds of in-flight
+fetches while slow sites wait. /analyze/stream is native too, scoring each
+chunk of the request body as it arrives. Every other route is the unchanged Flask view,
+run on a bounded thread pool. Routes, status codes, response bodies and headers
+are the same as under gunicorn.
+"""
+import asyncio
+import contextlib
+import contextvars
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from urllib.parse import parse_qsl, urlsplit
+
+import httpx
+from werkzeug.datastructures import MultiDict
+
+import main
+from analysis import analyze_page_text
+from deadline import DeadlineExceeded
+from extract import ParagraphStream, extract_paragraph_text
+from fetch import USER_AGENT, PageText, page_encoding
+from ingest import LineSplitter, StreamAnalyzer
+from logs import bind_request, log_payload, logger
+from metrics import begin_request, record_stage, stage
+from payload import compress_body, dumps
+from singleflight import AsyncSingleFlight
+
+# Bounded executors: CPU_THREADS parse pages (and score them when there is no
+# scoring process pool), WSGI_THREADS run the Flask views
+CPU_THREADS = int(os.environ.get('ASGI_CPU_THREADS', 4))
+WSGI_THREADS = int(os.environ.get('ASGI_WSGI_THREADS', 16))
+# Upper bounds on open upstream connections and on pages waiting to be scored
+MAX_CONNECTIONS = int(os.environ.get('ASGI_MAX_CONNECTIONS', 500))
+MAX_PENDING_SCORES = int(os.environ.get('ASGI_MAX_PENDING_SCORES', 64))
+
+CORS_HEADERS = [
+    (b'access-control-allow-origin', b'*'),
+    (b'access-control-allow-headers', b'Content-Type, Authorization, X-Request-ID, X-Deadline-Ms'),
+    (b'access-control-allow-methods', b'GET,POST,OPTIONS'),
+    (b'access-control-expose-headers', ', '.join(main.EXPOSE_HEADERS).encode()),
+]
+
+# The current request's Deadline (see main.request_deadline), set by AnalysisApp for the native routes
+request_deadline = contextvars.ContextVar('request_deadline', default=None)
+# Whether the client chose that budget (X-Deadline-Ms); such requests are not merged, as in main.analyze_once
+client_deadline = contextvars.ContextVar('client_deadline', default=False)
+
+
+def json_response(status, result, headers=None):
+    # Same bytes as jsonify with main.app's provider: sorted keys, compact, trailing newline
+    body = dumps(result) + b'\n'
+    return status, body, dict(headers or {}, **{'Content-Type': 'application/json'})
+
+
+class AsyncPageFetcher:
+    """Non-blocking counterpart of ``fetch.PageFetcher`` that shares its page cache and settings.
+
+    The HTTP client is created on first use, inside the running event loop.
+    """
+
+    def __init__(self, fetcher, cpu_executor, max_connections=500):
+        self.fetcher = fetcher
+        self.cpu_executor = cpu_executor
+        self.max_connections = max_connections
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers={'User-Agent': USER_AGENT},
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.fetcher.pool_size * 10),
+                timeout=self.fetcher.timeout,
+                follow_redirects=True
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def fetch_text(self, url, deadline=None):
+        """Return a ``PageText`` whose status is MISS or REVALIDATED; raises ``httpx.HTTPError``.
+
+        Like ``PageFetcher.fetch_text``, a ``deadline`` bounds every wait and cuts
+        off a body still arriving when it passes.
+        """
+        fetcher = self.fetcher
+        fetch_start = time.perf_counter()
+        key, cached, headers = fetcher.conditional_request(url)
+
+        timeout = fetcher.timeout
+        if deadline is not None:
+            deadline.check('fetching the page')
+            timeout = deadline.timeout(timeout)
+
+        loop = asyncio.get_running_loop()
+        stream, chunks, size, cut = None, [], 0, False
+        try:
+            async with self.client.stream('GET', url, headers=headers, timeout=timeout) as response:
+                if response.status_code == 304 and cached is not None:
+                    record_stage('fetch', time.perf_counter() - fetch_start)
+                    return PageText(cached['text'], 'REVALIDATED', 0, 0.0, False)
+                response.raise_for_status()
+                # Decoded by the same rule as PageFetcher, so both modes get the same text
+                encoding = page_encoding(response.headers)
+                if fetcher.extract_mode == 'stream':
+                    stream = ParagraphStream(encoding, fetcher.max_bytes, fetcher.max_chars)
+
+                # The download happens on the loop. In stream mode each chunk is parsed on a
+                # CPU thread as it arrives, so reading stops at the byte or character budget
+                try:
+                    async for chunk in response.aiter_bytes(16384):
+                        if stream is not None:
+                            if await loop.run_in_executor(self.cpu_executor, stream.feed, chunk):
+                                break
+                        else:
+                            chunks.append(chunk)
+                            size += len(chunk)
+                        if deadline is not None and deadline.expired():
+                            cut = True
+                            break
+                except httpx.TimeoutException:
+                    # Out of time part way through the body: keep what arrived
+                    if deadline is None or not deadline.expired():
+                        raise
+                    cut = True
+        except httpx.TimeoutException:
+            if deadline is not None and deadline.expired():
+                raise DeadlineExceeded("Deadline exceeded before the page responded") from None
+            raise
+
+        if stream is not None:
+            text, bytes_read, parse_seconds, truncated = await loop.run_in_executor(self.cpu_executor, stream.finish)
+        else:
+            html = b''.join(chunks).decode(encoding, errors='replace')
+            start = time.perf_counter()
+            text = await loop.run_in_executor(self.cpu_executor, extract_paragraph_text, html)
+            bytes_read, parse_seconds, truncated = size, time.perf_counter() - start, False
+        truncated = truncated or cut
+
+        record_stage('fetch', time.perf_counter() - fetch_start - parse_seconds)
+        record_stage('parse', parse_seconds)
+        fetcher.remember(key, response.headers, text, truncated)
+        return PageText(text, 'MISS', bytes_read, parse_seconds, truncated)
+
+
+class AnalysisApp:
+    """ASGI application: native async URL and stream routes in front of the Flask app."""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.cpu_executor = ThreadPoolExecutor(CPU_THREADS, thread_name_prefix='cpu')
+        self.wsgi_executor = ThreadPoolExecutor(WSGI_THREADS, thread_name_prefix='wsgi')
+        self.fetcher = AsyncPageFetcher(main.page_fetcher, self.cpu_executor, MAX_CONNECTIONS)
+        self.routes = {'/analyze/url': self.analyze_url, '/analyze/urls': self.analyze_urls}
+        # These read the request body themselves, as it arrives
+        self.streaming_routes = {'/analyze/stream': self.analyze_stream}
+        self.in_flight = AsyncSingleFlight()
+        self._score_slots = None
+        self._host_slots = {}
+        self._fetch_slots = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            return
+        handler = self.routes.get(scope['path']) or self.streaming_routes.get(scope['path'])
+        if handler is None:
+            return await self.call_flask(scope, receive, send)
+
+        started = time.perf_counter()
+        request_id = self.header(scope, b'x-request-id')
+        request_id = bind_request(request_id.decode('latin1') if request_id else None)
+        begin_request()
+
+        admitted = False
+        if scope['method'] == 'OPTIONS':
+            status, body, headers = 200, b'', {'Content-Type': 'text/html; charset=utf-8'}
+        elif scope['method'] != 'POST':
+            status, body, headers = json_response(405, {"error": "Method not allowed"})
+        else:
+            queue_seconds, rejected = main.admit(scope['path'], self.header_text(scope, b'x-request-start'))
+            if rejected is not None:
+                status, body, headers = json_response(503, *rejected)
+            else:
+                admitted = True
+                requested_ms = self.header_text(scope, b'x-deadline-ms')
+                request_deadline.set(main.request_deadline(
+                    time.monotonic() - (time.perf_counter() - started), queue_seconds, requested_ms
+                ))
+                client_deadline.set(bool(requested_ms))
+
+        try:
+            if admitted:
+                if scope['path'] in self.streaming_routes:
+                    status, body, headers = await handler(scope, receive)
+                else:
+                    status, body, headers = await handler(await self.read_body(receive))
+            await self.respond(send, scope, started, request_id, status, body, headers)
+        finally:
+            if admitted:
+                main.admission.release()
+
+    async def respond(self, send, scope, started, request_id, status, body, headers):
+        headers = dict(headers, **{'X-Request-ID': request_id})
+        if isinstance(body, bytes) and main.COMPRESS_MIN_BYTES:
+            # Compressed like main.compress_response does for the Flask routes
+            headers['Vary'] = 'Accept-Encoding'
+            with stage('compress'):
+                body, encoding = compress_body(body, self.header_text(scope, b'accept-encoding'), main.COMPRESS_MIN_BYTES)
+            if encoding is not None:
+                headers['Content-Encoding'] = encoding
+
+        timing = main.record_request(scope['path'], scope['method'], status, time.perf_counter() - started)
+        if timing is not None:
+            headers.update({'Server-Timing': timing, 'Timing-Allow-Origin': '*'})
+        headers = [(name.lower().encode(), value.encode('latin1')) for name, value in headers.items()] + CORS_HEADERS
+
+        if isinstance(body, bytes):
+            headers.append((b'content-length', str(len(body)).encode()))
+            await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+            await send({'type': 'http.response.body', 'body': body})
+            return
+
+        # Streamed body: an async iterator of byte chunks
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        async for chunk in body:
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.fetcher.close()
+                self.cpu_executor.shutdown(wait=False)
+                self.wsgi_executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    def header(scope, name):
+        for key, value in scope['headers']:
+            if key == name:
+                return value
+        return None
+
+    @classmethod
+    def header_text(cls, scope, name):
+        value = cls.header(scope, name)
+        return value.decode('latin1') if value is not None else None
+
+    @staticmethod
+    async def read_body(receive):
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body'):
+                return b''.join(chunks)
+
+    @staticmethod
+    def parse_json(body):
+        try:
+            return json.loads(body) if body else None
+        except ValueError:
+            return None
+
+    async def score(self, text, long_document=None, sections=False, tier='full', deadline=None):
+        # Scoring is CPU bound: the scoring processes when there are any, the CPU threads otherwise
+        if self._score_slots is None:
+            self._score_slots = asyncio.Semaphore(MAX_PENDING_SCORES)
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.wait_for(self._score_slots.acquire(), deadline.remaining() if deadline is not None else None)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded("Deadline exceeded before scoring") from None
+        try:
+            executor = main.scoring_pool.executor or self.cpu_executor
+            args = (analyze_page_text, text, long_document, sections, None, tier, deadline)
+            try:
+                return await loop.run_in_executor(executor, *args)
+            except BrokenProcessPool:
+                # A scoring process died: score once more on a new pool
+                if executor is self.cpu_executor:
+                    raise
+                return await loop.run_in_executor(main.scoring_pool.replace(executor), *args)
+        finally:
+            self._score_slots.release()
+
+    async def fetch_and_score(self, url, long_document, sections, tier='full', deadline=None):
+        # Fetch URL content and extract paragraph text without blocking the loop,
+        # keeping part of the deadline for the scoring
+        page = await self.fetcher.fetch_text(url, deadline.share(main.FETCH_BUDGET_SHARE) if deadline is not None else None)
+        main.metrics.inc('page_fetches_total', status=page.status)
+        if not page.text.strip():
+            return None, page
+
+        # Clean, score and count words off the loop
+        start = time.perf_counter()
+        result = await self.score(page.text, long_document, sections, tier, deadline)
+        record_stage('score', time.perf_counter() - start)
+        return result, page
+
+    async def analyze_url(self, body):
+        try:
+            log_payload("Received URL analysis request", request=body)
+            data = self.parse_json(body)
+
+            if not data:
+                logger.info("No JSON data received")
+                return json_response(400, {"error": "No JSON data received"})
+
+            url = data.get('url')
+
+            if not url:
+                logger.info("URL is required")
+                return json_response(400, {"error": "URL is required"})
+
+            tier = main.requested_tier(data)
+
+            if tier is None:
+                logger.info("Invalid scoring tier")
+                return json_response(400, {"error": main.TIER_ERROR})
+
+            fields = main.requested_fields(data)
+            if fields is None:
+                return json_response(400, {"error": main.FIELDS_ERROR})
+
+            logger.info(f"Analyzing URL: {url}")
+
+            # Concurrent requests for the same page and options share one fetch and score
+            cache_key = main.url_cache_key(url, data.get('longDocument'), bool(data.get('sections')), tier)
+            deadline = request_deadline.get()
+            args = (url, data.get('longDocument'), bool(data.get('sections')), tier, deadline)
+            if client_deadline.get():
+                (result, page), shared = await self.fetch_and_score(*args), False
+            else:
+                (result, page), shared = await self.in_flight.do(cache_key, self.fetch_and_score, *args, deadline=deadline)
+            if shared:
+                main.metrics.inc('coalesced_requests_total', route='/analyze/url')
+
+            if result is None:
+                logger.info("No text content found")
+                return json_response(400, {"error": "No text content found in the URL"})
+
+            if main.is_partial(result):
+                main.metrics.inc('deadline_exceeded_total', route='/analyze/url', outcome='partial')
+            log_payload("URL analysis result", result=result)
+            return json_response(200, fields.apply(result), dict(main.page_headers(page), **{'X-Cache': 'COALESCED' if shared else 'MISS'}))
+
+        except DeadlineExceeded as e:
+            logger.warning(str(e))
+            main.metrics.inc('deadline_exceeded_total', route='/analyze/url', outcome='failed')
+            return json_response(504, {"error": str(e)})
+        except httpx.HTTPError as e:
+            logger.warning(f"Error fetching URL: {str(e)}")
+            return json_response(400, {"error": f"Error fetching URL: {str(e)}"})
+        except Exception as e:
+            logger.exception(f"Error analyzing content: {str(e)}")
+            return json_response(500, {"error": f"Error analyzing content: {str(e)}"})
+
+    async def analyze_one(self, index, url):
+        # Mirrors UrlBatchAnalyzer.analyze: failures become per-URL error entries
+        if not isinstance(url, str) or not url.strip():
+            return {"url": url, "index": index, "error": "URL is required"}
+        url = url.strip()
+        try:
+            # The host's slot first, so fetches queued behind a busy host never hold a global one
+            async with self.host_slot(urlsplit(url).netloc.lower()), self._fetch_slots:
+                page = await self.fetcher.fetch_text(url)
+        except httpx.HTTPError as e:
+            return {"error": f"Error fetching URL: {str(e)}", "url": url, "index": index}
+        except Exception as e:
+            return {"error": f"Error analyzing content: {str(e)}", "url": url, "index": index}
+
+        if not page.text.strip():
+            return {"error": "No text content found in the URL", "url": url, "index": index}
+        try:
+            return dict(await self.score(page.text), url=url, index=index)
+        except Exception as e:
+            return {"error": f"Error analyzing content: {str(e)}", "url": url, "index": index}
+
+    @contextlib.asynccontextmanager
+    async def host_slot(self, host):
+        # Like multiurl.HostLimiter: at most per_host fetches per host, and hosts with none are forgotten
+        entry = self._host_slots.get(host)
+        if entry is None:
+            entry = self._host_slots[host] = [asyncio.Semaphore(main.url_batch_analyzer.host_limiter.per_host), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._host_slots[host]
+
+    async def analyze_urls(self, body):
+        try:
+            data = self.parse_json(body)
+
+            if not data:
+                logger.info("No JSON data received")
+                return json_response(400, {"error": "No JSON data received"})
+
+            urls = data.get('urls')
+
+            if not isinstance(urls, list) or not urls:
+                logger.info("URLs are required")
+                return json_response(400, {"error": "URLs must be a non-empty list"})
+
+            if len(urls) > main.MAX_URLS:
+                logger.info(f"Too many URLs: {len(urls)}")
+                return json_response(413, {"error": f"Too many URLs. At most {main.MAX_URLS} are allowed."})
+
+            fields = main.requested_fields(data)
+            if fields is None:
+                return json_response(400, {"error": main.FIELDS_ERROR})
+
+            logger.info(f"Analyzing {len(urls)} URLs")
+
+        except Exception as e:
+            logger.exception(f"Error analyzing URLs: {str(e)}")
+            return json_response(500, {"error": f"Error analyzing URLs: {str(e)}"})
+
+        if self._fetch_slots is None:
+            self._fetch_slots = asyncio.Semaphore(main.url_batch_analyzer.max_concurrency)
+
+        # Stream one JSON line per URL as soon as it finishes; failures are per-URL entries
+        async def generate():
+            tasks = [asyncio.ensure_future(self.analyze_one(index, url)) for index, url in enumerate(urls)]
+            failed = 0
+            try:
+                for finished in asyncio.as_completed(tasks):
+                    result = await finished
+                    failed += 'error' in result
+                    main.metrics.inc('url_results_total', result='error' if 'error' in result else 'ok')
+                    yield dumps(fields.apply(result), sort_keys=False) + b'\n'
+            finally:
+                # Stops the remaining fetches if the client went away
+                for task in tasks:
+                    task.cancel()
+            logger.info(f"URL batch complete: {len(urls) - failed} analyzed, {failed} errors")
+
+        return 200, generate(), {'Content-Type': 'application/x-ndjson'}
+
+    async def analyze_stream(self, scope, receive):
+        send_results, summary_every = main.stream_options(MultiDict(parse_qsl(scope['query_string'].decode('latin1'))))
+        analyzer = StreamAnalyzer(word_capacity=main.STREAM_WORD_CAPACITY)
+        splitter = LineSplitter(main.STREAM_MAX_LINE_BYTES)
+        loop = asyncio.get_running_loop()
+        logger.info("Analyzing NDJSON stream")
+
+        # Every chunk's complete lines are scored together, off the loop, before the next chunk is read
+        async def generate():
+            more, summaries = True, 0
+            try:
+                while more:
+                    message = await receive()
+                    if message['type'] == 'http.disconnect':
+                        return
+                    more = message.get('more_body', False)
+                    lines = splitter.feed(message.get('body', b''))
+                    if not more:
+                        lines += splitter.close()
+                    if not lines:
+                        continue
+                    results = await loop.run_in_executor(self.cpu_executor, analyzer.score_lines, lines)
+                    if send_results and results:
+                        yield b''.join(dumps(result, sort_keys=False) + b'\n' for result in results)
+                    if summary_every and splitter.number // summary_every > summaries:
+                        summaries = splitter.number // summary_every
+                        yield dumps({"summary": analyzer.summary(), "final": False}, sort_keys=False) + b'\n'
+            except Exception as e:
+                logger.exception(f"Error analyzing stream: {str(e)}")
+                yield dumps({"error": f"Error analyzing stream: {str(e)}"}, sort_keys=False) + b'\n'
+            yield dumps({"summary": analyzer.summary(), "final": True}, sort_keys=False) + b'\n'
+            logger.info(f"Stream complete: {analyzer.scores.count} analyzed, {analyzer.errors} errors")
+
+        return 200, generate(), {'Content-Type': 'application/x-ndjson'}
+
+    async def call_flask(self, scope, receive, send):
+        # Run the Flask view on the WSGI thread pool and relay its response
+        body = await self.read_body(receive)
+        environ = self.wsgi_environ(scope, body)
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin1'), value.encode('latin1')) for name, value in headers]
+
+        def run():
+            result = self.flask_app(environ, start_response)
+            try:
+                return b''.join(result)
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+
+        content = await asyncio.get_running_loop().run_in_executor(self.wsgi_executor, run)
+        await send({'type': 'http.response.start', 'status': response['status'], 'headers': response['headers']})
+        await send({'type': 'http.response.body', 'body': content})
+
+    @staticmethod
+    def wsgi_environ(scope, body):
+        server_name, server_port = scope.get('server') or ('localhost', 80)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', ''),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin1'),
+            'QUERY_STRING': scope['query_string'].decode('latin1'),
+            'SERVER_NAME': server_name,
+            'SERVER_PORT': str(server_port),
+            'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+            'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope['headers']:
+            name = name.decode('latin1').upper().replace('-', '_')
+            value = value.decode('latin1')
+            if name == 'CONTENT_TYPE':
+                environ['CONTENT_TYPE'] = value
+            elif name != 'CONTENT_LENGTH':
+                key = f'HTTP_{name}'
+                environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
+
+app = AnalysisApp(main.app)
@@ -0,0 +1,137 @@
+"""Sync (gunicorn) vs async (uvicorn) serving of /analyze/url against a slow site.
+
+Both servers get the same number of worker processes and are hit with the same
+burst of concurrent requests for pages from a local site that waits ``--delay``
+seconds before answering. The sync workers can only wait on one fetch per
+thread; the async workers wait on all of them at once.
+
+Run from the server directory:
+
+    python -m bench.bench_async --requests 200 --delay 1 --workers 2 --output async.json
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+from bench.fixtures import StaticSite, make_corpus
+from bench.report import percentiles, write_json
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def server_command(server, port, workers, threads):
+    bind = f"127.0.0.1:{port}"
+    if server == 'sync':
+        return [sys.executable, '-m', 'gunicorn', '--preload', '-w', str(workers), '--threads', str(threads),
+                '-b', bind, 'main:app']
+    return [sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1', '--port', str(port),
+            '--workers', str(workers), '--log-level', 'warning', '--no-access-log']
+
+
+def wait_until_up(base_url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"{base_url}/metrics", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not start")
+
+
+async def burst(base_url, urls, timeout):
+    # Every request is in flight at once; "concurrency" is the most that were ever open together
+    in_flight, peak = 0, 0
+    timings, errors = [], []
+    limits = httpx.Limits(max_connections=len(urls), max_keepalive_connections=len(urls))
+
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        async def one(url):
+            nonlocal in_flight, peak
+            start = time.perf_counter()
+            in_flight += 1
+            peak = max(peak, in_flight)
+            try:
+                response = await client.post(f"{base_url}/analyze/url", json={"url": url})
+                if response.status_code >= 400:
+                    errors.append(response.status_code)
+            except httpx.HTTPError as e:
+                errors.append(type(e).__name__)
+            finally:
+                in_flight -= 1
+            timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(url) for url in urls))
+        return time.perf_counter() - start, timings, errors, peak
+
+
+def run_server(server, args, site, env):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    process = subprocess.Popen(server_command(server, port, args.workers, args.threads), cwd=SERVER_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_up(base_url)
+        urls = [site.url('short', i % args.per_size) for i in range(args.requests)]
+        elapsed, timings, errors, peak = asyncio.run(burst(base_url, urls, args.timeout))
+    finally:
+        process.terminate()
+        process.wait()
+
+    # With every fetch waiting `delay`, wall time / delay is how many rounds of waiting the server needed
+    return {
+        "server": server,
+        "requests": len(timings),
+        "errors": len(errors),
+        "wallSeconds": elapsed,
+        "requestsPerSecond": len(timings) / elapsed,
+        "effectiveConcurrency": len(timings) * args.delay / elapsed,
+        "peakClientConcurrency": peak,
+        **percentiles(timings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--servers', default='sync,async')
+    parser.add_argument('--requests', type=int, default=200, help="requests in the burst")
+    parser.add_argument('--delay', type=float, default=1.0, help="seconds the site waits before each page")
+    parser.add_argument('--workers', type=int, default=2, help="worker processes per server")
+    parser.add_argument('--threads', type=int, default=1, help="threads per gunicorn worker")
+    parser.add_argument('--per-size', type=int, default=20, help="distinct pages")
+    parser.add_argument('--timeout', type=float, default=600)
+    parser.add_argument('--output', help="write results to this JSON file")
+    args = parser.parse_args()
+
+    # No payload logging, no result cache, no page cache revalidation between the two runs
+    env = dict(os.environ, LOG_SAMPLE_RATE='0', LOG_LEVEL='WARNING', RESULT_CACHE_BYTES='0', PAGE_CACHE_BYTES='0')
+
+    results = []
+    with StaticSite(make_corpus(args.per_size), delay=args.delay) as site:
+        for server in args.servers.split(','):
+            row = run_server(server, args, site, env)
+            results.append(row)
+            print(f"{server:<6} {row['requests']} requests in {row['wallSeconds']:6.2f} s  "
+                  f"{row['requestsPerSecond']:7.1f} req/s  p50 {row['p50Ms']:8.1f} ms  p95 {row['p95Ms']:8.1f} ms  "
+                  f"effective concurrency {row['effectiveConcurrency']:6.1f}  errors {row['errors']}")
+
+    if args.output:
+        write_json(args.output, 'async', vars(args), results)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
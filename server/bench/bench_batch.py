@@ -0,0 +1,62 @@
+"""Compare per-document latency of /analyze/text against /analyze/text/batch.
+
+Run from the server directory:
+
+    python -m bench.bench_batch --documents 2000 --batch-size 500
+"""
+import argparse
+import contextlib
+import io
+import random
+import time
+
+SAMPLE_SENTENCES = [
+    "The product arrived quickly and works great.",
+    "Terrible customer service, I will never order again.",
+    "It is okay, nothing special but does the job.",
+    "Absolutely love the design and the battery life is amazing!",
+    "The instructions were confusing and the app keeps crashing.",
+    "Decent value for the price, although shipping was slow.",
+]
+
+
+def make_documents(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        {"id": str(i), "text": " ".join(rng.choice(SAMPLE_SENTENCES) for _ in range(rng.randint(1, 4)))}
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--documents', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    from main import app
+    client = app.test_client()
+    documents = make_documents(args.documents)
+
+    # Silence the per-request prints so they do not dominate the single-item timings
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for document in documents:
+            client.post('/analyze/text', json={"text": document["text"]})
+        single_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for offset in range(0, len(documents), args.batch_size):
+            client.post('/analyze/text/batch', json={"documents": documents[offset:offset + args.batch_size]})
+        batch_seconds = time.perf_counter() - start
+
+    single_us = single_seconds / len(documents) * 1e6
+    batch_us = batch_seconds / len(documents) * 1e6
+    print(f"documents:        {len(documents)}")
+    print(f"single route:     {single_us:.1f} us/doc")
+    print(f"batch route:      {batch_us:.1f} us/doc (batch size {args.batch_size})")
+    print(f"speedup:          {single_us / batch_us:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
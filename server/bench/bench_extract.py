@@ -0,0 +1,58 @@
+"""Benchmark streaming <p> extraction against the BeautifulSoup path.
+
+Run from the server directory:
+
+    python -m bench.bench_extract --megabytes 5
+"""
+import argparse
+import time
+import tracemalloc
+
+from extract import extract_paragraph_text, stream_paragraph_text
+
+
+def make_page(megabytes):
+    paragraph = ("<p>The <b>new</b> release is fast and reliable, but the docs are still "
+                 "a little thin in places.</p>\n")
+    filler = "<div class=\"sidebar\"><a href=\"/related\">Related article</a><span>Sponsored</span></div>\n"
+    block = (paragraph * 3 + filler) * 50
+    repeats = max(1, int(megabytes * 1024 * 1024 / len(block)))
+    return "<html><head><title>Bench</title></head><body>" + block * repeats + "</body></html>"
+
+
+def measure(label, func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} {seconds * 1000:9.1f} ms   peak {peak / 1024 / 1024:7.1f} MiB")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--megabytes', type=float, default=5)
+    parser.add_argument('--max-chars', type=int, default=200000)
+    parser.add_argument('--chunk-size', type=int, default=16384)
+    args = parser.parse_args()
+
+    html = make_page(args.megabytes)
+    body = html.encode('utf-8')
+    chunks = lambda: (body[i:i + args.chunk_size] for i in range(0, len(body), args.chunk_size))
+    print(f"page size: {len(body) / 1024 / 1024:.1f} MiB")
+
+    soup_text = measure("beautifulsoup", lambda: extract_paragraph_text(html))
+    stream_text, _, _, _ = measure("stream (no budget)", lambda: stream_paragraph_text(chunks()))
+    _, bytes_read, _, truncated = measure(
+        f"stream (max {args.max_chars} chars)",
+        lambda: stream_paragraph_text(chunks(), max_chars=args.max_chars)
+    )
+
+    print(f"same text without budget: {soup_text == stream_text}")
+    print(f"budgeted read: {bytes_read / 1024:.0f} KiB of {len(body) / 1024:.0f} KiB (truncated={truncated})")
+
+
+if __name__ == '__main__':
+    main()
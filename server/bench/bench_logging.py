@@ -0,0 +1,87 @@
+"""Measure the request-thread cost of logging a request's payloads: full prints vs the sampled queue pipeline.
+
+Run from the server directory:
+
+    python -m bench.bench_logging --requests 500 --kilobytes 100
+"""
+import argparse
+import contextlib
+import json
+import os
+import tempfile
+import time
+
+from bench.bench_batch import SAMPLE_SENTENCES
+
+import logs
+
+
+def make_payload(kilobytes):
+    text = ' '.join(SAMPLE_SENTENCES)
+    text = (text + ' ') * (kilobytes * 1024 // (len(text) + 1) + 1)
+    result = {
+        "sentiment": "positive",
+        "score": 0.42,
+        "confidence": 0.77,
+        "sections": [{"start": i * 2000, "end": (i + 1) * 2000, "score": 0.1, "confidence": 0.6} for i in range(len(text) // 2000)]
+    }
+    return {"text": text, "body": json.dumps({"text": text}).encode('utf-8')}, result
+
+
+def print_request(data, result):
+    # What every route did before: synchronous writes of the whole payload on the request thread
+    print("Received text analysis request:", {"text": data['text']})
+    print(f"Analyzing text: {data['text']}")
+    print("Text analysis result:", result)
+
+
+def pipeline_request(data, result):
+    # The routes log the raw request body, which Flask already holds as bytes
+    logs.bind_request()
+    logs.log_payload("Received text analysis request", request=data['body'])
+    logs.logger.info("Analyzing text", extra={"chars": len(data['text'])})
+    logs.log_payload("Text analysis result", result=result)
+
+
+def run(requests, func, data, result):
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        func(data, result)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return sum(timings) / len(timings), timings[int(len(timings) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--kilobytes', type=int, default=100)
+    args = parser.parse_args()
+
+    data, result = make_payload(args.kilobytes)
+
+    # Logs go to a real file, like a container's stdout captured by a log shipper
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, 'print.log'), 'w') as out, contextlib.redirect_stdout(out):
+            rows = [("print, full payload", *run(args.requests, print_request, data, result))]
+
+        with open(os.path.join(directory, 'pipeline.log'), 'w') as out:
+            pipeline = logs.configure_logging(stream=out)
+            for sample_rate, payload_chars in ((0.01, 200), (0.01, 0), (1.0, 200)):
+                logs.configure_logging(sample_rate=sample_rate, payload_chars=payload_chars)
+                label = f"queue, sample {sample_rate:g}, {'sizes only' if not payload_chars else f'{payload_chars} chars'}"
+                rows.append((label, *run(args.requests, pipeline_request, data, result)))
+            pipeline.stop()
+
+        sizes = {name: os.path.getsize(os.path.join(directory, name)) for name in ('print.log', 'pipeline.log')}
+
+    print(f"{args.requests} requests, {args.kilobytes} KiB text each")
+    print(f"{'mode':<34} {'mean ms':>9} {'p99 ms':>9}")
+    for label, mean, p99 in rows:
+        print(f"{label:<34} {mean * 1000:>9.3f} {p99 * 1000:>9.3f}")
+    print(f"log volume: print {sizes['print.log'] / 1024 / 1024:.1f} MiB, pipeline (all three runs) {sizes['pipeline.log'] / 1024:.1f} KiB")
+
+
+if __name__ == '__main__':
+    main()
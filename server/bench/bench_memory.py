@@ -0,0 +1,128 @@
+"""Memory per gunicorn worker with per-process lexicon dicts vs the memory-mapped lexicon file.
+
+Each mode starts gunicorn with the same number of workers, sends the same
+/analyze/text traffic so every worker has scored text (and run its garbage
+collector), then reads /proc/<pid>/smaps_rollup for the master and each
+worker. RSS counts shared pages in full in every process; PSS splits them
+between the processes sharing them, so the PSS total is the memory the whole
+server really uses, and "private" is what each extra worker adds.
+
+Linux only. Run from the server directory:
+
+    python -m bench.bench_memory --workers 4 --requests 2000 --output memory.json
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from bench.bench_async import free_port, wait_until_up
+from bench.fixtures import make_corpus
+from bench.report import write_json
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SMAPS_FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty')
+
+
+def smaps(pid):
+    # {field: MiB} from the kernel's per-process totals
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(':')
+            if name in SMAPS_FIELDS:
+                values[name] = int(rest.split()[0]) / 1024
+    return values
+
+
+def children(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(child) for child in f.read().split()]
+
+
+def drive(base_url, texts, requests, concurrency):
+    # Enough concurrent clients that gunicorn spreads the requests over every worker
+    def one(i):
+        response = client.post(f"{base_url}/analyze/text", json={"text": texts[i % len(texts)]})
+        response.raise_for_status()
+
+    limits = httpx.Limits(max_connections=concurrency)
+    with httpx.Client(timeout=120, limits=limits) as client, ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(one, range(requests)))
+
+
+def run_mode(mode, args, texts, lexicon_path):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    # No result cache, so every request scores; no scoring pool, so only gunicorn processes hold lexicons
+    env = dict(os.environ, LOG_SAMPLE_RATE='0', LOG_LEVEL='WARNING', RESULT_CACHE_BYTES='0', SCORE_WORKERS='0')
+    env.pop('LEXICON_PATH', None)
+    if mode == 'mapped':
+        env['LEXICON_PATH'] = lexicon_path
+    command = [sys.executable, '-m', 'gunicorn', '-w', str(args.workers), '-b', f"127.0.0.1:{port}", 'main:app']
+    if args.preload:
+        command.insert(3, '--preload')
+
+    process = subprocess.Popen(command, cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_up(base_url)
+        drive(base_url, texts, args.requests, args.workers * 2)
+        master = smaps(process.pid)
+        workers = [smaps(pid) for pid in children(process.pid)]
+    finally:
+        process.terminate()
+        process.wait()
+
+    def mean(field):
+        return sum(worker[field] for worker in workers) / len(workers)
+
+    return {
+        "mode": mode,
+        "workers": len(workers),
+        "workerRssMb": mean('Rss'),
+        "workerPssMb": mean('Pss'),
+        "workerPrivateMb": mean('Private_Clean') + mean('Private_Dirty'),
+        "workerSharedMb": mean('Shared_Clean') + mean('Shared_Dirty'),
+        "masterRssMb": master['Rss'],
+        "totalPssMb": master['Pss'] + sum(worker['Pss'] for worker in workers),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modes', default='dict,mapped')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=2000, help="requests sent before measuring")
+    parser.add_argument('--no-preload', dest='preload', action='store_false',
+                        help="let each worker import main itself instead of forking a warmed master")
+    parser.add_argument('--output', help="write results to this JSON file")
+    args = parser.parse_args()
+
+    corpus = make_corpus(50)
+    texts = corpus['short'] + corpus['medium']
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        lexicon_path = os.path.join(directory, 'lexicons.bin')
+        # Compiled up front, so no server pays for it while being measured
+        subprocess.run([sys.executable, 'lexicon.py', lexicon_path], cwd=SERVER_DIR, check=True,
+                       stdout=subprocess.DEVNULL)
+        for mode in args.modes.split(','):
+            row = run_mode(mode, args, texts, lexicon_path)
+            results.append(row)
+            print(f"{mode:<7} {row['workers']} workers  RSS {row['workerRssMb']:6.1f} MiB  PSS {row['workerPssMb']:6.1f} MiB  "
+                  f"private {row['workerPrivateMb']:6.1f} MiB  shared {row['workerSharedMb']:6.1f} MiB per worker  "
+                  f"total PSS {row['totalPssMb']:7.1f} MiB")
+
+    if args.output:
+        write_json(args.output, 'memory', vars(args), results)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Encode time and bytes on the wire for the hashtag timeline and batch responses.
+
+Each payload is built once by the route's own scoring function, then sent
+through each response view (full, compact, a fields selection). For every view
+the report gives the encode time with the json module as Flask's default
+provider uses it and with payload.dumps (orjson when installed), and the bytes
+on the wire uncompressed, gzip-compressed and brotli-compressed (when brotli is
+installed) along with the compression time.
+
+Run from the server directory:
+
+    python -m bench.bench_payload --documents 1000 --hours 168 --bucket-minutes 5 --output payload.json
+"""
+import argparse
+import gzip
+import json
+import time
+from datetime import datetime
+
+from bench.bench_batch import make_documents
+from bench.report import percentiles, write_json
+import payload
+from payload import FieldSelection
+
+VIEWS = {
+    "hashtag": {
+        "full": {},
+        "compact": {"compact": True},
+        "fields": {"fields": "sentiment,score,timeline.sentiment"},
+    },
+    "batch": {
+        "full": {},
+        "compact": {"compact": True},
+        "fields": {"fields": "sentiment,score"},
+    },
+}
+
+
+def flask_default(obj):
+    # What jsonify wrote before: sorted keys, compact separators, ASCII only
+    return json.dumps(obj, sort_keys=True, separators=(',', ':')).encode()
+
+
+def timed(func, arg, repeat):
+    # (result, timings) over `repeat` runs
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(arg)
+        timings.append(time.perf_counter() - start)
+    return result, timings
+
+
+def build_payloads(args):
+    import main
+    from timeline import floor_time
+
+    now = floor_time(datetime.now(), args.bucket_minutes)
+    hashtag = main.score_hashtag('benchmark', now, args.hours, args.bucket_minutes, False)
+    batch = main.score_documents(make_documents(args.documents))
+    return {"hashtag": hashtag, "batch": batch}
+
+
+def view(name, built, options):
+    fields = FieldSelection.parse(options.get('fields'), options.get('compact'))
+    if name == 'batch':
+        # As the batch route does: the selection applies to each document
+        return {"results": [fields.apply(result) for result in built["results"]], "stats": built["stats"]}
+    return fields.apply(built)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--documents', type=int, default=1000, help="documents in the batch payload")
+    parser.add_argument('--hours', type=int, default=168, help="hashtag timeline window")
+    parser.add_argument('--bucket-minutes', type=int, default=5, help="hashtag timeline bucket size")
+    parser.add_argument('--repeat', type=int, default=50, help="runs of each encode and compress")
+    parser.add_argument('--output', help="write results to this JSON file")
+    args = parser.parse_args()
+
+    encoders = {"json": flask_default, "orjson" if payload.orjson is not None else "dumps": payload.dumps}
+    compressors = {"gzip": lambda body: gzip.compress(body, payload.GZIP_LEVEL, mtime=0)}
+    if payload.brotli is not None:
+        compressors["br"] = lambda body: payload.brotli.compress(body, quality=payload.BROTLI_QUALITY)
+
+    results = []
+    for name, built in build_payloads(args).items():
+        for view_name, options in VIEWS[name].items():
+            obj = view(name, built, options)
+            for encoder, encode in encoders.items():
+                body, timings = timed(encode, obj, args.repeat)
+                row = {"payload": name, "view": view_name, "stage": "encode", "method": encoder,
+                       "bytes": len(body), **percentiles(timings)}
+                results.append(row)
+                print(f"{name:<7} {view_name:<7} encode   {encoder:<6}  {row['bytes']:>9} B  "
+                      f"p50 {row['p50Ms']:8.3f} ms  p95 {row['p95Ms']:8.3f} ms")
+
+            body = payload.dumps(obj)
+            for method, compress in compressors.items():
+                compressed, timings = timed(compress, body, args.repeat)
+                row = {"payload": name, "view": view_name, "stage": "compress", "method": method,
+                       "bytes": len(compressed), "ratio": len(compressed) / len(body), **percentiles(timings)}
+                results.append(row)
+                print(f"{name:<7} {view_name:<7} compress {method:<6}  {row['bytes']:>9} B  "
+                      f"p50 {row['p50Ms']:8.3f} ms  p95 {row['p95Ms']:8.3f} ms  ratio {row['ratio']:.3f}")
+
+    if args.output:
+        write_json(args.output, 'payload', vars(args), results)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Microbenchmark the fused clean/count stage against the original multi-pass functions.
+
+Run from the server directory:
+
+    python -m bench.bench_textproc --megabytes 1
+"""
+import argparse
+import random
+import re
+import time
+from collections import Counter
+
+from nltk.corpus import stopwords
+from nltk.tokenize import word_tokenize
+
+from analysis import clean_and_count
+
+WORDS = ("the service was great but the food cannot be called good "
+         "we gonna come back I wanna say the staff were friendly and fast "
+         "prices are high 2024 café naïve über_cool résumé").split()
+NOISE = ["<p>", "</p>", "<a href='https://example.com/x?y=1'>", "</a>", "https://example.com/page",
+         "www.example.org", "!", "?", ",", ".", "...", "(", ")", "--", "'s", "\n"]
+
+
+def original_clean_text(text):
+    # clean_text before the fused stage, kept as the reference implementation
+    text = re.sub(r'<[^>]+>', '', text)
+    text = re.sub(r'http\S+|www.\S+', '', text)
+    text = re.sub(r'[^\w\s]', '', text)
+    text = text.lower()
+    return text
+
+
+def original_get_word_frequency(text, top_n=10):
+    # get_word_frequency before the fused stage, kept as the reference implementation
+    tokens = word_tokenize(text)
+    stop_words = set(stopwords.words('english'))
+    tokens = [word for word in tokens if word.lower() not in stop_words and len(word) > 2]
+    word_freq = Counter(tokens).most_common(top_n)
+    return [{"word": word, "count": count} for word, count in word_freq]
+
+
+def make_text(megabytes, seed=0):
+    rng = random.Random(seed)
+    parts, size = [], 0
+    while size < megabytes * 1024 * 1024:
+        piece = rng.choice(NOISE) if rng.random() < 0.15 else rng.choice(WORDS)
+        if rng.random() < 0.1:
+            piece = piece.upper()
+        parts.append(piece)
+        size += len(piece) + 1
+    return ' '.join(parts)
+
+
+def best_of(repeats, func):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--megabytes', type=float, default=1)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    text = make_text(args.megabytes)
+
+    def original():
+        cleaned = original_clean_text(text)
+        return cleaned, original_get_word_frequency(cleaned)
+
+    original_seconds, expected = best_of(args.repeats, original)
+    fused_seconds, actual = best_of(args.repeats, lambda: clean_and_count(text))
+
+    print(f"input:      {len(text) / 1024 / 1024:.2f} MiB")
+    print(f"original:   {original_seconds * 1000:.1f} ms")
+    print(f"fused:      {fused_seconds * 1000:.1f} ms")
+    print(f"speedup:    {original_seconds / fused_seconds:.2f}x")
+    print(f"identical:  cleaned={expected[0] == actual[0]} frequencies={expected[1] == actual[1]}")
+
+
+if __name__ == '__main__':
+    main()
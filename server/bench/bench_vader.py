@@ -0,0 +1,48 @@
+"""Compare NumpyVader against NLTK's SentimentIntensityAnalyzer for speed and agreement.
+
+Run from the server directory:
+
+    python -m bench.bench_vader --documents 5000
+"""
+import argparse
+import time
+
+from nltk.sentiment.vader import SentimentIntensityAnalyzer
+
+from bench.bench_batch import make_documents
+from vader_np import NumpyVader
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--documents', type=int, default=5000)
+    args = parser.parse_args()
+
+    texts = [document["text"] for document in make_documents(args.documents)]
+    nltk_vader = SentimentIntensityAnalyzer()
+    numpy_vader = NumpyVader(nltk_vader.lexicon, nltk_vader.constants)
+
+    start = time.perf_counter()
+    expected = [nltk_vader.polarity_scores(text) for text in texts]
+    nltk_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = numpy_vader.polarity_scores_batch(texts)
+    numpy_seconds = time.perf_counter() - start
+
+    max_diff = {
+        key: max(abs(a[key] - b[key]) for a, b in zip(expected, actual))
+        for key in ('neg', 'neu', 'pos', 'compound')
+    }
+    mismatches = sum(a != b for a, b in zip(expected, actual))
+
+    print(f"documents:   {len(texts)}")
+    print(f"nltk:        {nltk_seconds / len(texts) * 1e6:.1f} us/doc")
+    print(f"numpy:       {numpy_seconds / len(texts) * 1e6:.1f} us/doc")
+    print(f"speedup:     {nltk_seconds / numpy_seconds:.2f}x")
+    print(f"mismatches:  {mismatches}")
+    print("max diff:    " + ", ".join(f"{key}={value:.4g}" for key, value in max_diff.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Latency and quality of the full, fast and auto scoring tiers on a hand-labeled corpus.
+
+Every text is scored with each tier, in-process and without the scoring pool.
+For each tier the report gives p50/p95 latency, accuracy against the gold
+labels, and agreement with the full VADER + TextBlob blend: how often the label
+matches and the mean absolute score difference.
+
+Run from the server directory:
+
+    python -m bench.eval_tiers --repeat 5 --output tiers.json
+"""
+import argparse
+import time
+
+from analysis import analyze_document, clean_text, sentiment_label
+from bench.labeled import LABELED_SENTENCES, make_long_documents
+from bench.report import percentiles, write_json
+from engine import SCORING_TIERS, get_engine
+
+
+def score_all(documents, tier, repeat):
+    # Returns (scores, timings); the timing of a text is its fastest of `repeat` runs
+    scores, timings = [], []
+    for text, _ in documents:
+        cleaned_text = clean_text(text)
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            analysis, _ = analyze_document(text, cleaned_text, tier=tier)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        scores.append(analysis['score'])
+        timings.append(best)
+    return scores, timings
+
+
+def evaluate(name, documents, repeat):
+    gold = [label for _, label in documents]
+    by_tier = {tier: score_all(documents, tier, repeat) for tier in SCORING_TIERS}
+    full_scores = by_tier['full'][0]
+    full_labels = [sentiment_label(score) for score in full_scores]
+
+    rows = []
+    for tier, (scores, timings) in by_tier.items():
+        labels = [sentiment_label(score) for score in scores]
+        rows.append({
+            "corpus": name,
+            "tier": tier,
+            "documents": len(documents),
+            "accuracy": sum(a == b for a, b in zip(labels, gold)) / len(gold),
+            "labelAgreementWithFull": sum(a == b for a, b in zip(labels, full_labels)) / len(gold),
+            "meanAbsScoreDiffFromFull": sum(abs(a - b) for a, b in zip(scores, full_scores)) / len(gold),
+            "meanMs": sum(timings) / len(timings) * 1000,
+            **percentiles(timings),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3, help="runs per text; the fastest is kept")
+    parser.add_argument('--long-per-label', type=int, default=5, help="long documents per gold label")
+    parser.add_argument('--long-chars', type=int, default=8000, help="approximate length of each long document")
+    parser.add_argument('--output', help="write results to this JSON file")
+    args = parser.parse_args()
+
+    get_engine().warm_up()
+    corpora = {
+        "short": LABELED_SENTENCES,
+        "long": make_long_documents(args.long_per_label, args.long_chars),
+    }
+
+    results = []
+    for name, documents in corpora.items():
+        for row in evaluate(name, documents, args.repeat):
+            results.append(row)
+            print(f"{name:<5} {row['tier']:<4}  p50 {row['p50Ms']:8.3f} ms  p95 {row['p95Ms']:8.3f} ms  "
+                  f"accuracy {row['accuracy']:.2f}  agreement {row['labelAgreementWithFull']:.2f}  "
+                  f"mean |diff| {row['meanAbsScoreDiffFromFull']:.3f}")
+
+    if args.output:
+        write_json(args.output, 'tiers', vars(args), results)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Fixed benchmark corpus and a local static HTML server for URL cases.
+
+The corpus is generated from a seeded RNG, so every run and every machine sees
+exactly the same texts.
+"""
+import random
+import threading
+import time
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bench.bench_batch import SAMPLE_SENTENCES
+
+EXTRA_SENTENCES = [
+    "Check out https://example.com/deal for the full review!!!",
+    "The new update is <b>fantastic</b> but the login page is still broken :(",
+    "I cannot believe how good this coffee is, we gonna come back tomorrow.",
+    "Worst. Experience. Ever. Nobody answered the phone for two hours.",
+    "Mixed feelings: great camera, awful battery, average screen.",
+    "Honestly not sure what to think about the redesign yet.",
+]
+
+SENTENCES = SAMPLE_SENTENCES + EXTRA_SENTENCES
+
+# Approximate length of each text class in characters; "long" crosses the long-document threshold
+SIZES = {"short": 80, "medium": 2000, "long": 40000}
+
+
+def make_text(rng, chars):
+    parts, size = [], 0
+    while size < chars:
+        sentence = rng.choice(SENTENCES)
+        parts.append(sentence)
+        size += len(sentence) + 1
+    return ' '.join(parts)
+
+
+def make_corpus(per_size=50, seed=0):
+    """Return ``{size: [text, ...]}`` with ``per_size`` distinct texts for each of ``SIZES``."""
+    rng = random.Random(seed)
+    return {size: [make_text(rng, chars) for _ in range(per_size)] for size, chars in SIZES.items()}
+
+
+def make_page(text):
+    # Paragraph text wrapped in the boilerplate a real article page carries
+    paragraphs = ''.join(f"<p>{escape(text[start:start + 500])}</p>\n" for start in range(0, len(text), 500))
+    return (
+        "<!DOCTYPE html><html><head><title>Benchmark page</title>"
+        "<script>var analytics = {enabled: true};</script></head><body>"
+        "<nav><a href='/'>Home</a> <a href='/news'>News</a></nav>"
+        f"<article>{paragraphs}</article>"
+        "<footer>Copyright benchmark</footer></body></html>"
+    ).encode('utf-8')
+
+
+class SiteServer(ThreadingHTTPServer):
+    # Hundreds of clients may connect at once; the default backlog of 5 would make them retry SYNs
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+class StaticSite:
+    """Serves ``/<size>/<n>.html`` pages built from the corpus on a local port, in a background thread.
+
+    Use as a context manager; ``url(size, n)`` gives a page's address. With
+    ``delay`` every response waits that many seconds first, standing in for a
+    slow remote site.
+    """
+
+    def __init__(self, corpus, delay=0):
+        self.delay = delay
+        self.pages = {
+            f"/{size}/{index}.html": make_page(text)
+            for size, texts in corpus.items()
+            for index, text in enumerate(texts)
+        }
+        self.server = None
+
+    def __enter__(self):
+        pages, delay = self.pages, self.delay
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out in separate writes; without this, Nagle's algorithm adds ~40 ms per page
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                body = pages.get(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                if delay:
+                    time.sleep(delay)
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = SiteServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def url(self, size, index):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}/{size}/{index}.html"
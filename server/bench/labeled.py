@@ -0,0 +1,68 @@
+"""Small hand-labeled corpus for checking scoring quality offline.
+
+Each entry is ``(text, label)`` with label "positive", "negative" or "neutral",
+assigned by reading the text, not by any scorer. Long documents are built by
+joining sentences that share a label, so their gold label is unambiguous.
+"""
+import random
+
+LABELED_SENTENCES = [
+    ("The product arrived quickly and works great.", "positive"),
+    ("Absolutely love the design and the battery life is amazing!", "positive"),
+    ("Best purchase I have made all year, highly recommended.", "positive"),
+    ("The staff were friendly and the room was spotless.", "positive"),
+    ("What a fantastic concert, the band sounded incredible.", "positive"),
+    ("I am really happy with how fast support fixed my issue.", "positive"),
+    ("The food was delicious and the portions were generous.", "positive"),
+    ("This update makes the app so much smoother, great job.", "positive"),
+    ("A beautiful, moving film with wonderful performances.", "positive"),
+    ("Setup was easy and everything worked on the first try.", "positive"),
+    ("Great value for money, I would buy it again.", "positive"),
+    ("Thanks to the team, the launch went perfectly.", "positive"),
+    ("The hike was tough but the views were breathtaking.", "positive"),
+    ("Our new neighbours are kind and very helpful.", "positive"),
+    ("Terrible customer service, I will never order again.", "negative"),
+    ("The instructions were confusing and the app keeps crashing.", "negative"),
+    ("Worst. Experience. Ever. Nobody answered the phone for two hours.", "negative"),
+    ("The package arrived broken and the refund was denied.", "negative"),
+    ("I hate how slow and buggy this laptop has become.", "negative"),
+    ("The hotel was dirty, noisy and overpriced.", "negative"),
+    ("Awful food, rude waiters and a forty minute wait.", "negative"),
+    ("This is a disappointing sequel with a boring plot.", "negative"),
+    ("My flight was cancelled and nobody helped us.", "negative"),
+    ("The battery died after a week, total waste of money.", "negative"),
+    ("I am frustrated that the bug is still not fixed.", "negative"),
+    ("The meeting was a painful mess and nothing got decided.", "negative"),
+    ("Sadly the shop closed and the staff lost their jobs.", "negative"),
+    ("The screen cracked on day one, really poor quality.", "negative"),
+    ("The store opens at nine on weekdays.", "neutral"),
+    ("The report has twelve pages and three appendices.", "neutral"),
+    ("The train leaves from platform four.", "neutral"),
+    ("The package contains a charger and a cable.", "neutral"),
+    ("The meeting has been moved to Thursday afternoon.", "neutral"),
+    ("The museum is located near the central station.", "neutral"),
+    ("Version 2.3 was released on Monday.", "neutral"),
+    ("The recipe uses flour, water and salt.", "neutral"),
+    ("The survey was sent to all employees last week.", "neutral"),
+    ("The library is closed on public holidays.", "neutral"),
+    ("The phone comes in black and silver.", "neutral"),
+    ("The city council meets every second Tuesday.", "neutral"),
+]
+
+LABELS = ('positive', 'negative', 'neutral')
+
+
+def make_long_documents(per_label=5, chars=8000, seed=0):
+    """Return ``[(text, label), ...]`` of ``chars``-long texts joined from same-label sentences."""
+    rng = random.Random(seed)
+    by_label = {label: [text for text, gold in LABELED_SENTENCES if gold == label] for label in LABELS}
+    documents = []
+    for label in LABELS:
+        for _ in range(per_label):
+            parts, size = [], 0
+            while size < chars:
+                sentence = rng.choice(by_label[label])
+                parts.append(sentence)
+                size += len(sentence) + 1
+            documents.append((' '.join(parts), label))
+    return documents
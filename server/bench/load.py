@@ -0,0 +1,218 @@
+"""In-process load driver comparing the analysis backends across concurrency levels.
+
+Each (backend, concurrency) pair runs in a fresh subprocess so its peak RSS is
+its own; the Flask scoring pool's processes are not included. The app is
+driven in-process (WSGI test client for Flask, direct ASGI calls for FastAPI),
+so no server or network stack is measured except for URL cases, which fetch
+pages from a local static HTML server.
+
+Run from the server directory:
+
+    python -m bench.load --backends flask,api --concurrency 1,8,32 --output load.json
+"""
+import argparse
+import asyncio
+import importlib.util
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from bench.fixtures import SIZES, StaticSite, make_corpus
+from bench.report import peak_rss_mb, percentiles, write_json
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(SERVER_DIR)
+
+# Where each backend lives, how it is driven and which routes it has
+BACKENDS = {
+    'flask': {'path': os.path.join(SERVER_DIR, 'main.py'), 'interface': 'wsgi', 'routes': ('text', 'url', 'hashtag')},
+    'backend': {'path': os.path.join(REPO_DIR, 'backend', 'app.py'), 'interface': 'asgi', 'routes': ('url', 'hashtag')},
+    'api': {'path': os.path.join(REPO_DIR, 'api', 'main.py'), 'interface': 'asgi', 'routes': ('text', 'url', 'hashtag')},
+}
+
+HASHTAGS = ['HappyMonday', 'climate_change', 'WorstServiceEver', 'AI', 'GameNight', 'coffee_lovers']
+
+
+def make_cases(per_size, site_url):
+    """Return ``{case: (route, [json body, ...])}`` for every text size, URL size and hashtags."""
+    corpus = make_corpus(per_size)
+    cases = {}
+    for size, texts in corpus.items():
+        cases[f"text-{size}"] = ('/analyze/text', [{"text": text} for text in texts])
+        cases[f"url-{size}"] = ('/analyze/url', [{"url": f"{site_url}/{size}/{i}.html"} for i in range(len(texts))])
+    cases["hashtag"] = ('/analyze/hashtag', [{"hashtag": tag} for tag in HASHTAGS])
+    return cases
+
+
+def load_app(name):
+    backend = BACKENDS[name]
+    directory = os.path.dirname(backend['path'])
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    spec = importlib.util.spec_from_file_location(f"bench_app_{name}", backend['path'])
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app
+
+
+def run_wsgi(app, route, bodies, requests, concurrency):
+    # One test client per thread, all pulling from a shared request counter
+    counter = itertools.count()
+    timings, errors = [], []
+
+    def worker():
+        client = app.test_client()
+        while True:
+            n = next(counter)
+            if n >= requests:
+                return
+            start = time.perf_counter()
+            response = client.post(route, json=bodies[n % len(bodies)])
+            timings.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return timings, errors
+
+
+async def asgi_post(app, route, body):
+    # Minimal ASGI HTTP exchange, enough for JSON request/response routes
+    payload = json.dumps(body).encode('utf-8')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'POST',
+        'scheme': 'http', 'path': route, 'raw_path': route.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(payload)).encode())],
+        'client': ('127.0.0.1', 0), 'server': ('127.0.0.1', 80),
+    }
+    messages = [{'type': 'http.request', 'body': payload, 'more_body': False}]
+    status = []
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await app(scope, receive, send)
+    return status[0]
+
+
+def run_asgi(app, route, bodies, requests, concurrency):
+    counter = itertools.count()
+    timings, errors = [], []
+
+    async def worker():
+        while True:
+            n = next(counter)
+            if n >= requests:
+                return
+            start = time.perf_counter()
+            status = await asgi_post(app, route, bodies[n % len(bodies)])
+            timings.append(time.perf_counter() - start)
+            if status >= 400:
+                errors.append(status)
+
+    async def run():
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    asyncio.run(run())
+    return timings, errors
+
+
+def run_child(args):
+    # Inside the per-(backend, concurrency) subprocess
+    backend = BACKENDS[args.backend]
+    app = load_app(args.backend)
+    drive = run_wsgi if backend['interface'] == 'wsgi' else run_asgi
+    cases = make_cases(args.per_size, args.site_url)
+
+    results = []
+    for case in args.cases.split(','):
+        route, bodies = cases[case]
+        if route.rsplit('/', 1)[1] not in backend['routes']:
+            continue
+        drive(app, route, bodies[:1], 1, 1)  # warm the route up
+
+        start = time.perf_counter()
+        timings, errors = drive(app, route, bodies, args.requests, args.concurrency)
+        elapsed = time.perf_counter() - start
+        results.append({
+            "backend": args.backend,
+            "concurrency": args.concurrency,
+            "case": case,
+            "requests": len(timings),
+            "errors": len(errors),
+            "requestsPerSecond": len(timings) / elapsed,
+            **percentiles(timings),
+            "peakRssMb": peak_rss_mb()
+        })
+
+    with open(args.child_output, 'w') as f:
+        json.dump(results, f)
+
+
+def main():
+    default_cases = ','.join([f"text-{size}" for size in SIZES] + [f"url-{size}" for size in SIZES] + ['hashtag'])
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backends', default=','.join(BACKENDS))
+    parser.add_argument('--concurrency', default='1,8,32', help="comma-separated concurrency levels")
+    parser.add_argument('--cases', default=default_cases)
+    parser.add_argument('--requests', type=int, default=200, help="requests per case")
+    parser.add_argument('--per-size', type=int, default=20, help="distinct texts and pages of each size")
+    parser.add_argument('--cache', action='store_true', help="leave the Flask result cache on (off by default so repeats are rescored)")
+    parser.add_argument('--output', help="write results to this JSON file")
+    parser.add_argument('--backend', help=argparse.SUPPRESS)
+    parser.add_argument('--site-url', help=argparse.SUPPRESS)
+    parser.add_argument('--child-output', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.backend:
+        args.concurrency = int(args.concurrency)
+        return run_child(args)
+
+    # The apps log every request; keep that out of the timings and the terminal
+    env = dict(os.environ, LOG_SAMPLE_RATE='0', LOG_LEVEL='WARNING')
+    if not args.cache:
+        env['RESULT_CACHE_BYTES'] = '0'
+
+    results = []
+    with StaticSite(make_corpus(args.per_size)) as site, tempfile.TemporaryDirectory() as directory:
+        host, port = site.server.server_address
+        for backend in args.backends.split(','):
+            for concurrency in args.concurrency.split(','):
+                child_output = os.path.join(directory, f"{backend}-{concurrency}.json")
+                command = [sys.executable, '-m', 'bench.load', '--backend', backend, '--concurrency', concurrency,
+                           '--cases', args.cases, '--requests', str(args.requests), '--per-size', str(args.per_size),
+                           '--site-url', f"http://{host}:{port}", '--child-output', child_output]
+                completed = subprocess.run(command, cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL)
+                if completed.returncode != 0:
+                    print(f"{backend} at concurrency {concurrency} failed with exit code {completed.returncode}")
+                    continue
+                with open(child_output) as f:
+                    rows = json.load(f)
+                results.extend(rows)
+                for row in rows:
+                    print(f"{row['backend']:<8} c={row['concurrency']:<3} {row['case']:<12} "
+                          f"{row['requestsPerSecond']:8.1f} req/s  p50 {row['p50Ms']:8.2f} ms  "
+                          f"p95 {row['p95Ms']:8.2f}  p99 {row['p99Ms']:8.2f}  errors {row['errors']:<4} "
+                          f"peak RSS {row['peakRssMb']:.0f} MB")
+
+    if args.output:
+        settings = {key: value for key, value in vars(args).items() if key not in ('backend', 'site_url', 'child_output')}
+        write_json(args.output, 'load', settings, results)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
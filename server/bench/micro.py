@@ -0,0 +1,57 @@
+"""Microbenchmark clean_text, get_word_frequency and analyze_sentiment on the fixed corpus.
+
+Run from the server directory:
+
+    python -m bench.micro --output micro.json
+"""
+import argparse
+import time
+
+from bench.fixtures import make_corpus
+from bench.report import percentiles, write_json
+
+
+def time_calls(func, inputs, repeats):
+    timings = []
+    for _ in range(repeats):
+        for value in inputs:
+            start = time.perf_counter()
+            func(value)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--per-size', type=int, default=50, help="texts of each size in the corpus")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', help="write results to this JSON file")
+    args = parser.parse_args()
+
+    from analysis import analyze_sentiment, clean_text, get_word_frequency
+    from engine import get_engine
+    get_engine().warm_up()
+
+    corpus = make_corpus(args.per_size)
+    results = []
+    for size, texts in corpus.items():
+        cleaned = [clean_text(text) for text in texts]
+        for name, func, inputs in (
+            ('clean_text', clean_text, texts),
+            ('get_word_frequency', get_word_frequency, cleaned),
+            ('analyze_sentiment', analyze_sentiment, cleaned),
+        ):
+            timings = time_calls(func, inputs, args.repeats)
+            row = {"function": name, "size": size, "calls": len(timings),
+                   "meanMs": sum(timings) / len(timings) * 1000, **percentiles(timings)}
+            results.append(row)
+            print(f"{name:<20} {size:<7} mean {row['meanMs']:9.3f} ms  p50 {row['p50Ms']:9.3f}  "
+                  f"p95 {row['p95Ms']:9.3f}  p99 {row['p99Ms']:9.3f}")
+
+    if args.output:
+        write_json(args.output, 'micro', vars(args), results)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""Shared helpers for benchmark results: latency percentiles, run metadata and JSON output."""
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+
+def percentiles(timings):
+    # Nearest-rank p50/p95/p99 in milliseconds
+    ordered = sorted(timings)
+    if not ordered:
+        return {"p50Ms": None, "p95Ms": None, "p99Ms": None}
+
+    def rank(q):
+        return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))] * 1000
+
+    return {"p50Ms": rank(0.50), "p95Ms": rank(0.95), "p99Ms": rank(0.99)}
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count()
+    }
+
+
+def write_json(path, benchmark, settings, results):
+    """Write ``results`` with the run's settings and environment, so two runs can be diffed."""
+    document = {"benchmark": benchmark, "environment": environment(), "settings": settings, "results": results}
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write('\n')
@@ -0,0 +1,93 @@
+"""Measure server cold start per STARTUP_MODE: import time, time to first response and an import breakdown.
+
+Every run is a fresh interpreter. "import" is the time to import main (what a
+gunicorn worker pays at boot without --preload), "first response" adds the
+first /analyze/text request, which in lazy mode also loads the lexicons.
+
+Run from the server directory:
+
+    python -m bench.startup --runs 5 --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from bench.report import write_json
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter; prints its timings as JSON on the last line
+CHILD = """
+import json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+response = main.app.test_client().post('/analyze/text', json={'text': 'Cold start check, looks great!'})
+assert response.status_code == 200, response.get_data(as_text=True)
+print(json.dumps({'importMs': (imported - start) * 1000, 'firstResponseMs': (time.perf_counter() - start) * 1000}))
+"""
+
+
+def child_env(mode):
+    # Logging and the scoring pool are not part of what is being measured
+    return dict(os.environ, STARTUP_MODE=mode, LOG_LEVEL='WARNING', SCORE_WORKERS='0')
+
+
+def run_once(mode):
+    completed = subprocess.run([sys.executable, '-c', CHILD], cwd=SERVER_DIR, env=child_env(mode),
+                               capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def import_breakdown(mode, top):
+    """Cumulative import time of each top-level package imported by main, from ``python -X importtime``."""
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'], cwd=SERVER_DIR,
+                               env=child_env(mode), capture_output=True, text=True, check=True)
+    packages = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if not cumulative.strip().isdigit():
+            continue
+        # Modules imported directly by main sit one nesting level (two spaces) below it
+        if not name.startswith('   ') or name.startswith('     '):
+            continue
+        package = name.strip().split('.')[0]
+        packages[package] = packages.get(package, 0) + int(cumulative) / 1000
+    return dict(sorted(packages.items(), key=lambda item: -item[1])[:top])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modes', default='eager,lazy')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help="packages to show in the import breakdown")
+    parser.add_argument('--output', help="write results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    for mode in args.modes.split(','):
+        runs = [run_once(mode) for _ in range(args.runs)]
+        row = {
+            "mode": mode,
+            "runs": args.runs,
+            "importMs": statistics.median(run['importMs'] for run in runs),
+            "firstResponseMs": statistics.median(run['firstResponseMs'] for run in runs),
+            "importBreakdownMs": import_breakdown(mode, args.top)
+        }
+        results.append(row)
+        print(f"{mode:<6} import {row['importMs']:8.1f} ms   first response {row['firstResponseMs']:8.1f} ms  (median of {args.runs})")
+        for package, ms in row['importBreakdownMs'].items():
+            print(f"         {package:<20} {ms:8.1f} ms")
+
+    if args.output:
+        write_json(args.output, 'startup', vars(args), results)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+# Version of the shape of cached results, part of every key. Bump it whenever a
+# response gains, loses or renames a field, so results stored by an earlier deploy
+# (the SQLite store keeps them across restarts) are no longer served; they expire
+# with their TTL. 2: details.tier (scoring tiers)
+RESULT_VERSION = 2
+
+
+def digest(kind, value):
+    """Stable content key for ``value`` (cleaned text, hashtag, ...) of a given analysis kind."""
+    return f"{kind}:{hashlib.sha256(f'{RESULT_VERSION}|{value}'.encode('utf-8')).hexdigest()}"
+
+
+class ResultCache:
+    """Bounded in-memory LRU cache of analysis results with per-entry TTLs.
+
+    The size cap is in bytes of the JSON-encoded results, so a few huge entries
+    cannot push the process past its memory budget.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, default_ttl=3600):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, size, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key, size)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, ttl=None):
+        size = len(json.dumps(value, separators=(',', ':')))
+        if size > self.max_bytes:
+            return False
+
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+
+            self._entries[key] = (value, size, expires_at)
+            self.current_bytes += size
+
+            # Evict least recently used entries until we are back under the cap
+            while self.current_bytes > self.max_bytes:
+                old_key, (_, old_size, _) = self._entries.popitem(last=False)
+                self.current_bytes -= old_size
+                self.evictions += 1
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "maxBytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+    def _remove(self, key, size):
+        del self._entries[key]
+        self.current_bytes -= size
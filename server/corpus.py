@@ -0,0 +1,256 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+
+from analysis import clean_text
+from engine import get_engine
+from logs import logger
+
+HASHTAG = re.compile(r'#(\w+)')
+
+# Aggregates are kept per hour; coarser buckets are sums of whole hours
+BUCKET_SECONDS = 3600
+
+# Posts are scored in batches of this many documents
+SCORE_BATCH_SIZE = 1000
+
+
+def post_timestamp(value):
+    # Epoch seconds or an ISO 8601 string; naive times are taken as local time
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    raise ValueError(f"Unsupported timestamp {value!r}")
+
+
+def post_hashtags(post):
+    # Explicit hashtags win; otherwise they are pulled from the text
+    tags = post.get('hashtags')
+    if tags is None:
+        tags = HASHTAG.findall(post.get('text') or '')
+    return {tag.lstrip('#').lower() for tag in tags if isinstance(tag, str) and tag.strip('#')}
+
+
+class PostCorpus:
+    """Local post feed indexed by hashtag, with per-hashtag hourly sentiment aggregates.
+
+    ``path`` is a JSONL or Parquet file or a directory of them. Each post has a
+    ``text``, a ``timestamp`` (epoch seconds or ISO 8601) and optionally a list
+    of ``hashtags`` and an ``id``.
+
+    Every post is scored once, when it is first read. For each of its hashtags the
+    score is folded into that hour's ``[count, sum, sum of squares]``, so a
+    timeline is answered from the aggregates in O(buckets) without rescoring.
+    ``aggregates`` (hashtag -> hour -> totals) is also the inverted hashtag index:
+    timelines only ever need a hashtag's hours, so post ids are not kept.
+    The aggregates roll: hours more than ``retention_hours`` old are dropped on
+    each refresh, and posts older than that are not scored at all.
+    ``refresh`` picks up lines appended to JSONL files since the last read and
+    new files in the directory; Parquet files are treated as immutable once read.
+    After the first load, refreshes run on a background thread (see
+    ``start_refresher``), so requests never wait for new posts to be scored.
+    """
+
+    def __init__(self, path, refresh_interval=30, retention_hours=168):
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.retention_hours = retention_hours
+        self.aggregates = defaultdict(dict)
+        self.posts = 0
+        self.skipped = 0
+        self.expired = 0
+        self._offsets = {}
+        # _lock guards the aggregates and is only held to fold in a scored batch;
+        # _refresh_lock keeps refreshes (which read files and score) one at a time
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refresher_pid = None
+
+    @property
+    def version(self):
+        # Changes whenever new posts have been folded in, so cached results can be keyed on it
+        return self.posts
+
+    def files(self):
+        if os.path.isdir(self.path):
+            names = sorted(os.listdir(self.path))
+            return [os.path.join(self.path, name) for name in names if name.endswith(('.jsonl', '.parquet'))]
+        return [self.path]
+
+    def start_refresher(self):
+        """Refresh every ``refresh_interval`` seconds (0 turns it off) on a background thread.
+
+        Cheap to call on every request: the thread is started once per process,
+        so gunicorn's preloading master never owns it and each worker has its own.
+        """
+        if self._refresher_pid == os.getpid() or self.refresh_interval <= 0:
+            return
+        with self._refresh_lock:
+            if self._refresher_pid == os.getpid():
+                return
+            self._refresher_pid = os.getpid()
+        threading.Thread(target=self._refresh_forever, name='corpus-refresh', daemon=True).start()
+
+    def _refresh_forever(self):
+        while True:
+            time.sleep(self.refresh_interval)
+            try:
+                added = self.refresh()
+            except Exception:
+                logger.exception("Post corpus refresh failed")
+                continue
+            if added:
+                logger.info(f"Post corpus refreshed with {added} new posts")
+
+    def refresh(self):
+        """Read and aggregate any posts added since the last refresh; returns how many."""
+        with self._refresh_lock:
+            added = 0
+            for path in self.files():
+                if path.endswith('.parquet'):
+                    if path not in self._offsets:
+                        added += self._add_posts(path, self._read_parquet(path))
+                        self._offsets[path] = os.path.getsize(path)
+                else:
+                    added += self._add_posts(path, self._read_jsonl(path))
+            self._prune()
+            return added
+
+    def _oldest_hour(self):
+        # Hours before this one have rolled out of every timeline that can be asked for
+        return int(time.time()) // BUCKET_SECONDS - self.retention_hours
+
+    def _prune(self):
+        oldest = self._oldest_hour()
+        with self._lock:
+            for tag in list(self.aggregates):
+                hourly = self.aggregates[tag]
+                for hour in [hour for hour in hourly if hour < oldest]:
+                    del hourly[hour]
+                if not hourly:
+                    del self.aggregates[tag]
+
+    def _read_jsonl(self, path):
+        offset = self._offsets.get(path, 0)
+        if os.path.getsize(path) < offset:
+            # The file was truncated or replaced; start over on the new contents
+            logger.warning(f"Post corpus file {path} shrank, reading it from the start")
+            offset = 0
+        # Read a line at a time, so a large append never has to fit in memory at once
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                # Only complete lines are consumed; a partially written last line waits for the next refresh
+                if not line.endswith(b'\n'):
+                    break
+                offset += len(line)
+                self._offsets[path] = offset
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        self.skipped += 1
+
+    def _read_parquet(self, path):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError(f"Reading {path} requires pyarrow (pip install pyarrow)")
+        return pq.read_table(path).to_pylist()
+
+    def _add_posts(self, path, posts):
+        added = 0
+        batch = []
+        for post in posts:
+            batch.append(post)
+            if len(batch) >= SCORE_BATCH_SIZE:
+                added += self._aggregate(path, batch)
+                batch = []
+        if batch:
+            added += self._aggregate(path, batch)
+        return added
+
+    def _aggregate(self, path, batch):
+        oldest = self._oldest_hour()
+        parsed = []
+        for post in batch:
+            try:
+                tags = post_hashtags(post)
+                text = post.get('text')
+                if not tags or not isinstance(text, str) or not text.strip():
+                    raise ValueError("post has no text or hashtags")
+                hour = int(post_timestamp(post.get('timestamp')) // BUCKET_SECONDS)
+            except (AttributeError, TypeError, ValueError):
+                self.skipped += 1
+                continue
+            if hour < oldest:
+                self.expired += 1
+                continue
+            parsed.append((tags, hour, clean_text(text)))
+
+        # Scoring happens outside the lock, so timelines keep being answered meanwhile
+        scored = get_engine().score_batch([cleaned for _, _, cleaned in parsed])
+        with self._lock:
+            for (tags, bucket, _), analysis in zip(parsed, scored):
+                score = analysis['score']
+                for tag in tags:
+                    totals = self.aggregates[tag].get(bucket)
+                    if totals is None:
+                        self.aggregates[tag][bucket] = [1, score, score * score]
+                    else:
+                        totals[0] += 1
+                        totals[1] += score
+                        totals[2] += score * score
+            self.posts += len(parsed)
+        return len(parsed)
+
+    def __contains__(self, hashtag):
+        with self._lock:
+            return hashtag.lower() in self.aggregates
+
+    def timeline(self, hashtag, end, hours=24, bucket_hours=1):
+        """Return ``(times, count, total, total_squares)`` arrays for the ``hours`` ending at ``end``.
+
+        ``end`` is the start of the last bucket. Hours with no posts have zero counts.
+        """
+        buckets = max(1, hours // bucket_hours)
+        first_hour = int(end.timestamp()) // BUCKET_SECONDS - (buckets - 1) * bucket_hours
+        hour_ids = range(first_hour, first_hour + buckets * bucket_hours)
+        with self._lock:
+            hourly = self.aggregates.get(hashtag.lower(), {})
+            totals = np.array([hourly.get(hour, (0, 0.0, 0.0)) for hour in hour_ids], dtype=float)
+        totals = totals.reshape(buckets, bucket_hours, 3).sum(axis=1)
+
+        step = np.timedelta64(bucket_hours * 60, 'm')
+        times = np.datetime64(end, 'm') - step * np.arange(buckets - 1, -1, -1)
+        return times, totals[:, 0].astype(np.int64), totals[:, 1], totals[:, 2]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "path": self.path,
+                "posts": self.posts,
+                "skipped": self.skipped,
+                "expired": self.expired,
+                "retentionHours": self.retention_hours,
+                "hashtags": len(self.aggregates),
+                "files": len(self._offsets)
+            }
+
+
+def timeline_moments(count, total, total_squares):
+    """Per-bucket means and standard deviations (NaN for empty buckets) plus the overall ``(mean, std)``."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+        std = np.sqrt(np.maximum(total_squares / count - mean ** 2, 0.0))
+    posts = count.sum()
+    overall_mean = total.sum() / posts if posts else 0.0
+    overall_std = np.sqrt(max(total_squares.sum() / posts - overall_mean ** 2, 0.0)) if posts else 0.0
+    return mean, std, float(overall_mean), float(overall_std)
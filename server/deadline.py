@@ -0,0 +1,71 @@
+import time
+from concurrent.futures import wait
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's time budget runs out before there is anything to answer with."""
+
+
+class Deadline:
+    """The moment (on ``time.monotonic``) by which a request must be answered.
+
+    The monotonic clock is system-wide on Linux and macOS, so a deadline pickled
+    to a scoring process still means the same moment there.
+    """
+
+    __slots__ = ('expires_at',)
+
+    def __init__(self, expires_at):
+        self.expires_at = expires_at
+
+    @classmethod
+    def after(cls, seconds, start=None):
+        return cls((time.monotonic() if start is None else start) + seconds)
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return time.monotonic() >= self.expires_at
+
+    def timeout(self, limit=None):
+        # Seconds to wait for one operation: what is left, but never more than `limit`
+        remaining = self.remaining()
+        return remaining if limit is None else min(limit, remaining)
+
+    def share(self, fraction):
+        """A deadline for a stage that may use ``fraction`` of the time left, keeping the rest for later stages."""
+        return Deadline(time.monotonic() + self.remaining() * fraction)
+
+    def check(self, stage):
+        if self.expired():
+            raise DeadlineExceeded(f"Deadline exceeded before {stage}")
+
+
+def map_within(func, items, deadline, size=1, executor=None):
+    """Apply ``func`` (which takes a list) to ``items`` in slices of ``size`` until ``deadline`` passes.
+
+    Returns one result per item, with None for items that were not reached.
+    Without an executor the slices run in order, so the results are a prefix;
+    with one they all start at once and whatever finished in time is kept (the
+    rest are cancelled if they have not started).
+    """
+    slices = [(start, items[start:start + size]) for start in range(0, len(items), size)]
+    results = [None] * len(items)
+
+    if executor is None:
+        for start, batch in slices:
+            if deadline.expired():
+                break
+            results[start:start + len(batch)] = func(batch)
+        return results
+
+    futures = {executor.submit(func, batch): start for start, batch in slices}
+    done, pending = wait(futures, timeout=deadline.remaining())
+    for future in pending:
+        future.cancel()
+    for future in done:
+        start = futures[future]
+        batch = future.result()
+        results[start:start + len(batch)] = batch
+    return results
@@ -0,0 +1,219 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+from metrics import stage
+from nltkdata import missing_data_message
+
+# "nltk" scores with SentimentIntensityAnalyzer, "numpy" with the vectorized NumpyVader
+VADER_BACKENDS = ('nltk', 'numpy')
+
+# "full" blends VADER with TextBlob, "fast" scores with VADER alone, and "auto"
+# picks "fast" for cleaned texts of at least AUTO_FAST_CHARS characters, where
+# TextBlob's pattern analyzer costs the most
+SCORING_TIERS = ('full', 'fast', 'auto')
+AUTO_FAST_CHARS = int(os.environ.get('AUTO_FAST_CHARS', 5000))
+
+
+def resolve_tier(tier, length):
+    """The tier ("full" or "fast") that actually scores a text of ``length`` characters."""
+    if tier not in SCORING_TIERS:
+        raise ValueError(f"Unknown scoring tier {tier!r}, expected one of {SCORING_TIERS}")
+    if tier == 'auto':
+        return 'fast' if length >= AUTO_FAST_CHARS else 'full'
+    return tier
+
+
+class ScoringEngine:
+    """Holds the VADER and TextBlob lexicons so they are loaded once per process.
+
+    Creating a ``SentimentIntensityAnalyzer`` re-reads and parses the whole VADER
+    lexicon, and TextBlob loads its pattern lexicon lazily on first use, so both
+    are built in ``warm_up`` and shared by every request. When gunicorn runs with
+    ``--preload`` this happens in the master before the workers are forked;
+    otherwise it happens on first use. With ``lexicon_path`` both lexicons are
+    instead read from a memory-mapped file that all processes share.
+    """
+
+    def __init__(self, vader_backend='nltk', lexicon_path=None):
+        if vader_backend not in VADER_BACKENDS:
+            raise ValueError(f"Unknown VADER backend {vader_backend!r}, expected one of {VADER_BACKENDS}")
+        self.vader_backend = vader_backend
+        # A compiled lexicon file (lexicon.py) to memory-map instead of building per-process dicts
+        self.lexicon_path = lexicon_path
+        self.lexicons = None
+        self.warmup_seconds = None
+        self.stop_words = frozenset()
+        self._vader = None
+        self._textblob = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self._vader is not None
+
+    def warm_up(self):
+        # The lock only guards loading; once loaded, scoring never takes it
+        with self._lock:
+            if self.ready:
+                return self.warmup_seconds
+
+            start = time.perf_counter()
+            # NLTK and TextBlob are imported here rather than at module level, so
+            # importing the server stays cheap until the engine is actually needed
+            from nltk.corpus import stopwords
+            from nltk.sentiment.vader import SentimentIntensityAnalyzer
+            from textblob.en.sentiments import PatternAnalyzer
+
+            try:
+                if self.lexicon_path:
+                    from lexicon import load_lexicons, mapped_textblob, mapped_vader
+                    lexicons = load_lexicons(self.lexicon_path)
+                    vader = mapped_vader(lexicons)
+                else:
+                    vader = SentimentIntensityAnalyzer()
+                # The stopword set is small and checked for every token, so it stays a frozenset
+                stop_words = frozenset(stopwords.words('english'))
+            except LookupError as e:
+                raise LookupError(missing_data_message(e)) from None
+            if self.vader_backend == 'numpy':
+                from vader_np import NumpyVader
+                # Reuses the lexicon the NLTK analyzer just parsed
+                vader = NumpyVader(vader.lexicon, vader.constants)
+            if self.lexicon_path:
+                textblob = mapped_textblob(lexicons)
+                self.lexicons = lexicons
+            else:
+                textblob = PatternAnalyzer()
+                # Force TextBlob's lazy lexicon load now rather than on the first request
+                textblob.analyze("warm up")
+            self.stop_words = stop_words
+            self._textblob = textblob
+            self._vader = vader
+            self.warmup_seconds = time.perf_counter() - start
+
+        return self.warmup_seconds
+
+    def score(self, text, tier='full'):
+        if not self.ready:
+            self.warm_up()
+
+        # Get VADER sentiment scores
+        with stage('vader'):
+            vader_scores = self._vader.polarity_scores(text)
+
+        if resolve_tier(tier, len(text)) == 'fast':
+            return vader_only(vader_scores)
+
+        # Get TextBlob sentiment (polarity and subjectivity in a single pass)
+        with stage('textblob'):
+            textblob_sentiment, subjectivity = self._textblob.analyze(text)
+
+        return blend_scores(vader_scores, textblob_sentiment, subjectivity)
+
+    def score_batch(self, texts, tier='full'):
+        """Score many texts at once; with ``tier="auto"`` each text gets the tier its own length selects."""
+        if not self.ready:
+            self.warm_up()
+
+        with stage('vader'):
+            if self.vader_backend == 'numpy':
+                vader_scores = self._vader.polarity_scores_batch(texts)
+            else:
+                vader_scores = [self._vader.polarity_scores(text) for text in texts]
+
+        if tier != 'full':
+            fast = [resolve_tier(tier, len(text)) == 'fast' for text in texts]
+            if any(fast):
+                # Blend only the texts that need TextBlob, then put the VADER-only ones back in place
+                full = iter(self._blend_batch([text for text, f in zip(texts, fast) if not f],
+                                              [v for v, f in zip(vader_scores, fast) if not f]))
+                return [vader_only(v) if f else next(full) for v, f in zip(vader_scores, fast)]
+
+        return self._blend_batch(texts, vader_scores)
+
+    def _blend_batch(self, texts, vader_scores):
+        if not texts:
+            return []
+        with stage('textblob'):
+            textblob_scores = [self._textblob.analyze(text) for text in texts]
+
+        compound = np.fromiter((v['compound'] for v in vader_scores), dtype=float, count=len(texts))
+        polarity = np.fromiter((t[0] for t in textblob_scores), dtype=float, count=len(texts))
+        subjectivity = np.fromiter((t[1] for t in textblob_scores), dtype=float, count=len(texts))
+        scores, confidences = blend_arrays(compound, polarity, subjectivity)
+
+        return [
+            {
+                'score': float(score),
+                'confidence': float(confidence),
+                'vader_scores': vader,
+                'textblob_score': textblob[0]
+            }
+            for score, confidence, vader, textblob in zip(scores, confidences, vader_scores, textblob_scores)
+        ]
+
+
+def blend_scores(vader_scores, textblob_sentiment, subjectivity):
+    # Combine VADER and TextBlob scores with weights
+    # VADER is better for social media text, so we give it more weight
+    compound_score = vader_scores['compound'] * 0.7 + textblob_sentiment * 0.3
+
+    # Normalize to range [-1, 1]
+    normalized_score = max(min(compound_score, 1.0), -1.0)
+
+    # Calculate confidence based on:
+    # 1. Agreement between VADER and TextBlob
+    # 2. VADER's compound score magnitude
+    # 3. TextBlob's subjectivity
+    score_agreement = 1 - abs(vader_scores['compound'] - textblob_sentiment) / 2
+    magnitude_confidence = abs(vader_scores['compound'])
+    subjectivity_confidence = subjectivity
+
+    confidence = (score_agreement * 0.4 + magnitude_confidence * 0.4 + subjectivity_confidence * 0.2)
+
+    return {
+        'score': normalized_score,
+        'confidence': confidence,
+        'vader_scores': vader_scores,
+        'textblob_score': textblob_sentiment
+    }
+
+
+def vader_only(vader_scores):
+    # The "fast" tier: VADER's compound score on its own. With no TextBlob there is
+    # no agreement or subjectivity term, so confidence comes from VADER's
+    # magnitude and its share of non-neutral words instead
+    compound = vader_scores['compound']
+    confidence = abs(compound) * 0.6 + (1 - vader_scores['neu']) * 0.4
+
+    return {
+        'score': compound,
+        'confidence': confidence,
+        'vader_scores': vader_scores,
+        'textblob_score': None
+    }
+
+
+def blend_arrays(compound, polarity, subjectivity):
+    # Same weighting as blend_scores, applied to a whole batch at once
+    scores = np.clip(compound * 0.7 + polarity * 0.3, -1.0, 1.0)
+    score_agreement = 1 - np.abs(compound - polarity) / 2
+    confidences = score_agreement * 0.4 + np.abs(compound) * 0.4 + subjectivity * 0.2
+    return scores, confidences
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine(**options):
+    """Return the process-wide engine, creating it with ``options`` on first use."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = ScoringEngine(**options)
+    return _engine
@@ -0,0 +1,117 @@
+import codecs
+import time
+from html.parser import HTMLParser
+
+
+def extract_paragraph_text(html):
+    # BeautifulSoup is only imported when the soup extraction mode is used
+    from bs4 import BeautifulSoup
+
+    # Parse HTML and extract text from paragraphs
+    soup = BeautifulSoup(html, 'html.parser')
+    paragraphs = soup.find_all('p')
+    return ' '.join([p.get_text() for p in paragraphs])
+
+
+class ParagraphCollector(HTMLParser):
+    """Incremental parser that keeps only the text inside ``<p>`` elements.
+
+    Nothing else is retained, so memory is bounded by the collected text rather
+    than by the size of the page.
+    """
+
+    def __init__(self, max_chars=None):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.paragraphs = []
+        self.chars = 0
+        self.full = False
+        self._depth = 0
+        self._current = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'p':
+            self._depth += 1
+
+    def handle_endtag(self, tag):
+        if tag == 'p' and self._depth:
+            self._depth -= 1
+            if not self._depth:
+                self._flush()
+
+    def handle_data(self, data):
+        if self._depth and not self.full:
+            self._current.append(data)
+            self.chars += len(data)
+            if self.max_chars is not None and self.chars >= self.max_chars:
+                self.full = True
+
+    def close(self):
+        super().close()
+        self._flush()
+
+    def text(self):
+        text = ' '.join(self.paragraphs)
+        if self.max_chars is not None:
+            text = text[:self.max_chars]
+        return text
+
+    def _flush(self):
+        if self._current:
+            self.paragraphs.append(''.join(self._current))
+            self._current = []
+
+
+class ParagraphStream:
+    """Push-style counterpart of ``stream_paragraph_text`` for bodies that arrive as chunks (ASGI).
+
+    ``feed`` parses a chunk and returns True once the byte or character budget
+    is reached and nothing more should be read; ``finish`` returns
+    ``(text, bytes_read, parse_seconds, truncated)``.
+    """
+
+    def __init__(self, encoding=None, max_bytes=None, max_chars=None):
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        self.parse_seconds = 0.0
+        self.truncated = False
+        self._decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+        self._collector = ParagraphCollector(max_chars=max_chars)
+
+    def feed(self, chunk):
+        if self.max_bytes is not None and self.bytes_read + len(chunk) > self.max_bytes:
+            chunk = chunk[:self.max_bytes - self.bytes_read]
+            self.truncated = True
+        self.bytes_read += len(chunk)
+
+        start = time.perf_counter()
+        self._collector.feed(self._decoder.decode(chunk))
+        self.parse_seconds += time.perf_counter() - start
+
+        if self._collector.full:
+            self.truncated = True
+        return self.truncated
+
+    def finish(self):
+        start = time.perf_counter()
+        self._collector.feed(self._decoder.decode(b'', final=True))
+        self._collector.close()
+        self.parse_seconds += time.perf_counter() - start
+        return self._collector.text(), self.bytes_read, self.parse_seconds, self.truncated
+
+
+def stream_paragraph_text(chunks, encoding=None, max_bytes=None, max_chars=None, deadline=None):
+    """Extract ``<p>`` text from an iterable of byte chunks without building a DOM.
+
+    Reading stops once ``max_bytes`` have been consumed, ``max_chars`` of
+    paragraph text have been collected or ``deadline`` has passed. Returns
+    ``(text, bytes_read, parse_seconds, truncated)``.
+    """
+    stream = ParagraphStream(encoding, max_bytes, max_chars)
+    for chunk in chunks:
+        if stream.feed(chunk):
+            break
+        if deadline is not None and deadline.expired():
+            stream.truncated = True
+            break
+    return stream.finish()
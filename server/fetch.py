@@ -0,0 +1,169 @@
+import os
+import threading
+import time
+from collections import namedtuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from cache import ResultCache, digest
+from deadline import DeadlineExceeded
+from extract import extract_paragraph_text, stream_paragraph_text
+from metrics import record_stage
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# "soup" parses the whole page with BeautifulSoup, "stream" feeds chunks to an incremental <p> collector
+EXTRACT_MODES = ('soup', 'stream')
+
+# Paragraph text pulled from a page plus what it cost to get it
+PageText = namedtuple('PageText', ['text', 'status', 'bytes_read', 'parse_seconds', 'truncated'])
+
+
+def page_encoding(headers):
+    """The charset a page's body is decoded with, whichever HTTP client fetched it.
+
+    The Content-Type's charset, else ISO-8859-1 for text/* (the HTTP/1.1
+    default, as requests applies it), else UTF-8. Pages are never sniffed, so
+    the sync and async fetchers always get the same text from the same bytes.
+    """
+    return requests.utils.get_encoding_from_headers(headers) or 'utf-8'
+
+
+def chunks_within(chunks, deadline):
+    """Yield body chunks; a read that times out after ``deadline`` has passed ends the body instead of failing."""
+    try:
+        yield from chunks
+    except requests.RequestException:
+        if deadline is None or not deadline.expired():
+            raise
+
+
+def read_within(chunks, deadline):
+    """Join byte chunks until they run out or ``deadline`` passes; returns ``(content, truncated)``."""
+    content = []
+    for chunk in chunks_within(chunks, deadline):
+        content.append(chunk)
+        if deadline.expired():
+            return b''.join(content), True
+    return b''.join(content), deadline.expired()
+
+
+class PageFetcher:
+    """Fetches pages over a pooled session and remembers their extracted text.
+
+    Connections are kept alive and reused per host (at most ``pool_size`` per
+    host). For every page that sent an ETag or Last-Modified header, the
+    validators and the extracted paragraph text are cached, and the next fetch
+    is a conditional GET: a 304 skips both the download and the HTML parse.
+
+    In ``stream`` mode the body is read in chunks and parsed incrementally,
+    stopping after ``max_bytes`` of HTML or ``max_chars`` of paragraph text.
+    """
+
+    def __init__(self, pool_size=10, timeout=10, cache_bytes=16 * 1024 * 1024, cache_ttl=86400,
+                 extract_mode='soup', max_bytes=None, max_chars=None):
+        if extract_mode not in EXTRACT_MODES:
+            raise ValueError(f"Unknown extract mode {extract_mode!r}, expected one of {EXTRACT_MODES}")
+        self.extract_mode = extract_mode
+        self.max_bytes = max_bytes
+        self.max_chars = max_chars
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.pages = ResultCache(max_bytes=cache_bytes, default_ttl=cache_ttl)
+        self._lock = threading.Lock()
+        self._session = None
+        self._session_pid = None
+
+    @property
+    def session(self):
+        # Sessions hold sockets, so each forked worker gets its own
+        if self._session is None or self._session_pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._session_pid != os.getpid():
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, pool_block=True)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    session.headers['User-Agent'] = USER_AGENT
+                    self._session = session
+                    self._session_pid = os.getpid()
+        return self._session
+
+    def fetch_text(self, url, timeout=None, deadline=None):
+        """Return a ``PageText`` whose status is MISS or REVALIDATED.
+
+        With a ``deadline`` no wait on the network outlasts it, and a body still
+        arriving when it passes is cut off there (``truncated``); the text read
+        so far is returned. ``DeadlineExceeded`` means nothing arrived in time.
+        """
+        fetch_start = time.perf_counter()
+        key, cached, headers = self.conditional_request(url)
+
+        timeout = self.timeout if timeout is None else timeout
+        if deadline is not None:
+            deadline.check('fetching the page')
+            timeout = deadline.timeout(timeout)
+
+        # Under a deadline the body is always streamed, so reading can stop when it passes
+        stream = self.extract_mode == 'stream' or deadline is not None
+        try:
+            response = self.session.get(url, headers=headers, stream=stream, timeout=timeout)
+        except requests.Timeout:
+            if deadline is not None and deadline.expired():
+                raise DeadlineExceeded("Deadline exceeded before the page responded") from None
+            raise
+        with response:
+            if response.status_code == 304 and cached is not None:
+                record_stage('fetch', time.perf_counter() - fetch_start)
+                return PageText(cached['text'], 'REVALIDATED', 0, 0.0, False)
+            response.raise_for_status()
+
+            if self.extract_mode == 'stream':
+                text, bytes_read, parse_seconds, truncated = stream_paragraph_text(
+                    chunks_within(response.iter_content(chunk_size=16384), deadline),
+                    encoding=page_encoding(response.headers),
+                    max_bytes=self.max_bytes,
+                    max_chars=self.max_chars,
+                    deadline=deadline
+                )
+                truncated = truncated or (deadline is not None and deadline.expired())
+            elif deadline is not None:
+                content, truncated = read_within(response.iter_content(chunk_size=16384), deadline)
+                bytes_read = len(content)
+                start = time.perf_counter()
+                text = extract_paragraph_text(content.decode(page_encoding(response.headers), errors='replace'))
+                parse_seconds = time.perf_counter() - start
+            else:
+                bytes_read = len(response.content)
+                start = time.perf_counter()
+                text = extract_paragraph_text(response.content.decode(page_encoding(response.headers), errors='replace'))
+                parse_seconds = time.perf_counter() - start
+                truncated = False
+
+        # Everything that was not parsing was spent on the network
+        record_stage('fetch', time.perf_counter() - fetch_start - parse_seconds)
+        record_stage('parse', parse_seconds)
+
+        self.remember(key, response.headers, text, truncated)
+        return PageText(text, 'MISS', bytes_read, parse_seconds, truncated)
+
+    def conditional_request(self, url):
+        """Return ``(key, cached, headers)``: the page cache entry for ``url`` and the validators to send."""
+        key = digest('page', url)
+        cached = self.pages.get(key)
+
+        headers = {}
+        if cached is not None:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+        return key, cached, headers
+
+    def remember(self, key, response_headers, text, truncated):
+        # A truncated extract is not the page's text, so it is never cached
+        etag = response_headers.get('ETag')
+        last_modified = response_headers.get('Last-Modified')
+        if (etag or last_modified) and not truncated:
+            self.pages.put(key, {"etag": etag, "last_modified": last_modified, "text": text})
@@ -0,0 +1,215 @@
+import json
+
+from analysis import clean_text, count_words, sentiment_label, top_words
+from engine import get_engine
+
+
+class RunningStats:
+    """Mean, variance, min and max of a stream of numbers in constant memory (Welford's algorithm)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    @property
+    def variance(self):
+        # Population variance of everything seen so far
+        return self._m2 / self.count if self.count else 0.0
+
+
+class SpaceSaving:
+    """Approximate top-K counter over an unbounded stream, holding at most ``capacity`` words.
+
+    When a new word arrives and the table is full, the word with the smallest
+    count is replaced and the newcomer inherits that count (Metwally et al.'s
+    space-saving algorithm). Reported counts are upper bounds, off by at most
+    the count that was inherited; any word seen more than N / capacity times
+    in N words is guaranteed to be in the table.
+    """
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.counts = {}
+        self.evictions = 0
+        # Words grouped by count, so the smallest count is found without a scan
+        self._buckets = {}
+        self._min = 0
+
+    def _discard(self, word, count):
+        bucket = self._buckets[count]
+        bucket.discard(word)
+        if not bucket:
+            del self._buckets[count]
+
+    def add(self, word, amount=1):
+        count = self.counts.get(word)
+        if count is not None:
+            self._discard(word, count)
+        elif len(self.counts) < self.capacity:
+            count = 0
+        else:
+            # Replace a word with the smallest count; the newcomer inherits that count
+            count = self._min
+            evicted = next(iter(self._buckets[count]))
+            self._discard(evicted, count)
+            del self.counts[evicted]
+            self.evictions += 1
+
+        count += amount
+        self.counts[word] = count
+        self._buckets.setdefault(count, set()).add(word)
+        if count < self._min or self._min not in self._buckets:
+            self._min = min(self._buckets)
+
+    def update(self, counts):
+        for word, amount in counts.items():
+            self.add(word, amount)
+
+    def top(self, n=10):
+        return top_words(self.counts, n)
+
+
+def iter_lines(stream, max_line_bytes):
+    """Yield ``(line_number, line)`` from a binary stream as each line arrives.
+
+    ``line`` is None for lines longer than ``max_line_bytes``, which are skipped
+    without being held in memory.
+    """
+    number = 0
+    while True:
+        line = stream.readline(max_line_bytes + 1)
+        if not line:
+            return
+        number += 1
+        if len(line) > max_line_bytes and not line.endswith(b'\n'):
+            # Drain the rest of the oversized line
+            while line and not line.endswith(b'\n'):
+                line = stream.readline(max_line_bytes + 1)
+            yield number, None
+            continue
+        yield number, line
+
+
+class LineSplitter:
+    """Push-style counterpart of ``iter_lines`` for bodies that arrive as chunks (ASGI).
+
+    ``feed`` returns the ``(line_number, line)`` pairs completed by a chunk;
+    ``close`` returns the unterminated last line, if any.
+    """
+
+    def __init__(self, max_line_bytes):
+        self.max_line_bytes = max_line_bytes
+        self.number = 0
+        self._partial = b''
+        self._oversized = False
+
+    def _line(self, line):
+        self.number += 1
+        oversized, self._oversized = self._oversized, False
+        return self.number, None if oversized or len(line) > self.max_line_bytes else line
+
+    def feed(self, data):
+        *complete, self._partial = (self._partial + data).split(b'\n')
+        lines = [self._line(line) for line in complete]
+        if len(self._partial) > self.max_line_bytes:
+            # Too long already; remember that, not the bytes
+            self._partial, self._oversized = b'', True
+        return lines
+
+    def close(self):
+        if self._partial or self._oversized:
+            line, self._partial = self._partial, b''
+            return [self._line(line)]
+        return []
+
+
+class StreamAnalyzer:
+    """Scores NDJSON lines one batch at a time and keeps running aggregates over all of them.
+
+    Each line is a JSON object with ``text`` (and optionally ``id``) or a bare
+    JSON string. Memory stays constant however many lines go through: only
+    the running mean/variance, label counts and a space-saving word table
+    are kept.
+    """
+
+    def __init__(self, top_words=10, word_capacity=1000):
+        self.top_words = top_words
+        self.scores = RunningStats()
+        self.confidence = RunningStats()
+        self.labels = {"positive": 0, "negative": 0, "neutral": 0}
+        self.words = SpaceSaving(word_capacity)
+        self.lines = 0
+        self.errors = 0
+
+    @staticmethod
+    def parse(line):
+        """Return ``(id, text)`` for a line, or raise ``ValueError`` with the per-line error."""
+        if line is None:
+            raise ValueError("Line too long")
+        try:
+            value = json.loads(line)
+        except ValueError:
+            raise ValueError("Invalid JSON")
+        doc_id = None
+        if isinstance(value, dict):
+            doc_id, value = value.get('id'), value.get('text')
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError("Text is required")
+        return doc_id, value
+
+    def score_lines(self, lines):
+        """Score ``[(line_number, line), ...]`` together; returns one result per non-blank line."""
+        results, pending, texts = [], [], []
+        for number, line in lines:
+            if line is not None and not line.strip():
+                continue
+            self.lines += 1
+            try:
+                doc_id, text = self.parse(line)
+            except ValueError as e:
+                self.errors += 1
+                results.append({"line": number, "error": str(e)})
+                continue
+            result = {"line": number}
+            if doc_id is not None:
+                result["id"] = doc_id
+            results.append(result)
+            pending.append(result)
+            texts.append(clean_text(text))
+
+        if texts:
+            for result, cleaned_text, analysis in zip(pending, texts, get_engine().score_batch(texts)):
+                sentiment = sentiment_label(analysis['score'])
+                result.update(sentiment=sentiment, score=analysis['score'], confidence=analysis['confidence'])
+                self.labels[sentiment] += 1
+                self.scores.add(analysis['score'])
+                self.confidence.add(analysis['confidence'])
+                self.words.update(count_words(cleaned_text))
+        return results
+
+    def summary(self):
+        return {
+            "count": self.lines,
+            "analyzed": self.scores.count,
+            "errors": self.errors,
+            "sentimentCounts": dict(self.labels),
+            "meanScore": self.scores.mean,
+            "scoreVariance": self.scores.variance,
+            "minScore": self.scores.min if self.scores.count else 0.0,
+            "maxScore": self.scores.max if self.scores.count else 0.0,
+            "meanConfidence": self.confidence.mean,
+            "wordFrequency": self.words.top(self.top_words),
+            # Counts are exact until the word table first overflows
+            "wordFrequencyApproximate": self.words.evictions > 0
+        }
@@ -0,0 +1,303 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+from logs import bind_request, logger
+
+# queued -> running -> done | failed
+JOB_STATES = ('queued', 'running', 'done', 'failed')
+
+
+class QueueFull(Exception):
+    """Raised by ``JobQueue.submit`` when ``max_queued`` jobs are already waiting."""
+
+
+class JobFailed(Exception):
+    """Raised by a job handler with the error message to report for the job."""
+
+
+def job_view(job):
+    # Public shape of a job record, as returned by GET /jobs/<id>
+    view = {
+        "id": job['id'],
+        "type": job['kind'],
+        "status": job['status'],
+        "createdAt": job['created_at'],
+        "startedAt": job['started_at'],
+        "finishedAt": job['finished_at']
+    }
+    if job['status'] == 'done':
+        view["result"] = job['result']
+    elif job['status'] == 'failed':
+        view["error"] = job['error']
+    return view
+
+
+class MemoryJobBackend:
+    """Jobs held in this process only: no setup, but a job is only visible to the worker that accepted it.
+
+    Use it with a single server process (or sticky routing); the SQLite
+    backend shares jobs between every worker on the host.
+    """
+
+    def __init__(self):
+        self._jobs = {}
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+
+    def add(self, job, max_queued):
+        with self._lock:
+            if self._queue.qsize() >= max_queued:
+                return False
+            self._jobs[job['id']] = job
+            self._queue.put(job['id'])
+            return True
+
+    def claim(self, timeout):
+        """Take the oldest queued job and mark it running; None if nothing arrives within ``timeout``."""
+        try:
+            job_id = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job.update(status='running', started_at=time.time())
+            return dict(job)
+
+    def finish(self, job_id, status, result, error, expires_at):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(status=status, result=result, error=error, finished_at=time.time(), expires_at=expires_at)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def depth(self):
+        return self._queue.qsize()
+
+    def purge(self, stale_before):
+        # Drop finished jobs past their TTL; a running job here always has a live worker thread
+        now = time.time()
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items() if job['expires_at'] is not None and job['expires_at'] <= now]
+            for job_id in expired:
+                del self._jobs[job_id]
+        return len(expired)
+
+    def counts(self):
+        with self._lock:
+            counts = dict.fromkeys(JOB_STATES, 0)
+            for job in self._jobs.values():
+                counts[job['status']] += 1
+            return counts
+
+
+class SqliteJobBackend:
+    """Jobs in a SQLite table, shared by every server process on the host and kept across restarts.
+
+    Workers in any process claim the oldest queued job with a single UPDATE,
+    so each job runs exactly once. Like ``ResultStore`` the database runs in
+    WAL mode, with one connection per thread and per process.
+    """
+
+    COLUMNS = ('id', 'kind', 'payload', 'status', 'result', 'error', 'created_at', 'started_at', 'finished_at', 'expires_at')
+
+    # How often idle workers look for jobs submitted by other processes
+    POLL_INTERVAL = 0.2
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._submitted = threading.Event()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " kind TEXT NOT NULL,"
+                " payload TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " result TEXT,"
+                " error TEXT,"
+                " created_at REAL NOT NULL,"
+                " started_at REAL,"
+                " finished_at REAL,"
+                " expires_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created_at ON jobs (status, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_expires_at ON jobs (expires_at)")
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _row(self, row):
+        job = dict(zip(self.COLUMNS, row))
+        job['payload'] = json.loads(job['payload'])
+        if job['result'] is not None:
+            job['result'] = json.loads(job['result'])
+        return job
+
+    def add(self, job, max_queued):
+        # The depth check and the insert are one statement, so concurrent submits cannot overshoot
+        inserted = self._connect().execute(
+            "INSERT INTO jobs (id, kind, payload, status, created_at)"
+            " SELECT ?, ?, ?, 'queued', ? WHERE (SELECT COUNT(*) FROM jobs WHERE status = 'queued') < ?",
+            (job['id'], job['kind'], json.dumps(job['payload']), job['created_at'], max_queued)
+        ).rowcount
+        if inserted:
+            self._submitted.set()
+        return bool(inserted)
+
+    def claim(self, timeout):
+        """Take the oldest queued job and mark it running; None if nothing arrives within ``timeout``."""
+        deadline = time.monotonic() + timeout
+        while True:
+            row = self._connect().execute(
+                "UPDATE jobs SET status = 'running', started_at = ?"
+                " WHERE id = (SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1)"
+                f" RETURNING {', '.join(self.COLUMNS)}",
+                (time.time(),)
+            ).fetchone()
+            if row is not None:
+                return self._row(row)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            # Woken at once by submits in this process, by polling for the others
+            self._submitted.wait(min(self.POLL_INTERVAL, remaining))
+            self._submitted.clear()
+
+    def finish(self, job_id, status, result, error, expires_at):
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, expires_at = ? WHERE id = ?",
+            (status, json.dumps(result) if result is not None else None, error, time.time(), expires_at, job_id)
+        )
+
+    def get(self, job_id):
+        row = self._connect().execute(f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row(row) if row is not None else None
+
+    def depth(self):
+        return self._connect().execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+
+    def purge(self, stale_before):
+        # Jobs still "running" since before stale_before lost their worker (a restart or crash)
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', error = 'The worker running this job stopped before it finished',"
+            " finished_at = ?, expires_at = ? WHERE status = 'running' AND started_at < ?",
+            (now, now + 3600, stale_before)
+        )
+        return conn.execute("DELETE FROM jobs WHERE expires_at <= ?", (now,)).rowcount
+
+    def counts(self):
+        counts = dict.fromkeys(JOB_STATES, 0)
+        counts.update(self._connect().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return counts
+
+
+class JobQueue:
+    """Bounded queue of analysis jobs run by a small pool of worker threads.
+
+    ``handlers`` maps a job type to a function that takes the job's payload and
+    returns its JSON result, or raises ``JobFailed``. At most ``max_queued``
+    jobs may wait; finished jobs are kept for ``result_ttl`` seconds. The
+    worker threads are started lazily in each process, so gunicorn's
+    preloading master never owns them.
+    """
+
+    # Seconds between purges of expired jobs
+    PURGE_INTERVAL = 60
+
+    def __init__(self, backend, handlers, workers=2, max_queued=100, result_ttl=3600, job_timeout=900, on_finish=None):
+        self.backend = backend
+        self.handlers = handlers
+        self.workers = workers
+        self.max_queued = max_queued
+        self.result_ttl = result_ttl
+        self.job_timeout = job_timeout
+        self.on_finish = on_finish
+        self._pid = None
+        self._last_purge = 0.0
+        self._lock = threading.Lock()
+
+    def _ensure_workers(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                for n in range(self.workers):
+                    threading.Thread(target=self._work, name=f'job-{n}', daemon=True).start()
+                self._pid = os.getpid()
+
+    def submit(self, kind, payload):
+        """Queue a job and return its id; raises ``QueueFull`` when the queue is at capacity."""
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job type {kind!r}")
+        self._ensure_workers()
+        self.maybe_purge()
+        job = {
+            "id": uuid.uuid4().hex, "kind": kind, "payload": payload, "status": 'queued', "result": None, "error": None,
+            "created_at": time.time(), "started_at": None, "finished_at": None, "expires_at": None
+        }
+        if not self.backend.add(job, self.max_queued):
+            raise QueueFull(f"{self.max_queued} jobs are already queued")
+        return job['id']
+
+    def get(self, job_id):
+        job = self.backend.get(job_id)
+        if job is None or (job['expires_at'] is not None and job['expires_at'] <= time.time()):
+            return None
+        return job_view(job)
+
+    def depth(self):
+        return self.backend.depth()
+
+    def maybe_purge(self):
+        now = time.time()
+        if now - self._last_purge >= self.PURGE_INTERVAL:
+            self._last_purge = now
+            self.backend.purge(now - self.job_timeout)
+
+    def _work(self):
+        while True:
+            job = self.backend.claim(timeout=self.PURGE_INTERVAL)
+            if job is None:
+                self.maybe_purge()
+                continue
+            self.run(job)
+
+    def run(self, job):
+        # Log lines written while the job runs carry its id
+        bind_request(job['id'])
+        start = time.perf_counter()
+        result, error = None, None
+        try:
+            result = self.handlers[job['kind']](job['payload'])
+            status = 'done'
+        except JobFailed as e:
+            status, error = 'failed', str(e)
+        except Exception as e:
+            logger.exception(f"Error running {job['kind']} job: {str(e)}")
+            status, error = 'failed', f"Error running job: {str(e)}"
+        self.backend.finish(job['id'], status, result, error, time.time() + self.result_ttl)
+        logger.info(f"Job {status}", extra={"jobType": job['kind'], "seconds": round(time.perf_counter() - start, 3)})
+        if self.on_finish is not None:
+            self.on_finish(job['kind'], status, time.perf_counter() - start)
+
+    def stats(self):
+        return {"queued": self.depth(), "maxQueued": self.max_queued, "workers": self.workers, "jobs": self.backend.counts()}
@@ -0,0 +1,373 @@
+"""Scoring lexicons compiled into one compact binary file that every process memory-maps read-only.
+
+The VADER lexicon and TextBlob's pattern lexicon otherwise become Python dicts
+in each worker (and each scoring process): thousands of small objects whose
+pages refcounting and the garbage collector keep writing to, so even after a
+``--preload`` fork every worker ends up with its own copy. Mapped from a file,
+the tables are clean page-cache pages that the kernel shares between all of
+them. Compile the file once at build time with:
+
+    python lexicon.py [path]
+
+or let the server compile it on first start when ``LEXICON_PATH`` points at a
+file that is missing or was built from different lexicons.
+
+File layout: an 8-byte magic, a little-endian uint32 version and JSON header
+length, the JSON header, then for each table (every section 8-byte aligned):
+
+- ``offsets``: uint32 start of every key in ``keys``, plus the end of the last
+- ``keys``: the UTF-8 keys, sorted, back to back
+- ``index``: uint32 open-addressing hash table (crc32, linear probing) of row numbers
+- ``values``: ``count`` x ``width`` float64 rows
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from collections.abc import Mapping
+
+MAGIC = b'SSLEXMAP'
+VERSION = 1
+PREAMBLE = struct.Struct('<II')
+EMPTY = 0xFFFFFFFF
+
+VADER_RESOURCE = 'sentiment/vader_lexicon.zip/vader_lexicon/vader_lexicon.txt'
+
+
+def _align(n):
+    return (n + 7) & ~7
+
+
+class LexiconTable(Mapping):
+    """Read-only ``{key: value}`` view of one table in a mapped lexicon file.
+
+    A value is a float for one-column tables and a list of floats otherwise;
+    tables with ``strings`` in their header map to those strings instead.
+    """
+
+    def __init__(self, buffer, header):
+        self.count = header['count']
+        self.width = header['width']
+        self.strings = header.get('strings')
+        self._offsets = buffer[header['offsets']:header['offsets'] + 4 * (self.count + 1)].cast('I')
+        self._keys = buffer[header['keys']:header['keys'] + self._offsets[self.count]]
+        self._index = buffer[header['index']:header['index'] + 4 * header['indexSize']].cast('I')
+        self._mask = header['indexSize'] - 1
+        self._values = buffer[header['values']:header['values'] + 8 * self.count * self.width].cast('d')
+
+    def row(self, key):
+        """Row number of ``key``, or -1."""
+        try:
+            data = key.encode('utf-8')
+        except AttributeError:
+            return -1
+        offsets, index, keys = self._offsets, self._index, self._keys
+        slot = zlib.crc32(data) & self._mask
+        while True:
+            row = index[slot]
+            if row == EMPTY:
+                return -1
+            if keys[offsets[row]:offsets[row + 1]] == data:
+                return row
+            slot = (slot + 1) & self._mask
+
+    def values_at(self, row):
+        start = row * self.width
+        return self._values[start:start + self.width].tolist()
+
+    def _value(self, row):
+        if self.strings is not None:
+            return self.strings[int(self._values[row * self.width])]
+        if self.width == 1:
+            return self._values[row]
+        return self.values_at(row)
+
+    def __getitem__(self, key):
+        row = self.row(key)
+        if row < 0:
+            raise KeyError(key)
+        return self._value(row)
+
+    def get(self, key, default=None):
+        row = self.row(key)
+        return default if row < 0 else self._value(row)
+
+    def __contains__(self, key):
+        return self.row(key) >= 0
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        # Keys in sorted (UTF-8 byte) order
+        offsets, keys = self._offsets, self._keys
+        for row in range(self.count):
+            yield str(keys[offsets[row]:offsets[row + 1]], 'utf-8')
+
+
+class WordScores(Mapping):
+    """One word's TextBlob entry, ``{pos: [polarity, subjectivity, intensity]}`` with ``None`` for any tag.
+
+    Untagged text only ever reads the ``None`` scores and asks which tags exist,
+    so the per-tag rows are looked up only when asked for.
+    """
+
+    __slots__ = ('word', 'scores', 'mask', 'tags', 'tagged')
+
+    def __init__(self, word, scores, mask, tags, tagged):
+        self.word = word
+        self.scores = scores
+        self.mask = mask
+        self.tags = tags
+        self.tagged = tagged
+
+    def __contains__(self, pos):
+        if pos is None:
+            return True
+        try:
+            return bool(self.mask & (1 << self.tags.index(pos)))
+        except ValueError:
+            return False
+
+    def __getitem__(self, pos):
+        if pos is None:
+            return self.scores
+        if pos not in self:
+            raise KeyError(pos)
+        return self.tagged[f"{self.word}\t{pos}"]
+
+    def __iter__(self):
+        yield None
+        for bit, pos in enumerate(self.tags):
+            if self.mask & (1 << bit):
+                yield pos
+
+    def __len__(self):
+        return 1 + bin(self.mask).count('1')
+
+
+class MappedLexicons:
+    """An open lexicon file; ``tables`` maps each table name to its ``LexiconTable``."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = memoryview(self._mmap)
+        if buffer[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a compiled lexicon file")
+        version, header_length = PREAMBLE.unpack_from(buffer, len(MAGIC))
+        if version != VERSION:
+            raise ValueError(f"{path} has lexicon format version {version}, expected {VERSION}")
+        start = len(MAGIC) + PREAMBLE.size
+        self.header = json.loads(bytes(buffer[start:start + header_length]))
+        if self.header['byteorder'] != sys.byteorder:
+            raise ValueError(f"{path} was compiled on a {self.header['byteorder']}-endian machine")
+        self.sources = self.header['sources']
+        self.tables = {name: LexiconTable(buffer, table) for name, table in self.header['tables'].items()}
+
+    @property
+    def size(self):
+        return len(self._mmap)
+
+
+def _table_sections(entries, width, strings=None):
+    # Returns (header fields, [offsets, keys, index, values]) for {key: row of width floats}
+    keys = sorted(key.encode('utf-8') for key in entries)
+    offsets = array('I', [0])
+    for key in keys:
+        offsets.append(offsets[-1] + len(key))
+
+    index_size = 1
+    while index_size < 2 * len(keys):
+        index_size *= 2
+    index = array('I', [EMPTY]) * index_size
+    for row, key in enumerate(keys):
+        slot = zlib.crc32(key) & (index_size - 1)
+        while index[slot] != EMPTY:
+            slot = (slot + 1) & (index_size - 1)
+        index[slot] = row
+
+    values = array('d')
+    for key in keys:
+        row = entries[key.decode('utf-8')]
+        values.extend(row if width > 1 else [row])
+
+    fields = {"count": len(keys), "width": width, "indexSize": index_size}
+    if strings is not None:
+        fields["strings"] = strings
+    return fields, [offsets.tobytes(), b''.join(keys), index.tobytes(), values.tobytes()]
+
+
+def write_lexicons(path, tables, sources):
+    """Write ``{name: (entries, width, strings)}`` to ``path`` atomically."""
+    headers, sections = {}, {}
+    for name, (entries, width, strings) in tables.items():
+        headers[name], sections[name] = _table_sections(entries, width, strings)
+
+    # Section positions depend on the header length and the header holds the positions;
+    # grow the reserved header space until the header fits in it
+    header_length = 0
+    while True:
+        position = _align(len(MAGIC) + PREAMBLE.size + header_length)
+        for name, fields in headers.items():
+            for field, section in zip(('offsets', 'keys', 'index', 'values'), sections[name]):
+                fields[field] = position
+                position = _align(position + len(section))
+        header = json.dumps({"byteorder": sys.byteorder, "sources": sources, "tables": headers}).encode('utf-8')
+        if len(header) <= header_length:
+            break
+        header_length = _align(len(MAGIC) + PREAMBLE.size + len(header)) - len(MAGIC) - PREAMBLE.size
+
+    # Written to a temporary file and renamed, so a worker never maps a half-written file
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temporary = tempfile.mkstemp(dir=directory, prefix='.lexicon-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC + PREAMBLE.pack(VERSION, header_length) + header.ljust(header_length))
+            for name in headers:
+                for section in sections[name]:
+                    f.write(section)
+                    f.write(b'\0' * (_align(f.tell()) - f.tell()))
+        # mkstemp creates the file owner-only; workers may run as another user
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def lexicon_sources():
+    """Fingerprints of the installed lexicons; a compiled file is stale when they differ."""
+    import nltk.data
+    from textblob import en
+
+    with open(en.sentiment.path, 'rb') as f:
+        textblob = f.read()
+    return {
+        "format": VERSION,
+        "vader": hashlib.sha1(nltk.data.load(VADER_RESOURCE, format='raw')).hexdigest(),
+        "textblob": hashlib.sha1(textblob).hexdigest()
+    }
+
+
+def compile_lexicons(path, sources=None):
+    """Build the lexicon file at ``path`` from the installed NLTK VADER and TextBlob lexicons."""
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+    from textblob import en
+
+    vader = SentimentIntensityAnalyzer().lexicon
+
+    # A private instance, so the module-level TextBlob lexicon stays unloaded in this process
+    sentiment = en.Sentiment(path=en.sentiment.path, synset='wordnet_id')
+    sentiment.load()
+    words = dict(dict.items(sentiment))
+    tags = sorted({pos for entry in words.values() for pos in entry if pos is not None})
+    labels = sorted(set(sentiment.labeler.values()))
+
+    # One row per word for the untagged (None) scores, plus a bitmask of the tags that have their own row
+    textblob = {
+        word: list(entry[None]) + [float(sum(1 << tags.index(pos) for pos in entry if pos is not None))]
+        for word, entry in words.items()
+    }
+    tagged = {f"{word}\t{pos}": list(scores) for word, entry in words.items() for pos, scores in entry.items() if pos is not None}
+
+    write_lexicons(path, {
+        "vader": (vader, 1, None),
+        "textblob": (textblob, 4, None),
+        "textblob_tagged": (tagged, 3, None),
+        "textblob_labels": ({word: float(labels.index(label)) for word, label in sentiment.labeler.items()}, 1, labels)
+    }, dict(sources or lexicon_sources(), textblobTags=tags))
+
+
+def load_lexicons(path):
+    """Map the lexicon file at ``path``, compiling it first if it is missing or stale."""
+    sources = lexicon_sources()
+    if os.path.exists(path):
+        try:
+            lexicons = MappedLexicons(path)
+            if {key: lexicons.sources.get(key) for key in sources} == sources:
+                return lexicons
+        except (ValueError, KeyError, struct.error):
+            pass
+    compile_lexicons(path, sources)
+    return MappedLexicons(path)
+
+
+def mapped_vader(lexicons):
+    """A ``SentimentIntensityAnalyzer`` that looks words up in the mapped VADER table."""
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer, VaderConstants
+
+    # Skips __init__, which would read and parse the lexicon text (and keep the text around)
+    vader = SentimentIntensityAnalyzer.__new__(SentimentIntensityAnalyzer)
+    vader.lexicon_file = None
+    vader.lexicon = lexicons.tables['vader']
+    vader.constants = VaderConstants()
+    return vader
+
+
+def mapped_textblob(lexicons):
+    """An object with ``PatternAnalyzer.analyze``'s ``(polarity, subjectivity)`` result, over the mapped tables."""
+    from textblob import en
+
+    class MappedSentiment(en.Sentiment):
+        # TextBlob's Sentiment is a lazily loaded dict; this one never loads and reads the tables instead
+        def __init__(self, stock):
+            super().__init__(path=stock.path, synset='wordnet_id', negations=stock.negations,
+                             modifiers=stock.modifiers, modifier=stock.modifier, tokenizer=stock.tokenizer)
+            self._words = lexicons.tables['textblob']
+            self._tagged = lexicons.tables['textblob_tagged']
+            self._tags = lexicons.sources['textblobTags']
+            self.labeler = lexicons.tables['textblob_labels']
+
+        def load(self, path=None):
+            pass
+
+        def __getitem__(self, word):
+            row = self._words.row(word)
+            if row < 0:
+                raise KeyError(word)
+            *scores, mask = self._words.values_at(row)
+            return WordScores(word, scores, int(mask), self._tags, self._tagged)
+
+        def get(self, word, default=None):
+            return self[word] if self._words.row(word) >= 0 else default
+
+        def __contains__(self, word):
+            # Called for every token, so skip Mapping's generic __contains__
+            return self._words.row(word) >= 0
+
+        def __len__(self):
+            return len(self._words)
+
+        def __iter__(self):
+            return iter(self._words)
+
+        def keys(self):
+            return self._words.keys()
+
+        def items(self):
+            return ((word, self[word]) for word in self._words)
+
+    class MappedPatternAnalyzer:
+        def __init__(self):
+            self.sentiment = MappedSentiment(en.sentiment)
+
+        def analyze(self, text):
+            polarity, subjectivity = self.sentiment(text)
+            return polarity, subjectivity
+
+    return MappedPatternAnalyzer()
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else os.environ.get('LEXICON_PATH', 'lexicons.bin')
+    compile_lexicons(target)
+    lexicons = MappedLexicons(target)
+    counts = ', '.join(f"{name} {len(table)}" for name, table in lexicons.tables.items())
+    print(f"Wrote {target} ({lexicons.size / 1024:.0f} KiB: {counts})")
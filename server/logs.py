@@ -0,0 +1,167 @@
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import uuid
+from logging.handlers import QueueHandler, QueueListener
+
+logger = logging.getLogger('sentimentscope')
+
+# Id and sampling decision of the request being handled in this context
+_request_id = contextvars.ContextVar('request_id', default=None)
+_sampled = contextvars.ContextVar('sampled', default=False)
+
+_traceback_formatter = logging.Formatter()
+
+# Set by configure_logging
+_settings = {'sample_rate': 0.0, 'payload_chars': 0}
+
+
+class RequestContextFilter(logging.Filter):
+    # Stamps every record with the current request id
+    def filter(self, record):
+        record.request_id = _request_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; ``extra`` fields passed to the logger become keys."""
+
+    # Attributes every LogRecord has, which are not extra fields
+    RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'request_id'}
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        if record.request_id:
+            entry["requestId"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in self.RESERVED:
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Queue handler that never blocks the request thread: when the queue is full the record is dropped."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        # Only resolve what cannot wait (arguments, the traceback); formatting happens on the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class LogPipeline:
+    """Routes log records through a bounded queue to a writer thread.
+
+    The request thread only puts the record on the queue; formatting and the
+    write to stdout happen on the listener thread. The listener is restarted in
+    forked children, since gunicorn's ``--preload`` master configures logging
+    before the workers exist and threads do not survive a fork.
+    """
+
+    def __init__(self, stream, formatter, queue_size):
+        self.queue_size = queue_size
+        self.target = logging.StreamHandler(stream)
+        self.target.setFormatter(formatter)
+        self.handler = DroppingQueueHandler(queue.Queue(queue_size))
+        self.handler.addFilter(RequestContextFilter())
+        self.listener = None
+        self.start()
+        os.register_at_fork(after_in_child=self.restart)
+
+    def start(self):
+        self.listener = QueueListener(self.handler.queue, self.target)
+        self.listener.start()
+
+    def restart(self):
+        # The parent's listener thread does not exist in the child, so start a fresh one on a fresh queue
+        self.handler.queue = queue.Queue(self.queue_size)
+        self.start()
+
+    def stop(self):
+        # Flushes everything still queued; safe to call more than once
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+
+_pipeline = None
+
+
+def configure_logging(level='INFO', sample_rate=0.01, payload_chars=200, fmt='json', queue_size=10000, stream=None):
+    """Send the ``sentimentscope`` logger through a background queue to stdout.
+
+    ``sample_rate`` is the fraction of requests whose payloads (request bodies and
+    results) are logged; ``payload_chars`` caps each logged payload, and 0 logs
+    only their sizes.
+    """
+    global _pipeline
+    _settings['sample_rate'] = sample_rate
+    _settings['payload_chars'] = payload_chars
+    if _pipeline is None:
+        formatter = JsonFormatter() if fmt == 'json' else logging.Formatter('%(asctime)s %(levelname)s [%(request_id)s] %(message)s')
+        _pipeline = LogPipeline(stream or sys.stdout, formatter, queue_size)
+        logger.addHandler(_pipeline.handler)
+        logger.propagate = False
+        atexit.register(_pipeline.stop)
+    logger.setLevel(level)
+    return _pipeline
+
+
+def bind_request(request_id=None):
+    """Bind a request id (a fresh one unless the client sent it) and decide whether to sample this request.
+
+    The binding lasts until the next request on the same thread, so log lines
+    written while a streamed response is still being generated keep their id.
+    """
+    request_id = request_id or uuid.uuid4().hex
+    _request_id.set(request_id)
+    _sampled.set(random.random() < _settings['sample_rate'])
+    return request_id
+
+
+def summarize(value, limit):
+    # Size plus, if allowed, a truncated preview; never the whole payload unless it is small.
+    # Raw request bodies are passed as bytes so nothing has to be re-serialized to measure them
+    if isinstance(value, bytes):
+        summary = {"bytes": len(value)}
+        text = value[:limit].decode('utf-8', 'replace') if limit else ''
+    else:
+        text = value if isinstance(value, str) else json.dumps(value, default=str)
+        summary = {"chars": len(text)}
+    if limit:
+        summary["preview"] = text[:limit]
+        summary["truncated"] = summary.get("chars", summary.get("bytes")) > limit
+    return summary
+
+
+def log_payload(message, **payloads):
+    """Log request or result payloads, only for sampled requests and only in truncated form."""
+    if not _sampled.get() or not logger.isEnabledFor(logging.INFO):
+        return
+    limit = _settings['payload_chars']
+    logger.info(message, extra={name: summarize(value, limit) for name, value in payloads.items()})
@@ -1,29 +1,183 @@
-from flask import Flask, request, jsonify
+import time
+IMPORT_STARTED = time.perf_counter()
+
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 import requests
-from bs4 import BeautifulSoup
-from textblob import TextBlob
-from collections import Counter
 import re
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
-from datetime import datetime, timedelta
-import random
+from datetime import datetime
 import os
+import tempfile
+import numpy as np
+
+# NLTK data comes from NLTK_DATA or the bundled server/nltk_data directory (see
+# nltkdata.py); nothing is downloaded at import time
+from nltkdata import use_local_nltk_data
+use_local_nltk_data()
+
+from logs import bind_request, configure_logging, log_payload, logger
+from engine import SCORING_TIERS, get_engine, resolve_tier
+from analysis import analyze_document, analyze_page_text, analyze_sentiment, clean_text, is_long_document, partial_details, sentiment_label
+from admission import AdmissionController, queue_latency
+from deadline import Deadline, DeadlineExceeded
+from cache import ResultCache, digest
+from store import ResultStore
+from fetch import PageFetcher
+from singleflight import SingleFlight, normalize_url
+from ingest import StreamAnalyzer, iter_lines
+from jobs import JobFailed, JobQueue, MemoryJobBackend, QueueFull, SqliteJobBackend
+from multiurl import UrlBatchAnalyzer
+from workers import ScoringPool
+from corpus import PostCorpus, timeline_moments
+from metrics import Metrics, begin_request, end_request, server_timing, stage
+from payload import FastJSONProvider, FieldSelection, compress_body, dumps
+from timeline import floor_time, hashtag_text, hashtag_timeline, timeline_points, timeline_summary
+
+# Structured logs are written by a background thread; only a LOG_SAMPLE_RATE fraction of
+# requests log their payloads, truncated to LOG_PAYLOAD_CHARS (0 logs sizes only)
+configure_logging(
+    level=os.environ.get('LOG_LEVEL', 'INFO'),
+    sample_rate=float(os.environ.get('LOG_SAMPLE_RATE', 0.01)),
+    payload_chars=int(os.environ.get('LOG_PAYLOAD_CHARS', 200)),
+    fmt=os.environ.get('LOG_FORMAT', 'json')
+)
 
-# Download required NLTK data
-try:
-    nltk.data.find('tokenizers/punkt')
-    nltk.data.find('corpora/stopwords')
-    nltk.data.find('sentiment/vader_lexicon')
-except LookupError:
-    nltk.download('punkt')
-    nltk.download('stopwords')
-    nltk.download('vader_lexicon')
+logger.info(f"Server modules imported in {(time.perf_counter() - IMPORT_STARTED) * 1000:.1f} ms")
+
+# STARTUP_MODE=eager loads the lexicons (and NLTK/TextBlob) at import; with
+# `gunicorn --preload` this runs in the master before fork, so workers share the
+# warmed engine. STARTUP_MODE=lazy defers all of it to the first request
+# VADER_BACKEND=numpy switches to the vectorized scorer in vader_np.py
+# LEXICON_PATH memory-maps the lexicons from a compiled file (see lexicon.py),
+# so workers and scoring processes share one copy through the page cache
+STARTUP_MODE = os.environ.get('STARTUP_MODE', 'eager')
+ENGINE_OPTIONS = {
+    'vader_backend': os.environ.get('VADER_BACKEND', 'nltk'),
+    'lexicon_path': os.environ.get('LEXICON_PATH') or None
+}
+engine = get_engine(**ENGINE_OPTIONS)
+if STARTUP_MODE == 'eager':
+    logger.info(f"Scoring engine ({engine.vader_backend}) warmed up in {engine.warm_up() * 1000:.1f} ms")
+
+# SCORING_TIER is the deployment default ("full", "fast" or "auto"); requests may
+# override it with "tier". "fast" skips TextBlob, "auto" skips it for long texts
+SCORING_TIER = os.environ.get('SCORING_TIER', 'full')
+resolve_tier(SCORING_TIER, 0)
 
 app = Flask(__name__)
+# jsonify encodes with orjson when it is installed (see payload.py)
+app.json = FastJSONProvider(app)
+
+# JSON responses of COMPRESS_MIN_BYTES or more are sent gzip- or brotli-compressed
+# (brotli needs the brotli package) to clients that accept it; 0 turns this off
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+
+# Upper bound on the number of documents accepted by /analyze/text/batch
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 1000))
+
+# In-memory result cache for repeated texts and hashtags
+result_cache = ResultCache(
+    max_bytes=int(os.environ.get('RESULT_CACHE_BYTES', 32 * 1024 * 1024)),
+    default_ttl=int(os.environ.get('TEXT_CACHE_TTL', 3600))
+)
+TEXT_CACHE_TTL = result_cache.default_ttl
+HASHTAG_CACHE_TTL = int(os.environ.get('HASHTAG_CACHE_TTL', 300))
+
+# /analyze/text and /analyze/url must answer within REQUEST_DEADLINE seconds (0 turns
+# it off), counted from when the load balancer received the request if it sends
+# X-Request-Start. A client may ask for less with X-Deadline-Ms. The budget bounds
+# the fetch, the parse and the scoring; a long text that runs out keeps the chunks
+# scored so far. The fetch may use FETCH_BUDGET_SHARE of what is left when it starts
+REQUEST_DEADLINE = float(os.environ.get('REQUEST_DEADLINE', 30))
+FETCH_BUDGET_SHARE = 0.75
+
+# Load shedding: /analyze/* requests get an immediate 503 with Retry-After once
+# ADMISSION_MAX_IN_FLIGHT of them are running in this process, or once requests
+# wait in front of it (X-Request-Start) for over ADMISSION_MAX_QUEUE_MS; 0 turns a limit off
+admission = AdmissionController(
+    max_in_flight=int(os.environ.get('ADMISSION_MAX_IN_FLIGHT', 256)),
+    max_queue_seconds=float(os.environ.get('ADMISSION_MAX_QUEUE_MS', 10000)) / 1000,
+    retry_after=int(os.environ.get('ADMISSION_RETRY_AFTER', 1))
+)
+
+# Hashtag timeline limits (7 days, and e.g. 7 days of 5-minute buckets)
+MAX_TIMELINE_HOURS = int(os.environ.get('MAX_TIMELINE_HOURS', 168))
+MAX_TIMELINE_BUCKETS = int(os.environ.get('MAX_TIMELINE_BUCKETS', 2016))
+
+# Pooled HTTP session plus a conditional-GET cache of extracted page text
+page_fetcher = PageFetcher(
+    pool_size=int(os.environ.get('FETCH_POOL_SIZE', 10)),
+    timeout=int(os.environ.get('FETCH_TIMEOUT', 10)),
+    cache_bytes=int(os.environ.get('PAGE_CACHE_BYTES', 16 * 1024 * 1024)),
+    cache_ttl=int(os.environ.get('PAGE_CACHE_TTL', 86400)),
+    # EXTRACT_MODE=stream reads pages incrementally and stops at the byte/character budget
+    extract_mode=os.environ.get('EXTRACT_MODE', 'soup'),
+    max_bytes=int(os.environ.get('EXTRACT_MAX_BYTES', 2 * 1024 * 1024)),
+    max_chars=int(os.environ.get('EXTRACT_MAX_CHARS', 200000))
+)
+
+# Worker processes for CPU-bound scoring (SCORE_WORKERS=0 scores inline)
+scoring_pool = ScoringPool(
+    int(os.environ.get('SCORE_WORKERS', min(4, os.cpu_count() or 1))),
+    engine_options=ENGINE_OPTIONS
+)
+
+# /analyze/urls: concurrent fetches with global and per-host limits
+MAX_URLS = int(os.environ.get('MAX_URLS', 500))
+url_batch_analyzer = UrlBatchAnalyzer(
+    page_fetcher,
+    scoring_pool,
+    max_concurrency=int(os.environ.get('URL_FETCH_CONCURRENCY', 32)),
+    per_host=int(os.environ.get('URL_FETCH_PER_HOST', 4))
+)
+
+# Optional local post feed (JSONL/Parquet file or directory) behind /analyze/hashtag,
+# loaded here and then refreshed every POST_CORPUS_REFRESH seconds (0: never) by a
+# background thread in each worker. Only the last MAX_TIMELINE_HOURS of posts are kept.
+POST_CORPUS_PATH = os.environ.get('POST_CORPUS_PATH')
+post_corpus = PostCorpus(
+    POST_CORPUS_PATH,
+    refresh_interval=int(os.environ.get('POST_CORPUS_REFRESH', 30)),
+    retention_hours=MAX_TIMELINE_HOURS
+) if POST_CORPUS_PATH else None
+if post_corpus is not None:
+    start = time.perf_counter()
+    logger.info(f"Post corpus loaded {post_corpus.refresh()} posts in {time.perf_counter() - start:.1f} s")
+
+# Optional SQLite store shared by all workers on the host and kept across restarts
+RESULT_STORE_PATH = os.environ.get('RESULT_STORE_PATH')
+result_store = ResultStore(RESULT_STORE_PATH) if RESULT_STORE_PATH else None
+
+# Identical analyses running at the same time in this worker (threads, or the
+# ASGI server's Flask routes) are done once and shared; see analyze_once
+in_flight = SingleFlight()
+
+# Per-worker Prometheus metrics served on /metrics
+metrics = Metrics()
+metrics.counter('requests_total', "Requests by route, method and status code")
+metrics.histogram('request_seconds', "Request latency in seconds by route")
+metrics.histogram('stage_seconds', "Seconds spent in each hot-path stage by route")
+metrics.counter('cache_lookups_total', "Result cache lookups by outcome (HIT, STORE or MISS)")
+metrics.counter('page_fetches_total', "Page fetches by page cache outcome (MISS or REVALIDATED)")
+metrics.counter('url_results_total', "Per-URL outcomes of /analyze/urls")
+metrics.counter('coalesced_requests_total', "Requests answered by joining an identical in-flight analysis, by route")
+metrics.gauge('result_cache_bytes', "Bytes held by the in-memory result cache", lambda: result_cache.current_bytes)
+metrics.gauge('page_cache_bytes', "Bytes held by the page text cache", lambda: page_fetcher.pages.current_bytes)
+metrics.gauge('fetch_queue_depth', "URLs waiting for a fetch thread or a slot on their host", url_batch_analyzer.queue_depth)
+metrics.gauge('analyses_in_flight', "Distinct analyses running in this worker", in_flight.in_flight)
+metrics.counter('jobs_total', "Finished background jobs by type and status")
+metrics.histogram('job_seconds', "Background job run time in seconds by type")
+metrics.gauge('job_queue_depth', "Background jobs waiting for a worker", lambda: job_queue.depth())
+metrics.gauge('admission_in_flight', "Admitted /analyze requests running in this process", lambda: admission.in_flight)
+metrics.gauge('queue_latency_seconds', "Smoothed time requests waited before reaching this process", lambda: admission.queue_seconds)
+metrics.counter('requests_shed_total', "Requests rejected with 503 by the admission controller, by reason")
+metrics.counter('deadline_exceeded_total', "Requests whose deadline ran out, by route and outcome (partial or failed)")
+
+# SERVER_TIMING=true adds a per-stage Server-Timing header to every response
+SERVER_TIMING = os.environ.get('SERVER_TIMING', 'False').lower() == 'true'
+
+# Response headers the frontend may read
+EXPOSE_HEADERS = ["Content-Range", "X-Content-Range", "X-Cache", "X-Page-Cache", "X-Extract-Bytes", "X-Extract-Time", "X-Extract-Truncated", "Server-Timing", "X-Request-ID", "Location", "Retry-After"]
 
 # Configure CORS to allow specific origins
 CORS(app, resources={
@@ -35,8 +189,8 @@ CORS(app, resources={
             "https://sentimentscope.vercel.app"
         ],
         "methods": ["GET", "POST", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"],
-        "expose_headers": ["Content-Range", "X-Content-Range"],
+        "allow_headers": ["Content-Type", "Authorization", "X-Request-ID", "X-Deadline-Ms"],
+        "expose_headers": EXPOSE_HEADERS,
         "supports_credentials": False,
         "max_age": 120
     }
@@ -49,190 +203,584 @@ def after_request(response):
     response.headers.add('Access-Control-Allow-Methods', 'GET,POST,OPTIONS')
     return response
 
-def clean_text(text):
-    # Remove HTML tags
-    text = re.sub(r'<[^>]+>', '', text)
-    # Remove URLs
-    text = re.sub(r'http\S+|www.\S+', '', text)
-    # Remove special characters and digits
-    text = re.sub(r'[^\w\s]', '', text)
-    # Convert to lowercase
-    text = text.lower()
-    return text
-
-def get_word_frequency(text, top_n=10):
-    # Tokenize
-    tokens = word_tokenize(text)
-    # Remove stopwords
-    stop_words = set(stopwords.words('english'))
-    tokens = [word for word in tokens if word.lower() not in stop_words and len(word) > 2]
-    # Get frequency
-    word_freq = Counter(tokens).most_common(top_n)
-    return [{"word": word, "count": count} for word, count in word_freq]
-
-def analyze_sentiment(text):
-    # Initialize VADER sentiment analyzer
-    sia = SentimentIntensityAnalyzer()
-    
-    # Get VADER sentiment scores
-    vader_scores = sia.polarity_scores(text)
-    
-    # Get TextBlob sentiment
-    blob = TextBlob(text)
-    textblob_sentiment = blob.sentiment.polarity
-    
-    # Combine VADER and TextBlob scores with weights
-    # VADER is better for social media text, so we give it more weight
-    compound_score = vader_scores['compound'] * 0.7 + textblob_sentiment * 0.3
-    
-    # Normalize to range [-1, 1]
-    normalized_score = max(min(compound_score, 1.0), -1.0)
-    
-    # Calculate confidence based on:
-    # 1. Agreement between VADER and TextBlob
-    # 2. VADER's compound score magnitude
-    # 3. TextBlob's subjectivity
-    score_agreement = 1 - abs(vader_scores['compound'] - textblob_sentiment) / 2
-    magnitude_confidence = abs(vader_scores['compound'])
-    subjectivity_confidence = blob.sentiment.subjectivity
-    
-    confidence = (score_agreement * 0.4 + magnitude_confidence * 0.4 + subjectivity_confidence * 0.2)
-    
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    g.request_started = time.monotonic()
+    g.request_id = bind_request(request.headers.get('X-Request-ID'))
+    begin_request()
+
+def admission_route(path, method):
+    # Analysis routes are shed under load; /metrics, stats and job polling always answer
+    return method == 'POST' and path.startswith('/analyze/')
+
+def admit(route, request_start):
+    """Run the admission check; returns ``(queue_seconds, None)`` if admitted, else ``(queue_seconds, 503 response args)``.
+
+    Shared with asgi.py; an admitted request must call ``admission.release()`` when it is done.
+    """
+    queue_seconds = queue_latency(request_start)
+    rejected = admission.admit(queue_seconds)
+    if rejected is None:
+        return queue_seconds, None
+    metrics.inc('requests_shed_total', route=route, reason=rejected)
+    logger.warning("Request shed", extra={"reason": rejected, "queueSeconds": queue_seconds})
+    return queue_seconds, ({"error": "Server is overloaded, retry later"}, {'Retry-After': str(admission.retry_after())})
+
+@app.before_request
+def admit_request():
+    if request.url_rule is None or not admission_route(request.url_rule.rule, request.method):
+        return None
+    g.queue_seconds, rejected = admit(request.url_rule.rule, request.headers.get('X-Request-Start'))
+    if rejected is not None:
+        body, headers = rejected
+        return jsonify(body), 503, headers
+    g.admitted = True
+    return None
+
+@app.teardown_request
+def release_admission(exc):
+    # Streamed responses tear down once the stream is finished, so they stay counted until then
+    if g.pop('admitted', False):
+        admission.release()
+
+def request_deadline(started, queue_seconds, requested_ms):
+    """The request's ``Deadline``, or None when REQUEST_DEADLINE is off; shared with asgi.py.
+
+    ``started`` is when this process got the request (``time.monotonic``),
+    ``queue_seconds`` how long it waited before that, ``requested_ms`` the
+    client's X-Deadline-Ms, which can only shorten the budget.
+    """
+    try:
+        requested = float(requested_ms) / 1000 if requested_ms else 0.0
+    except ValueError:
+        requested = 0.0
+    budget = REQUEST_DEADLINE
+    if requested > 0:
+        budget = min(budget, requested) if budget else requested
+    if not budget:
+        return None
+    return Deadline.after(budget, started - (queue_seconds or 0.0))
+
+def current_deadline():
+    return request_deadline(g.request_started, g.get('queue_seconds'), request.headers.get('X-Deadline-Ms'))
+
+def client_deadline():
+    # True if the client chose its own budget; such requests are not merged with others (see analyze_once)
+    return bool(request.headers.get('X-Deadline-Ms'))
+
+def is_partial(result):
+    return isinstance(result, dict) and result.get('details', {}).get('partial', False)
+
+def record_request(route, method, status, total):
+    # Shared with the ASGI routes in asgi.py; returns the Server-Timing value, or None when it is off
+    stages = end_request()
+    metrics.inc('requests_total', route=route, method=method, status=status)
+    metrics.observe('request_seconds', total, route=route)
+    for name, seconds in stages:
+        metrics.observe('stage_seconds', seconds, route=route, stage=name)
+    return server_timing(stages, total) if SERVER_TIMING else None
+
+@app.after_request
+def record_request_metrics(response):
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    timing = record_request(route, request.method, response.status_code, time.perf_counter() - g.request_start)
+    response.headers['X-Request-ID'] = g.request_id
+    if timing is not None:
+        response.headers['Server-Timing'] = timing
+        response.headers['Timing-Allow-Origin'] = '*'
+    return response
+
+@app.after_request
+def compress_response(response):
+    # Registered after the metrics hook so it runs before it and is timed; streamed
+    # (NDJSON) responses go out as they are produced, uncompressed
+    if not COMPRESS_MIN_BYTES or response.is_streamed or response.direct_passthrough or 'Content-Encoding' in response.headers:
+        return response
+    response.vary.add('Accept-Encoding')
+    with stage('compress'):
+        body, encoding = compress_body(response.get_data(), request.headers.get('Accept-Encoding'), COMPRESS_MIN_BYTES)
+    if encoding is not None:
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+def lookup_result(cache_key):
+    # Check this worker's memory first, then the shared store
+    result = result_cache.get(cache_key)
+    if result is not None:
+        metrics.inc('cache_lookups_total', result='HIT')
+        return result, 'HIT'
+    if result_store is not None:
+        entry = result_store.get(cache_key)
+        if entry is not None:
+            result, ttl = entry
+            result_cache.put(cache_key, result, ttl)
+            metrics.inc('cache_lookups_total', result='STORE')
+            return result, 'STORE'
+    metrics.inc('cache_lookups_total', result='MISS')
+    return None, 'MISS'
+
+def save_result(cache_key, result, ttl):
+    result_cache.put(cache_key, result, ttl)
+    if result_store is not None:
+        result_store.put(cache_key, result, ttl)
+
+def requested_tier(data):
+    # The request's scoring tier, or None if it asked for one that does not exist
+    tier = data.get('tier', SCORING_TIER)
+    return tier if tier in SCORING_TIERS else None
+
+TIER_ERROR = f"tier must be one of {', '.join(SCORING_TIERS)}"
+
+def requested_fields(data):
+    # The request's fields/compact selection (everything by default), or None if it is malformed
+    try:
+        return FieldSelection.parse(data.get('fields'), data.get('compact'))
+    except ValueError:
+        return None
+
+def is_integer(value):
+    # JSON numbers without a fraction; true and false are bools, which Python counts as ints
+    return isinstance(value, int) and not isinstance(value, bool)
+
+FIELDS_ERROR = "fields must be a list of field names or a comma-separated string, and compact true or false"
+
+def analyze_once(route, key, ttl, func, *args, deadline=None, merge=True):
+    """Run ``func(*args)`` once for all concurrent requests with the same key; returns ``(result, shared)``.
+
+    The leader saves the result (unless ``ttl`` is None) before its waiters are
+    released, so requests arriving just after it finishes hit the cache instead
+    of starting another run. An exception is raised in every waiter.
+
+    ``deadline`` is passed to ``func`` by the leader and bounds how long a
+    waiter waits. ``merge=False`` runs alone: a client-chosen deadline is
+    neither imposed on other requests nor inherited from them.
+    """
+    def run():
+        result = func(*args, deadline=deadline) if deadline is not None else func(*args)
+        # A result cut short by its deadline is never cached
+        if ttl is not None and not is_partial(result):
+            save_result(key, result, ttl)
+        return result
+
+    if not merge:
+        return run(), False
+    result, shared = in_flight.do(key, run, deadline=deadline)
+    if shared:
+        metrics.inc('coalesced_requests_total', route=route)
+    return result, shared
+
+def page_headers(page):
+    # How the page text was obtained: cache status, bytes read, parse time and truncation
     return {
-        'score': normalized_score,
-        'confidence': confidence,
-        'vader_scores': vader_scores,
-        'textblob_score': textblob_sentiment
+        'X-Page-Cache': page.status,
+        'X-Extract-Bytes': str(page.bytes_read),
+        'X-Extract-Time': f"{page.parse_seconds * 1000:.1f}",
+        'X-Extract-Truncated': 'true' if page.truncated else 'false'
     }
 
+def cached_response(result, status, fields=None):
+    # The full result is what is cached and shared; each response trims its own copy
+    response = jsonify(fields.apply(result) if fields is not None else result)
+    response.headers['X-Cache'] = status
+    return response
+
+def fetch_and_score(url, long_document, sections, tier='full', deadline=None):
+    # Fetch URL content and extract paragraph text (revalidated if we have seen the page before),
+    # keeping part of the deadline for the scoring
+    page = page_fetcher.fetch_text(url, deadline=deadline.share(FETCH_BUDGET_SHARE) if deadline is not None else None)
+    metrics.inc('page_fetches_total', status=page.status)
+    if not page.text.strip():
+        return None, page
+
+    # Clean, score and count words
+    return analyze_page_text(page.text, long_document=long_document, sections=sections, scoring_pool=scoring_pool,
+                             tier=tier, deadline=deadline), page
+
 @app.route('/analyze/url', methods=['POST', 'OPTIONS'])
 def analyze_url():
     if request.method == 'OPTIONS':
         return '', 200
         
     try:
-        print("Received request:", request.get_json())
         data = request.get_json()
+        log_payload("Received URL analysis request", request=request.get_data())
         
         if not data:
-            print("No JSON data received")
+            logger.info("No JSON data received")
             return jsonify({"error": "No JSON data received"}), 400
             
         url = data.get('url')
         
         if not url:
-            print("URL is required")
+            logger.info("URL is required")
             return jsonify({"error": "URL is required"}), 400
             
-        print(f"Analyzing URL: {url}")
+        tier = requested_tier(data)
+
+        if tier is None:
+            logger.info("Invalid scoring tier")
+            return jsonify({"error": TIER_ERROR}), 400
+
+        fields = requested_fields(data)
+        if fields is None:
+            return jsonify({"error": FIELDS_ERROR}), 400
+
+        logger.info(f"Analyzing URL: {url}")
             
-        # Fetch URL content
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        # Parse HTML
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Extract text from paragraphs
-        paragraphs = soup.find_all('p')
-        text = ' '.join([p.get_text() for p in paragraphs])
-        
-        if not text.strip():
-            print("No text content found")
+        # Concurrent requests for the same page and options share one fetch and score
+        cache_key = url_cache_key(url, data.get('longDocument'), bool(data.get('sections')), tier)
+        (result, page), shared = analyze_once(
+            '/analyze/url', cache_key, None, fetch_and_score, url, data.get('longDocument'), bool(data.get('sections')), tier,
+            deadline=current_deadline(), merge=not client_deadline()
+        )
+
+        if result is None:
+            logger.info("No text content found")
             return jsonify({"error": "No text content found in the URL"}), 400
-        
-        # Clean text
-        cleaned_text = clean_text(text)
-        
-        # Analyze sentiment
-        sentiment_analysis = analyze_sentiment(cleaned_text)
-        
-        # Determine sentiment label
-        score = sentiment_analysis['score']
-        if score > 0.1:
-            sentiment = "positive"
-        elif score < -0.1:
-            sentiment = "negative"
-        else:
-            sentiment = "neutral"
-            
-        # Get word frequency
-        word_frequency = get_word_frequency(cleaned_text)
-        
-        result = {
-            "sentiment": sentiment,
-            "score": sentiment_analysis['score'],
-            "confidence": sentiment_analysis['confidence'],
-            "wordFrequency": word_frequency,
-            "details": {
-                "vader_scores": sentiment_analysis['vader_scores'],
-                "textblob_score": sentiment_analysis['textblob_score']
-            }
-        }
-        
-        print("Analysis result:", result)
-        return jsonify(result)
-        
+
+        if is_partial(result):
+            metrics.inc('deadline_exceeded_total', route='/analyze/url', outcome='partial')
+        log_payload("URL analysis result", result=result)
+        response = cached_response(result, 'COALESCED' if shared else 'MISS', fields)
+        response.headers.update(page_headers(page))
+        return response
+        
+    except DeadlineExceeded as e:
+        logger.warning(str(e))
+        metrics.inc('deadline_exceeded_total', route='/analyze/url', outcome='failed')
+        return jsonify({"error": str(e)}), 504
     except requests.RequestException as e:
-        print(f"Error fetching URL: {str(e)}")
+        logger.warning(f"Error fetching URL: {str(e)}")
         return jsonify({"error": f"Error fetching URL: {str(e)}"}), 400
     except Exception as e:
-        print(f"Error analyzing content: {str(e)}")
+        logger.exception(f"Error analyzing content: {str(e)}")
         return jsonify({"error": f"Error analyzing content: {str(e)}"}), 500
 
+@app.route('/analyze/urls', methods=['POST', 'OPTIONS'])
+def analyze_urls():
+    if request.method == 'OPTIONS':
+        return '', 200
+
+    try:
+        data = request.get_json()
+
+        if not data:
+            logger.info("No JSON data received")
+            return jsonify({"error": "No JSON data received"}), 400
+
+        urls = data.get('urls')
+
+        if not isinstance(urls, list) or not urls:
+            logger.info("URLs are required")
+            return jsonify({"error": "URLs must be a non-empty list"}), 400
+
+        if len(urls) > MAX_URLS:
+            logger.info(f"Too many URLs: {len(urls)}")
+            return jsonify({"error": f"Too many URLs. At most {MAX_URLS} are allowed."}), 413
+
+        fields = requested_fields(data)
+        if fields is None:
+            return jsonify({"error": FIELDS_ERROR}), 400
+
+        logger.info(f"Analyzing {len(urls)} URLs")
+
+    except Exception as e:
+        logger.exception(f"Error analyzing URLs: {str(e)}")
+        return jsonify({"error": f"Error analyzing URLs: {str(e)}"}), 500
+
+    # Stream one JSON line per URL as soon as it finishes; failures are per-URL entries
+    def generate():
+        failed = 0
+        for result in url_batch_analyzer.analyze(urls):
+            failed += 'error' in result
+            metrics.inc('url_results_total', result='error' if 'error' in result else 'ok')
+            yield dumps(fields.apply(result), sort_keys=False) + b'\n'
+        logger.info(f"URL batch complete: {len(urls) - failed} analyzed, {failed} errors")
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def text_cache_key(text, cleaned_text, long_document, sections, tier='full'):
+    # Identical cleaned text produces the same result; "auto" shares the entry of the tier it picks.
+    # Long documents are chunked, and their section offsets taken, on the raw text, so those key on it
+    tier = resolve_tier(tier, len(cleaned_text))
+    if is_long_document(cleaned_text, long_document):
+        return digest('text', f"raw|{tier}|{long_document}|{sections}|{text}")
+    if tier != 'full':
+        return digest('text', f"{tier}|{long_document}|{sections}|{cleaned_text}")
+    if long_document is None and not sections:
+        return digest('text', cleaned_text)
+    return digest('text', f"{long_document}|{sections}|{cleaned_text}")
+
+def url_cache_key(url, long_document, sections, tier='full'):
+    return digest('url', f"{tier}|{long_document}|{sections}|{normalize_url(url)}")
+
+def score_text(text, cleaned_text, long_document, sections, tier='full', deadline=None):
+    # Get sentiment analysis, in sentence chunks for long texts
+    sentiment_analysis, section_scores = analyze_document(text, cleaned_text, long_document, scoring_pool, tier, deadline)
+
+    # Calculate overall sentiment
+    score = sentiment_analysis['score']
+    sentiment = sentiment_label(score)
+
+    result = {
+        "sentiment": sentiment,
+        "score": score,
+        "confidence": sentiment_analysis['confidence'],
+        "details": {
+            "vader_scores": sentiment_analysis['vader_scores'],
+            "textblob_score": sentiment_analysis['textblob_score'],
+            "tier": resolve_tier(tier, len(cleaned_text))
+        }
+    }
+    partial_details(result["details"], sentiment_analysis)
+    if section_scores is not None:
+        result["details"]["chunks"] = len(section_scores)
+        if sections:
+            result["sections"] = section_scores
+    return result
+
 @app.route('/analyze/text', methods=['POST', 'OPTIONS'])
 def analyze_text():
     if request.method == 'OPTIONS':
         return '', 200
         
     try:
-        print("Received text analysis request:", request.get_json())
         data = request.get_json()
+        log_payload("Received text analysis request", request=request.get_data())
         
         if not data:
-            print("No JSON data received")
+            logger.info("No JSON data received")
             return jsonify({"error": "No JSON data received"}), 400
             
         text = data.get('text')
         
         if not text:
-            print("Text is required")
+            logger.info("Text is required")
             return jsonify({"error": "Text is required"}), 400
+
+        tier = requested_tier(data)
+
+        if tier is None:
+            logger.info("Invalid scoring tier")
+            return jsonify({"error": TIER_ERROR}), 400
+
+        fields = requested_fields(data)
+        if fields is None:
+            return jsonify({"error": FIELDS_ERROR}), 400
             
-        print(f"Analyzing text: {text}")
+        logger.info("Analyzing text", extra={"chars": len(text), "tier": tier})
 
         # Clean the text
-        cleaned_text = clean_text(text)
-        
-        # Get sentiment analysis
-        sentiment_analysis = analyze_sentiment(cleaned_text)
-        
-        # Calculate overall sentiment
-        score = sentiment_analysis['score']
-        if score > 0.1:
-            sentiment = "positive"
-        elif score < -0.1:
-            sentiment = "negative"
+        with stage('clean'):
+            cleaned_text = clean_text(text)
+
+        # Long-document options (sections, longDocument override) change the result
+        long_document = data.get('longDocument')
+        sections = bool(data.get('sections'))
+
+        cache_key = text_cache_key(text, cleaned_text, long_document, sections, tier)
+        result, cache_status = lookup_result(cache_key)
+        if result is not None:
+            logger.info("Text analysis served from cache")
+            return cached_response(result, cache_status, fields)
+
+        # Identical texts already being scored in this worker are joined, not rescored
+        result, shared = analyze_once('/analyze/text', cache_key, TEXT_CACHE_TTL, score_text, text, cleaned_text, long_document, sections, tier,
+                                      deadline=current_deadline(), merge=not client_deadline())
+        if shared:
+            logger.info("Text analysis shared with a concurrent request")
+            return cached_response(result, 'COALESCED', fields)
+
+        if is_partial(result):
+            metrics.inc('deadline_exceeded_total', route='/analyze/text', outcome='partial')
+        log_payload("Text analysis result", result=result)
+        return cached_response(result, 'MISS', fields)
+        
+    except DeadlineExceeded as e:
+        logger.warning(str(e))
+        metrics.inc('deadline_exceeded_total', route='/analyze/text', outcome='failed')
+        return jsonify({"error": str(e)}), 504
+    except Exception as e:
+        logger.exception(f"Error analyzing text: {str(e)}")
+        return jsonify({"error": f"Error analyzing text: {str(e)}"}), 500
+
+def score_documents(documents):
+    # Accept {"id": ..., "text": ...} objects or bare strings, keyed by position if no id is given
+    ids, texts, results = [], [], []
+    for index, document in enumerate(documents):
+        if isinstance(document, dict):
+            doc_id = document.get('id', index)
+            text = document.get('text')
         else:
-            sentiment = "neutral"
-            
-        result = {
+            doc_id, text = index, document
+        ids.append(doc_id)
+        if isinstance(text, str) and text.strip():
+            texts.append(clean_text(text))
+            results.append(None)
+        else:
+            results.append({"id": doc_id, "error": "Text is required"})
+
+    # Score every valid document in one pass
+    scored = iter(engine.score_batch(texts))
+    counts = {"positive": 0, "negative": 0, "neutral": 0}
+    scores, confidences = [], []
+    for index, doc_id in enumerate(ids):
+        if results[index] is not None:
+            continue
+        sentiment_analysis = next(scored)
+        sentiment = sentiment_label(sentiment_analysis['score'])
+        counts[sentiment] += 1
+        scores.append(sentiment_analysis['score'])
+        confidences.append(sentiment_analysis['confidence'])
+        results[index] = {
+            "id": doc_id,
             "sentiment": sentiment,
-            "score": score,
+            "score": sentiment_analysis['score'],
             "confidence": sentiment_analysis['confidence'],
             "details": {
                 "vader_scores": sentiment_analysis['vader_scores'],
                 "textblob_score": sentiment_analysis['textblob_score']
             }
         }
-        
-        print("Text analysis result:", result)
-        return jsonify(result)
-        
+
+    stats = {
+        "count": len(documents),
+        "analyzed": len(scores),
+        "errors": len(documents) - len(scores),
+        "sentimentCounts": counts,
+        "meanScore": sum(scores) / len(scores) if scores else 0.0,
+        "minScore": min(scores) if scores else 0.0,
+        "maxScore": max(scores) if scores else 0.0,
+        "meanConfidence": sum(confidences) / len(confidences) if confidences else 0.0
+    }
+    return {"results": results, "stats": stats}
+
+@app.route('/analyze/text/batch', methods=['POST', 'OPTIONS'])
+def analyze_text_batch():
+    if request.method == 'OPTIONS':
+        return '', 200
+
+    try:
+        data = request.get_json()
+
+        if not data:
+            logger.info("No JSON data received")
+            return jsonify({"error": "No JSON data received"}), 400
+
+        documents = data.get('documents')
+
+        if not isinstance(documents, list) or not documents:
+            logger.info("Documents are required")
+            return jsonify({"error": "Documents must be a non-empty list"}), 400
+
+        if len(documents) > MAX_BATCH_SIZE:
+            logger.info(f"Batch too large: {len(documents)} documents")
+            return jsonify({"error": f"Batch too large. At most {MAX_BATCH_SIZE} documents are allowed."}), 413
+
+        fields = requested_fields(data)
+        if fields is None:
+            return jsonify({"error": FIELDS_ERROR}), 400
+
+        logger.info(f"Analyzing batch of {len(documents)} documents")
+
+        batch = score_documents(documents)
+        stats = batch["stats"]
+
+        logger.info(f"Batch analysis complete: {stats['analyzed']} analyzed, {stats['errors']} errors")
+        # fields and compact apply to each document's result; the stats are always sent
+        if not fields.everything():
+            batch = {"results": [fields.apply(result) for result in batch["results"]], "stats": stats}
+        return jsonify(batch)
+
     except Exception as e:
-        print(f"Error analyzing text: {str(e)}")
-        return jsonify({"error": f"Error analyzing text: {str(e)}"}), 500
+        logger.exception(f"Error analyzing batch: {str(e)}")
+        return jsonify({"error": f"Error analyzing batch: {str(e)}"}), 500
+
+# /analyze/stream: NDJSON lines in, one result per line out as each arrives, plus
+# running aggregates; lines over STREAM_MAX_LINE_BYTES are rejected individually
+STREAM_MAX_LINE_BYTES = int(os.environ.get('STREAM_MAX_LINE_BYTES', 64 * 1024))
+STREAM_WORD_CAPACITY = int(os.environ.get('STREAM_WORD_CAPACITY', 1000))
+
+def stream_options(args):
+    """``(results, summary_every)`` from the query string: ``results=false`` sends only summaries,
+    ``summaryEvery=N`` adds a running summary line after every N lines."""
+    return args.get('results', 'true').lower() != 'false', max(0, args.get('summaryEvery', 0, type=int))
+
+@app.route('/analyze/stream', methods=['POST', 'OPTIONS'])
+def analyze_stream():
+    if request.method == 'OPTIONS':
+        return '', 200
+
+    send_results, summary_every = stream_options(request.args)
+    analyzer = StreamAnalyzer(word_capacity=STREAM_WORD_CAPACITY)
+    logger.info("Analyzing NDJSON stream")
+
+    # The body is read line by line while the response is being written, so
+    # neither side is ever buffered whole
+    def generate():
+        try:
+            for number, line in iter_lines(request.stream, STREAM_MAX_LINE_BYTES):
+                for result in analyzer.score_lines([(number, line)]):
+                    if send_results:
+                        yield dumps(result, sort_keys=False) + b'\n'
+                if summary_every and number % summary_every == 0:
+                    yield dumps({"summary": analyzer.summary(), "final": False}, sort_keys=False) + b'\n'
+        except Exception as e:
+            logger.exception(f"Error analyzing stream: {str(e)}")
+            yield dumps({"error": f"Error analyzing stream: {str(e)}"}, sort_keys=False) + b'\n'
+        yield dumps({"summary": analyzer.summary(), "final": True}, sort_keys=False) + b'\n'
+        logger.info(f"Stream complete: {analyzer.scores.count} analyzed, {analyzer.errors} errors")
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def score_hashtag(hashtag, now, hours, bucket_minutes, corpus_has_hashtag, tier='full'):
+    # Get sentiment analysis of the hashtag's words with context
+    sentiment_analysis = analyze_sentiment(hashtag_text(hashtag), tier)
+    base_sentiment = sentiment_analysis['score']
+
+    if corpus_has_hashtag:
+        # Real posts: per-bucket mean and spread straight from the hourly aggregates
+        times, volume, total, total_squares = post_corpus.timeline(hashtag, now, hours, bucket_minutes // 60)
+        sentiment_series, _, weighted_sentiment, sentiment_std = timeline_moments(volume, total, total_squares)
+        sentiment_series = np.round(sentiment_series, 3)
+        if not volume.any():
+            weighted_sentiment = base_sentiment
+        volume_factor = min(1.0, int(volume.sum()) / (500 * hours))
+    else:
+        # Generate timeline data, deterministic per hashtag and bucket
+        times, volume, sentiment_series = hashtag_timeline(hashtag, base_sentiment, now, hours, bucket_minutes)
+
+        # Calculate overall metrics with volume-weighted sentiment
+        weighted_sentiment, sentiment_std, volume_factor = timeline_summary(volume, sentiment_series, base_sentiment, hours)
+
+    # Determine overall sentiment with adjusted thresholds
+    if weighted_sentiment > 0.15:
+        sentiment = "positive"
+    elif weighted_sentiment < -0.15:
+        sentiment = "negative"
+    else:
+        sentiment = "neutral"
+
+    # Calculate confidence with improved factors
+    consistency_factor = 1 - sentiment_std
+    base_confidence = sentiment_analysis['confidence']
+    confidence = round((volume_factor + consistency_factor + base_confidence) / 3, 3)
+
+    result = {
+        "sentiment": sentiment,
+        "score": round(weighted_sentiment, 3),
+        "confidence": confidence,
+        "timeline": timeline_points(times, volume, sentiment_series, hours),
+        "source": "corpus" if corpus_has_hashtag else "simulated",
+        "details": {
+            "vader_scores": sentiment_analysis['vader_scores'],
+            "textblob_score": sentiment_analysis['textblob_score'],
+            "tier": tier
+        }
+    }
+    return result
 
 @app.route('/analyze/hashtag', methods=['POST', 'OPTIONS'])
 def analyze_hashtag():
@@ -240,136 +788,215 @@ def analyze_hashtag():
         return '', 200
         
     try:
-        print("Received hashtag request:", request.get_json())
         data = request.get_json()
+        log_payload("Received hashtag request", request=request.get_data())
         
         if not data:
-            print("No JSON data received")
+            logger.info("No JSON data received")
             return jsonify({"error": "No JSON data received"}), 400
             
         hashtag = data.get('hashtag')
         
         if not hashtag:
-            print("Hashtag is required")
+            logger.info("Hashtag is required")
             return jsonify({"error": "Hashtag is required"}), 400
             
         if not re.match(r'^[a-zA-Z0-9_]+$', hashtag):
-            print("Invalid hashtag format")
+            logger.info("Invalid hashtag format")
             return jsonify({"error": "Invalid hashtag format. Only letters, numbers, and underscores are allowed."}), 400
             
-        print(f"Analyzing hashtag: {hashtag}")
-
-        # Improved hashtag text analysis
-        # Split camelCase and snake_case into words
-        words = []
-        # Split by underscore first
-        parts = hashtag.split('_')
-        for part in parts:
-            # Then split camelCase
-            words.extend(re.findall(r'[A-Z]?[a-z]+|[A-Z]{2,}(?=[A-Z][a-z]|\d|\W|$)|\d+', part))
-        
-        # Clean and join words
-        hashtag_text = ' '.join(word.lower() for word in words if word)
-        
-        # If no words were extracted, use the original hashtag
-        if not hashtag_text:
-            hashtag_text = hashtag.lower()
-        
-        # Get sentiment analysis with context
-        sentiment_analysis = analyze_sentiment(hashtag_text)
-        base_sentiment = sentiment_analysis['score']
+        # Timeline window: 24 hourly buckets by default, up to MAX_TIMELINE_HOURS
+        hours = data.get('hours', 24)
+        bucket_minutes = data.get('bucketMinutes', 60)
+        if not is_integer(hours) or not 1 <= hours <= MAX_TIMELINE_HOURS:
+            return jsonify({"error": f"hours must be an integer between 1 and {MAX_TIMELINE_HOURS}"}), 400
+        if not is_integer(bucket_minutes) or bucket_minutes < 1 or 1440 % bucket_minutes:
+            return jsonify({"error": "bucketMinutes must be a whole number of minutes that divides a day"}), 400
+        if hours * 60 // bucket_minutes > MAX_TIMELINE_BUCKETS:
+            return jsonify({"error": f"Too many buckets. At most {MAX_TIMELINE_BUCKETS} are allowed."}), 400
 
-        # Use hashtag as seed for random number generation to ensure consistency
-        random.seed(hashtag)
+        # Hashtag text is short, so "auto" settles on "full" unless AUTO_FAST_CHARS is tiny
+        tier = requested_tier(data)
+        if tier is None:
+            return jsonify({"error": TIER_ERROR}), 400
+        tier = resolve_tier(tier, len(hashtag_text(hashtag)))
 
-        # Generate timeline data with improved volume calculation
-        now = datetime.now().replace(minute=0, second=0, microsecond=0)
-        timeline = []
-        
-        # Base parameters - use hash of hashtag for consistency
-        hashtag_hash = hash(hashtag)
-        base_volume = 50 + abs(hashtag_hash % 450)  # Reduced base volume for more realistic numbers
-        trend_direction = 1 if hashtag_hash % 2 == 0 else -1
-        
-        # Peak hours for social media activity (in 24-hour format)
-        peak_hours = {
-            9: 1.2,   # Morning
-            12: 1.3,  # Lunch
-            15: 1.2,  # Afternoon
-            19: 1.5,  # Evening peak
-            21: 1.4,  # Night
-        }
-        
-        for i in range(24):
-            hour = (now - timedelta(hours=23-i)).hour
-            time = f"{hour:02d}:00"
-            
-            # Time-based volume adjustments
-            time_factor = peak_hours.get(hour, 1.0)
-            if 23 <= hour or hour <= 4:
-                time_factor = 0.3  # Reduced activity during night hours
-                
-            # Use deterministic values based on hashtag and hour
-            hour_seed = f"{hashtag}_{hour}"
-            random.seed(hour_seed)
-            
-            # Calculate volume with more natural variation
-            volume = int(base_volume * time_factor * (1 + random.uniform(-0.2, 0.2)))
-            
-            # Calculate sentiment with smoother transitions
-            time_progress = i / 23
-            trend_component = trend_direction * (time_progress - 0.5) * 0.3
-            random.seed(f"{hour_seed}_sentiment")
-            noise = random.uniform(-0.15, 0.15)
-            
-            sentiment = max(-1, min(1, base_sentiment + trend_component + noise))
-            
-            timeline.append({
-                "time": time,
-                "sentiment": round(sentiment, 3),
-                "volume": volume
-            })
-            
-        # Calculate overall metrics with volume-weighted sentiment
-        total_volume = sum(t["volume"] for t in timeline)
-        weighted_sentiment = sum(t["sentiment"] * t["volume"] for t in timeline) / total_volume if total_volume > 0 else base_sentiment
-        
-        # Determine overall sentiment with adjusted thresholds
-        if weighted_sentiment > 0.15:
-            sentiment = "positive"
-        elif weighted_sentiment < -0.15:
-            sentiment = "negative"
-        else:
-            sentiment = "neutral"
-            
-        # Calculate confidence with improved factors
-        sentiment_std = (sum((t["sentiment"] - weighted_sentiment) ** 2 for t in timeline) / len(timeline)) ** 0.5
-        volume_factor = min(1.0, total_volume / (500 * 24))  # Adjusted for lower volumes
-        consistency_factor = 1 - sentiment_std
-        base_confidence = sentiment_analysis['confidence']
-        confidence = round((volume_factor + consistency_factor + base_confidence) / 3, 3)
-            
-        result = {
-            "sentiment": sentiment,
-            "score": round(weighted_sentiment, 3),
-            "confidence": confidence,
-            "timeline": timeline,
-            "details": {
-                "vader_scores": sentiment_analysis['vader_scores'],
-                "textblob_score": sentiment_analysis['textblob_score']
-            }
-        }
-        
-        # Reset random seed
-        random.seed()
-        
-        print("Hashtag analysis result:", result)
-        return jsonify(result)
+        fields = requested_fields(data)
+        if fields is None:
+            return jsonify({"error": FIELDS_ERROR}), 400
+
+        # Hashtags found in the post corpus are answered from its hourly aggregates
+        corpus_has_hashtag = False
+        if post_corpus is not None:
+            post_corpus.start_refresher()
+            corpus_has_hashtag = hashtag in post_corpus
+            if corpus_has_hashtag and bucket_minutes % 60:
+                return jsonify({"error": "bucketMinutes must be a multiple of 60 for hashtags in the post corpus"}), 400
+
+        logger.info(f"Analyzing hashtag: {hashtag}")
+
+        # The timeline is anchored to the current bucket, so that is part of the key,
+        # and so is the corpus version, which moves whenever new posts arrive
+        now = floor_time(datetime.now(), bucket_minutes)
+        source = f"corpus{post_corpus.version}" if corpus_has_hashtag else "simulated"
+        cache_key = digest('hashtag', f"{hashtag}@{now.isoformat()}/{hours}h/{bucket_minutes}m/{source}/{tier}")
+        result, cache_status = lookup_result(cache_key)
+        if result is not None:
+            logger.info("Hashtag analysis served from cache")
+            return cached_response(result, cache_status, fields)
+
+        # Identical timelines already being built in this worker are joined, not rebuilt
+        result, shared = analyze_once('/analyze/hashtag', cache_key, HASHTAG_CACHE_TTL, score_hashtag, hashtag, now, hours, bucket_minutes, corpus_has_hashtag, tier)
+        if shared:
+            logger.info("Hashtag analysis shared with a concurrent request")
+            return cached_response(result, 'COALESCED', fields)
+
+        log_payload("Hashtag analysis result", result=result)
+        return cached_response(result, 'MISS', fields)
         
     except Exception as e:
-        print(f"Error analyzing hashtag: {str(e)}")
+        logger.exception(f"Error analyzing hashtag: {str(e)}")
         return jsonify({"error": f"Error analyzing hashtag: {str(e)}"}), 500
 
+# Background jobs: POST /jobs queues a text, url or batch analysis and GET /jobs/<id>
+# returns its status and, once done, the same body the synchronous route would.
+# The queue is a SQLite file at JOB_STORE_PATH (by default in the temp directory),
+# shared by all workers on the host so a job can be polled from any of them.
+# JOB_STORE_PATH=memory keeps jobs in the accepting process, which only works
+# with a single worker (WEB_CONCURRENCY=1)
+JOB_STORE_PATH = os.environ.get('JOB_STORE_PATH') or os.path.join(tempfile.gettempdir(), 'sentimentscope-jobs.sqlite3')
+JOB_QUEUE_SIZE = int(os.environ.get('JOB_QUEUE_SIZE', 100))
+JOB_RETRY_AFTER = int(os.environ.get('JOB_RETRY_AFTER', 5))
+
+def validate_job(kind, data):
+    """Return ``(error, status)`` for an invalid job request, or None; same checks as the synchronous routes."""
+    if kind == 'text':
+        if not isinstance(data.get('text'), str) or not data['text'].strip():
+            return "Text is required", 400
+    elif kind == 'url':
+        if not isinstance(data.get('url'), str) or not data['url'].strip():
+            return "URL is required", 400
+    elif kind == 'batch':
+        documents = data.get('documents')
+        if not isinstance(documents, list) or not documents:
+            return "Documents must be a non-empty list", 400
+        if len(documents) > MAX_BATCH_SIZE:
+            return f"Batch too large. At most {MAX_BATCH_SIZE} documents are allowed.", 413
+    else:
+        return "type must be one of text, url or batch", 400
+    if requested_tier(data) is None:
+        return TIER_ERROR, 400
+    return None
+
+def text_job(data):
+    long_document, sections, tier = data.get('longDocument'), bool(data.get('sections')), requested_tier(data)
+    cleaned_text = clean_text(data['text'])
+    cache_key = text_cache_key(data['text'], cleaned_text, long_document, sections, tier)
+    result, _ = lookup_result(cache_key)
+    if result is None:
+        result, _ = analyze_once('/jobs', cache_key, TEXT_CACHE_TTL, score_text, data['text'], cleaned_text, long_document, sections, tier)
+    return result
+
+def url_job(data):
+    url, long_document, sections, tier = data['url'].strip(), data.get('longDocument'), bool(data.get('sections')), requested_tier(data)
+    try:
+        (result, _), _ = analyze_once('/jobs', url_cache_key(url, long_document, sections, tier), None,
+                                      fetch_and_score, url, long_document, sections, tier)
+    except requests.RequestException as e:
+        raise JobFailed(f"Error fetching URL: {str(e)}")
+    if result is None:
+        raise JobFailed("No text content found in the URL")
+    return result
+
+def batch_job(data):
+    return score_documents(data['documents'])
+
+def job_finished(kind, status, seconds):
+    metrics.inc('jobs_total', type=kind, status=status)
+    metrics.observe('job_seconds', seconds, type=kind)
+
+if JOB_STORE_PATH == 'memory' and int(os.environ.get('WEB_CONCURRENCY', 1)) > 1:
+    raise RuntimeError("JOB_STORE_PATH=memory keeps jobs in one process; it cannot be used with "
+                       "WEB_CONCURRENCY > 1, where polls reach other workers. Set JOB_STORE_PATH to a file.")
+
+job_queue = JobQueue(
+    MemoryJobBackend() if JOB_STORE_PATH == 'memory' else SqliteJobBackend(JOB_STORE_PATH),
+    {'text': text_job, 'url': url_job, 'batch': batch_job},
+    workers=int(os.environ.get('JOB_WORKERS', 2)),
+    max_queued=JOB_QUEUE_SIZE,
+    result_ttl=int(os.environ.get('JOB_RESULT_TTL', 3600)),
+    job_timeout=int(os.environ.get('JOB_TIMEOUT', 900)),
+    on_finish=job_finished
+)
+
+@app.route('/jobs', methods=['POST', 'OPTIONS'])
+def submit_job():
+    if request.method == 'OPTIONS':
+        return '', 200
+
+    try:
+        data = request.get_json()
+        log_payload("Received job request", request=request.get_data())
+
+        if not data:
+            logger.info("No JSON data received")
+            return jsonify({"error": "No JSON data received"}), 400
+
+        kind = data.get('type')
+        invalid = validate_job(kind, data)
+        if invalid is not None:
+            error, status = invalid
+            logger.info(f"Invalid job request: {error}")
+            return jsonify({"error": error}), status
+
+        job_id = job_queue.submit(kind, data)
+        logger.info(f"Queued {kind} job {job_id}")
+
+        response = jsonify({"id": job_id, "type": kind, "status": "queued", "statusUrl": f"/jobs/{job_id}"})
+        response.status_code = 202
+        response.headers['Location'] = f"/jobs/{job_id}"
+        return response
+
+    except QueueFull:
+        # Backpressure: the client should retry later rather than pile more work on
+        logger.warning(f"Job queue full ({JOB_QUEUE_SIZE} queued)")
+        response = jsonify({"error": f"Too many queued jobs. At most {JOB_QUEUE_SIZE} may wait; retry later."})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(JOB_RETRY_AFTER)
+        return response
+    except Exception as e:
+        logger.exception(f"Error queueing job: {str(e)}")
+        return jsonify({"error": f"Error queueing job: {str(e)}"}), 500
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found or expired"}), 404
+    return jsonify(job)
+
+@app.route('/jobs/stats', methods=['GET'])
+def job_stats():
+    return jsonify(job_queue.stats())
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    stats = result_cache.stats()
+    stats["inFlight"] = in_flight.stats()
+    if result_store is not None:
+        stats["store"] = result_store.stats()
+    return jsonify(stats)
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/corpus/stats', methods=['GET'])
+def corpus_stats():
+    if post_corpus is None:
+        return jsonify({"error": "No post corpus is configured"}), 404
+    return jsonify(post_corpus.stats())
+
 if __name__ == "__main__":
     port = int(os.environ.get('PORT', 8000))
     host = os.environ.get('HOST', '0.0.0.0')
@@ -0,0 +1,133 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Stage timings of the request being handled in this context, or None outside a request
+_stages = contextvars.ContextVar('stages', default=None)
+
+
+@contextmanager
+def stage(name):
+    """Time a hot-path stage (fetch, parse, clean, vader, ...) of the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+def record_stage(name, seconds):
+    # Outside a request (scoring processes, fetch threads, startup) there is nothing to attach to
+    stages = _stages.get()
+    if stages is not None:
+        stages.append((name, seconds))
+
+
+def begin_request():
+    _stages.set([])
+
+
+def end_request():
+    """Return the ``(stage, seconds)`` pairs recorded since ``begin_request``, merged by stage."""
+    stages = _stages.get() or []
+    _stages.set(None)
+    merged = {}
+    for name, seconds in stages:
+        merged[name] = merged.get(name, 0.0) + seconds
+    return list(merged.items())
+
+
+def server_timing(stages, total):
+    # Server-Timing header value, durations in milliseconds
+    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in stages]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ', '.join(entries)
+
+
+def _label_text(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}'
+
+
+class Metrics:
+    """Process-local counters, gauges and latency histograms in Prometheus text format.
+
+    Every gunicorn worker keeps its own series, so a scrape sees the worker that
+    answered it; counters reset when a worker restarts.
+    """
+
+    def __init__(self, prefix='sentimentscope'):
+        self.prefix = prefix
+        self._help = {}
+        self._counters = {}
+        self._histograms = {}
+        self._gauges = []
+        self._lock = threading.Lock()
+
+    def counter(self, name, help_text):
+        self._help[name] = ('counter', help_text)
+
+    def histogram(self, name, help_text):
+        self._help[name] = ('histogram', help_text)
+
+    def gauge(self, name, help_text, collect):
+        """Register a gauge; ``collect()`` returns a number or a ``{labels tuple: number}`` dict at scrape time."""
+        self._help[name] = ('gauge', help_text)
+        self._gauges.append((name, collect))
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(LATENCY_BUCKETS) + 1), 0.0]
+            histogram[0][bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            histogram[1] += seconds
+
+    def render(self):
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: ([*counts], total) for key, (counts, total) in self._histograms.items()}
+
+        lines = []
+        for name, (kind, help_text) in self._help.items():
+            full_name = f"{self.prefix}_{name}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {kind}")
+
+            if kind == 'counter':
+                for (series, labels), value in counters.items():
+                    if series == name:
+                        lines.append(f"{full_name}{_label_text(labels)} {value}")
+
+            elif kind == 'histogram':
+                for (series, labels), (counts, total) in histograms.items():
+                    if series != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), counts):
+                        cumulative += count
+                        lines.append(f"{full_name}_bucket{_label_text(labels + (('le', bound),))} {cumulative}")
+                    lines.append(f"{full_name}_sum{_label_text(labels)} {total}")
+                    lines.append(f"{full_name}_count{_label_text(labels)} {cumulative}")
+
+            else:
+                collect = next(collect for series, collect in self._gauges if series == name)
+                values = collect()
+                if not isinstance(values, dict):
+                    values = {(): values}
+                for labels, value in values.items():
+                    lines.append(f"{full_name}{_label_text(labels)} {value}")
+
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,150 @@
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import urlsplit
+
+import requests
+
+from analysis import analyze_page_text
+
+
+class HostLimiter:
+    """Caps the number of simultaneous fetches to any single host.
+
+    Fetches over a host's cap wait in that host's queue, not in the thread
+    pool, so a slow or busy host never holds threads other hosts could use.
+    A host is forgotten once it has nothing running or waiting.
+    """
+
+    def __init__(self, per_host):
+        self.per_host = per_host
+        self._hosts = {}  # host -> [fetches running, deque of waiting (func, args)]
+        self._lock = threading.Lock()
+
+    def submit(self, executor, url, func, *args):
+        # Run func(*args) on the executor now if the host has a free slot, else once one frees up
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            state = self._hosts.setdefault(host, [0, deque()])
+            if state[0] >= self.per_host:
+                state[1].append((func, args))
+                return
+            state[0] += 1
+        executor.submit(self._run, executor, host, func, args)
+
+    def _run(self, executor, host, func, args):
+        try:
+            func(*args)
+        finally:
+            # Hand the slot straight to the host's next waiting fetch, if any
+            with self._lock:
+                state = self._hosts[host]
+                following = state[1].popleft() if state[1] else None
+                if following is None:
+                    state[0] -= 1
+                    if not state[0]:
+                        del self._hosts[host]
+            if following is not None:
+                executor.submit(self._run, executor, host, *following)
+
+    def waiting(self):
+        with self._lock:
+            return sum(len(state[1]) for state in self._hosts.values())
+
+
+class UrlBatchAnalyzer:
+    """Fetches many URLs concurrently and scores them in a separate process pool.
+
+    Fetching is I/O bound and runs on up to ``max_concurrency`` threads, with at
+    most ``per_host`` of them talking to the same host. Scoring is CPU bound and
+    goes to the ``ScoringPool`` processes (or runs inline when it has none), so
+    slow sites never hold up scoring and scoring never holds up fetch slots.
+    """
+
+    def __init__(self, fetcher, scoring_pool, max_concurrency=32, per_host=4):
+        self.fetcher = fetcher
+        self.scoring_pool = scoring_pool
+        self.max_concurrency = max_concurrency
+        self.host_limiter = HostLimiter(per_host)
+        self._fetch_pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def fetch_pool(self):
+        # Created lazily so gunicorn's preloading master never owns the threads
+        with self._lock:
+            if self._pid != os.getpid():
+                self._fetch_pool = ThreadPoolExecutor(self.max_concurrency, thread_name_prefix='fetch')
+                self._pid = os.getpid()
+            return self._fetch_pool
+
+    def queue_depth(self):
+        # URLs waiting for a fetch thread or for a slot on their host in this process
+        pool = self._fetch_pool if self._pid == os.getpid() else None
+        return (pool._work_queue.qsize() if pool is not None else 0) + self.host_limiter.waiting()
+
+    def analyze(self, urls):
+        """Yield one result per URL, in completion order, each tagged with its ``url`` and ``index``."""
+        fetch_pool = self.fetch_pool
+        results = queue.Queue()
+
+        def finish(index, url, result):
+            results.put(dict(result, url=url, index=index))
+
+        def score(index, url, text, retry=True):
+            score_pool = self.scoring_pool.executor
+            if score_pool is None:
+                try:
+                    return finish(index, url, analyze_page_text(text))
+                except Exception as e:
+                    return finish(index, url, {"error": f"Error analyzing content: {str(e)}"})
+
+            try:
+                future = score_pool.submit(analyze_page_text, text)
+            except BrokenProcessPool as e:
+                return rescore(index, url, text, score_pool, retry, e)
+            except Exception as e:
+                return finish(index, url, {"error": f"Error analyzing content: {str(e)}"})
+            future.add_done_callback(lambda f: scored(index, url, text, score_pool, retry, f))
+
+        def scored(index, url, text, score_pool, retry, future):
+            try:
+                finish(index, url, future.result())
+            except BrokenProcessPool as e:
+                rescore(index, url, text, score_pool, retry, e)
+            except Exception as e:
+                finish(index, url, {"error": f"Error analyzing content: {str(e)}"})
+
+        def rescore(index, url, text, score_pool, retry, error):
+            # A scoring process died: score once more on a new pool
+            if not retry:
+                return finish(index, url, {"error": f"Error analyzing content: {str(error)}"})
+            self.scoring_pool.replace(score_pool)
+            score(index, url, text, retry=False)
+
+        def fetch(index, url):
+            try:
+                page = self.fetcher.fetch_text(url)
+            except requests.RequestException as e:
+                return finish(index, url, {"error": f"Error fetching URL: {str(e)}"})
+            except Exception as e:
+                return finish(index, url, {"error": f"Error analyzing content: {str(e)}"})
+
+            if not page.text.strip():
+                return finish(index, url, {"error": "No text content found in the URL"})
+            score(index, url, page.text)
+
+        pending = 0
+        for index, url in enumerate(urls):
+            if not isinstance(url, str) or not url.strip():
+                yield {"url": url, "index": index, "error": "URL is required"}
+                continue
+            self.host_limiter.submit(fetch_pool, url.strip(), fetch, index, url.strip())
+            pending += 1
+
+        for _ in range(pending):
+            yield results.get()
@@ -0,0 +1,52 @@
+"""Local NLTK data for the server; nothing is ever downloaded at import time.
+
+NLTK reads the ``NLTK_DATA`` environment variable when it is first imported, so
+``use_local_nltk_data`` only has to put the bundled directory on it beforehand;
+no NLTK module is imported here. Fetch the data once at build time with:
+
+    python nltkdata.py [directory]
+
+On Heroku the Python buildpack does this itself: it downloads the corpora
+listed in nltk.txt (which must match RESOURCES) during the build and points
+NLTK_DATA at them.
+"""
+import os
+import re
+import sys
+
+# Data the scoring engine loads: the VADER lexicon and the English stopword list
+RESOURCES = ('vader_lexicon', 'stopwords')
+
+BUNDLED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nltk_data')
+
+
+def use_local_nltk_data(directory=BUNDLED_DIR):
+    # Directories already on NLTK_DATA keep precedence over the bundled one
+    paths = [path for path in os.environ.get('NLTK_DATA', '').split(os.pathsep) if path]
+    if directory not in paths:
+        paths.append(directory)
+    os.environ['NLTK_DATA'] = os.pathsep.join(paths)
+    if 'nltk.data' in sys.modules:
+        # NLTK was imported before us, so its search path has to be updated directly
+        import nltk
+        if directory not in nltk.data.path:
+            nltk.data.path.append(directory)
+
+
+def missing_data_message(error):
+    # NLTK's own message is a multi-line banner that suggests nltk.download(); keep just the resource name
+    match = re.search(r"Resource '?(\w+)'? not found", str(error))
+    missing = match.group(1) if match else str(error).strip()
+    return (f"NLTK data is missing ({missing}). Fetch it at build time with "
+            f"`python nltkdata.py` (into {BUNDLED_DIR}) or point NLTK_DATA at a directory that has "
+            f"{', '.join(RESOURCES)}.")
+
+
+if __name__ == "__main__":
+    import nltk
+
+    directory = sys.argv[1] if len(sys.argv) > 1 else BUNDLED_DIR
+    for resource in RESOURCES:
+        if not nltk.download(resource, download_dir=directory):
+            sys.exit(f"Could not download {resource}")
+    print(f"NLTK data ready in {directory}")
@@ -0,0 +1,136 @@
+import asyncio
+import threading
+from urllib.parse import urlsplit, urlunsplit
+
+from deadline import DeadlineExceeded
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_url(url):
+    """Key form of a URL: trimmed, lowercased scheme and host, default port and fragment dropped.
+
+    The path and query are kept as sent, since servers may treat them case-sensitively.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    return urlunsplit((scheme, host, parts.path or '/', parts.query, ''))
+
+
+class _Call:
+    # One in-flight run and, once it finishes, its outcome
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self, done):
+        self.done = done
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers with the same key share its outcome.
+
+    The first caller (the leader) runs the function. Callers that arrive while
+    it is running wait for it to finish, then get the same result or have the
+    same exception raised. Nothing is kept once the call completes, so this
+    only deduplicates concurrent work; the result caches handle repeats.
+
+    A caller that joins waits at most until its own ``deadline`` (the leader's
+    run is not cut short for it) and then gets ``DeadlineExceeded``.
+    """
+
+    def __init__(self):
+        self.leaders = 0
+        self.coalesced = 0
+        self.errors = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key, make_event):
+        # Returns (call, leader)
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                return call, False
+            call = self._calls[key] = _Call(make_event())
+            self.leaders += 1
+            return call, True
+
+    def _finish(self, key, call, error=None):
+        with self._lock:
+            del self._calls[key]
+            if error is not None:
+                call.error = error
+                self.errors += 1
+
+    def do(self, key, func, *args, deadline=None, **kwargs):
+        """Return ``(result, shared)``, where ``shared`` is True if another caller's run was reused."""
+        call, leader = self._join(key, threading.Event)
+        if not leader:
+            if not call.done.wait(deadline.remaining() if deadline is not None else None):
+                raise DeadlineExceeded("Deadline exceeded waiting for an identical analysis")
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as e:
+            self._finish(key, call, e)
+            raise
+        else:
+            self._finish(key, call)
+        finally:
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "inFlight": len(self._calls),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "errors": self.errors
+            }
+
+
+class AsyncSingleFlight(SingleFlight):
+    """``SingleFlight`` for coroutines on one event loop; waiters await instead of blocking a thread.
+
+    If the leader is cancelled (its client went away), the waiters are not:
+    one of them takes over and runs the call again.
+    """
+
+    async def do(self, key, func, *args, deadline=None, **kwargs):
+        while True:
+            call, leader = self._join(key, asyncio.Event)
+            if leader:
+                break
+            try:
+                await asyncio.wait_for(call.done.wait(), deadline.remaining() if deadline is not None else None)
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded("Deadline exceeded waiting for an identical analysis") from None
+            if isinstance(call.error, asyncio.CancelledError):
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = await func(*args, **kwargs)
+        except BaseException as e:
+            self._finish(key, call, e)
+            raise
+        else:
+            self._finish(key, call)
+        finally:
+            call.done.set()
+        return call.result, False
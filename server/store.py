@@ -0,0 +1,106 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class ResultStore:
+    """SQLite-backed result store shared by every gunicorn worker on a host.
+
+    The database runs in WAL mode so readers in one worker never block a writer
+    in another, and rows survive restarts so a fresh deploy starts warm. Keys are
+    the ``kind:digest`` strings produced by ``cache.digest``, which include
+    ``cache.RESULT_VERSION``, so a deploy that changes the result shape never
+    reads rows written in the old one.
+    """
+
+    # Expired rows are purged every this many writes
+    PURGE_INTERVAL = 1000
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY,"
+                " kind TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_expires_at ON results (expires_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS results_kind ON results (kind)")
+
+    def _connect(self):
+        # One connection per thread and per process: connections must not cross a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        """Return ``(value, remaining_ttl)`` for a live entry, or None."""
+        now = time.time()
+        row = self._connect().execute(
+            "SELECT value, expires_at FROM results WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        return (json.loads(row[0]), row[1] - now) if row else None
+
+    def put(self, key, value, ttl):
+        now = time.time()
+        self._connect().execute(
+            "INSERT OR REPLACE INTO results (key, kind, value, created_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+            (key, key.split(':', 1)[0], json.dumps(value, separators=(',', ':')), now, now + ttl)
+        )
+        with self._lock:
+            self._writes += 1
+            purge = self._writes % self.PURGE_INTERVAL == 0
+        if purge:
+            self.purge_expired()
+
+    def purge_expired(self):
+        return self._connect().execute("DELETE FROM results WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def expire(self, kind=None, older_than=None):
+        """Bulk-delete results, optionally only of one ``kind`` or created more than ``older_than`` seconds ago."""
+        clauses, params = [], []
+        if kind is not None:
+            clauses.append("kind = ?")
+            params.append(kind)
+        if older_than is not None:
+            clauses.append("created_at <= ?")
+            params.append(time.time() - older_than)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._connect().execute(f"DELETE FROM results{where}", params).rowcount
+
+    def stats(self):
+        rows = self._connect().execute("SELECT kind, COUNT(*) FROM results GROUP BY kind").fetchall()
+        return {"path": self.path, "entries": dict(rows)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or expire the shared result store")
+    parser.add_argument('path', nargs='?', default=os.environ.get('RESULT_STORE_PATH'))
+    parser.add_argument('--purge-expired', action='store_true', help="delete rows past their TTL")
+    parser.add_argument('--expire-kind', help="delete every result of this kind (text, hashtag, ...)")
+    parser.add_argument('--older-than', type=float, help="only delete results created more than this many seconds ago")
+    args = parser.parse_args()
+
+    if not args.path:
+        parser.error("a store path or RESULT_STORE_PATH is required")
+
+    store = ResultStore(args.path)
+    if args.purge_expired:
+        print(f"Purged {store.purge_expired()} expired results")
+    if args.expire_kind or args.older_than is not None:
+        print(f"Expired {store.expire(kind=args.expire_kind, older_than=args.older_than)} results")
+    print(json.dumps(store.stats()))
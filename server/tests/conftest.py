@@ -0,0 +1,85 @@
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from nltkdata import use_local_nltk_data  # noqa: E402
+
+use_local_nltk_data()
+
+
+def require_nltk(*resources):
+    """Skip the calling test unless these NLTK resources (e.g. 'sentiment/vader_lexicon.zip') are installed."""
+    import nltk
+    for resource in resources:
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            pytest.skip(f"NLTK data {resource} is not installed")
+
+
+@pytest.fixture(scope='session')
+def server(tmp_path_factory):
+    """The Flask server module, imported once with inline scoring and a job store of its own."""
+    require_nltk('sentiment/vader_lexicon.zip', 'corpora/stopwords')
+    os.environ.setdefault('SCORE_WORKERS', '0')
+    os.environ.setdefault('JOB_STORE_PATH', str(tmp_path_factory.mktemp('jobs') / 'jobs.sqlite3'))
+    import main
+    return main
+
+
+class PageServer:
+    """Local HTTP stand-in for the sites /analyze/url fetches.
+
+    ``pages`` maps a path to ``(body, headers)``. A request whose
+    If-None-Match matches the page's ETag, or whose If-Modified-Since matches
+    its Last-Modified, gets a 304. Every request's headers are kept in ``requests``.
+    """
+
+    def __init__(self):
+        self.pages = {}
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append((self.path, dict(self.headers)))
+                body, headers = server.pages[self.path]
+                etag, last_modified = headers.get('ETag'), headers.get('Last-Modified')
+                if (etag and self.headers.get('If-None-Match') == etag) or \
+                        (last_modified and self.headers.get('If-Modified-Since') == last_modified):
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                if 'Content-Type' not in headers:
+                    self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def url(self, path):
+        return self.base_url + path
+
+
+@pytest.fixture
+def page_server():
+    server = PageServer()
+    thread = threading.Thread(target=server.httpd.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
@@ -0,0 +1,83 @@
+import time
+
+import pytest
+
+from admission import AdmissionController, queue_latency
+
+
+def test_in_flight_limit_rejects_until_a_request_is_released():
+    admission = AdmissionController(max_in_flight=2)
+    assert admission.admit() is None
+    assert admission.admit() is None
+    assert admission.admit() == 'in_flight'
+
+    admission.release()
+    assert admission.admit() is None
+    assert admission.stats()['admitted'] == 3
+    assert admission.stats()['rejected'] == {"in_flight": 1, "queue_latency": 0}
+
+
+def test_queue_latency_limit_and_smoothing():
+    admission = AdmissionController(max_queue_seconds=1.0, smoothing=0.5)
+    assert admission.admit(0.2) is None
+    assert admission.admit(3.0) == 'queue_latency'
+    assert admission.admit(3.0) == 'queue_latency'
+
+    # The smoothed latency (1.24 s) still rejects a request that waited briefly...
+    assert admission.admit(0.2) == 'queue_latency'
+    assert admission.retry_after() == 2
+    # ...until short waits bring it back under the limit
+    assert admission.admit(0.2) is None
+    assert admission.queue_seconds == pytest.approx(0.71875)
+
+
+def test_limits_of_zero_are_off():
+    admission = AdmissionController(max_in_flight=0, max_queue_seconds=0)
+    assert all(admission.admit(60.0) is None for _ in range(100))
+
+
+@pytest.mark.parametrize('header, waited', [
+    (None, None),
+    ('', None),
+    ('garbage', None),
+    ('t=1700000000.0', 2.5),  # nginx: seconds
+    ('1700000000000', 2.5),  # Heroku: milliseconds
+    ('1700000005.0', None),  # in the future: clock skew
+    ('t=1699990000', None),  # over an hour
+])
+def test_queue_latency(header, waited):
+    result = queue_latency(header, now=1700000002.5)
+    assert result == (pytest.approx(waited) if waited is not None else None)
+
+
+@pytest.fixture
+def full_admission(server, monkeypatch):
+    # An admission controller with its one in-flight slot taken
+    admission = AdmissionController(max_in_flight=1, retry_after=3)
+    monkeypatch.setattr(server, 'admission', admission)
+    assert admission.admit() is None
+    return admission
+
+
+def test_overloaded_server_sheds_analysis_with_503(server, full_admission):
+    client = server.app.test_client()
+    response = client.post('/analyze/text', json={"text": "What a lovely day."})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '3'
+    assert response.json == {"error": "Server is overloaded, retry later"}
+
+    # Stats and metrics still answer
+    assert client.get('/metrics').status_code == 200
+
+    full_admission.release()
+    assert client.post('/analyze/text', json={"text": "What a lovely day."}).status_code == 200
+    assert full_admission.in_flight == 0
+
+
+def test_request_queued_too_long_is_shed(server, monkeypatch):
+    monkeypatch.setattr(server, 'admission', AdmissionController(max_queue_seconds=1.0))
+    client = server.app.test_client()
+    response = client.post('/analyze/text', json={"text": "What a lovely day."},
+                           headers={'X-Request-Start': f"t={time.time() - 5}"})
+    assert response.status_code == 503
+    assert server.admission.stats()['rejected']['queue_latency'] == 1
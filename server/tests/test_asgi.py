@@ -0,0 +1,67 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+import fetch
+from fetch import PageFetcher
+
+PAGE = "<html><body><p>Café crème, très bon.</p><p>Naïve but great.</p></body></html>"
+
+
+@pytest.fixture
+def fetch_async(server):
+    from asgi import AsyncPageFetcher
+
+    def run(fetcher, url):
+        async def go():
+            async_fetcher = AsyncPageFetcher(fetcher, executor)
+            try:
+                return await async_fetcher.fetch_text(url)
+            finally:
+                await async_fetcher.close()
+        return asyncio.run(go())
+
+    with ThreadPoolExecutor(2) as executor:
+        yield run
+
+
+@pytest.mark.parametrize('extract_mode', fetch.EXTRACT_MODES)
+@pytest.mark.parametrize('content_type, body', [
+    ('text/html; charset=utf-8', PAGE.encode('utf-8')),
+    ('text/html; charset=windows-1252', PAGE.encode('cp1252')),
+    # No charset: both decode as ISO-8859-1, the HTTP default for text
+    ('text/html', PAGE.encode('utf-8')),
+    ('text/html', PAGE.encode('latin-1')),
+    ('application/octet-stream', PAGE.encode('utf-8')),
+])
+def test_async_fetch_gives_the_same_text(page_server, fetch_async, extract_mode, content_type, body):
+    page_server.pages['/page'] = (body, {'Content-Type': content_type})
+    sync_page = PageFetcher(extract_mode=extract_mode).fetch_text(page_server.url('/page'))
+    async_page = fetch_async(PageFetcher(extract_mode=extract_mode), page_server.url('/page'))
+    assert async_page.text == sync_page.text
+    assert (async_page.bytes_read, async_page.truncated) == (sync_page.bytes_read, sync_page.truncated)
+
+
+def test_async_stream_stops_reading_at_max_chars(page_server, fetch_async, monkeypatch):
+    body = b"<html><body>" + b"<p>A long and lovely paragraph.</p>" * 20000 + b"</body></html>"
+    page_server.pages['/long'] = (body, {})
+    fetcher = PageFetcher(extract_mode='stream', max_bytes=len(body), max_chars=200)
+
+    # Counts the body chunks actually taken off the connection
+    downloaded = []
+    aiter_bytes = httpx.Response.aiter_bytes
+
+    async def counted(self, *args, **kwargs):
+        async for chunk in aiter_bytes(self, *args, **kwargs):
+            downloaded.append(len(chunk))
+            yield chunk
+    monkeypatch.setattr(httpx.Response, 'aiter_bytes', counted)
+
+    page = fetch_async(fetcher, page_server.url('/long'))
+    assert page.truncated
+    assert len(page.text) == 200
+    assert page.bytes_read < 64 * 1024
+    assert sum(downloaded) < 64 * 1024
+    assert page == fetcher.fetch_text(page_server.url('/long'))._replace(parse_seconds=page.parse_seconds)
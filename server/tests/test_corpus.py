@@ -0,0 +1,63 @@
+import json
+import time
+from datetime import datetime
+
+import pytest
+
+import corpus
+from conftest import require_nltk
+from corpus import BUCKET_SECONDS, PostCorpus
+
+
+@pytest.fixture
+def feed(tmp_path):
+    require_nltk('sentiment/vader_lexicon.zip', 'corpora/stopwords')
+    path = tmp_path / 'posts.jsonl'
+    path.write_text('')
+
+    def append(*posts, partial=''):
+        with open(path, 'a') as f:
+            for post in posts:
+                f.write(json.dumps(post) + '\n')
+            f.write(partial)
+    append.path = str(path)
+    return append
+
+
+def test_appended_posts_are_folded_into_the_hour(feed):
+    now = time.time()
+    feed({"text": "A great day #alpha", "timestamp": now}, partial='{"text": "Awful #alpha", ')
+    posts = PostCorpus(feed.path, retention_hours=24)
+    assert posts.refresh() == 1
+
+    # The partial line is picked up once it is complete
+    with open(feed.path, 'a') as f:
+        f.write('"timestamp": %f}\n' % now)
+    feed({"text": "Another great day", "hashtags": ["#Alpha"], "timestamp": now})
+    assert posts.refresh() == 2
+    assert posts.refresh() == 0
+
+    hour = int(now) // BUCKET_SECONDS
+    count, total, total_squares = posts.aggregates['alpha'][hour]
+    assert count == 3
+    _, counts, sums, _ = posts.timeline('alpha', datetime.fromtimestamp(hour * BUCKET_SECONDS), hours=3)
+    assert counts.tolist() == [0, 0, 3]
+    assert sums[-1] == pytest.approx(total)
+
+
+def test_old_hours_roll_out_of_the_aggregates(feed, monkeypatch):
+    now = time.time()
+    feed({"text": "Great #alpha", "timestamp": now - 3 * 3600},
+         {"text": "Great #beta", "timestamp": now},
+         {"text": "Ancient news #gamma", "timestamp": now - 48 * 3600})
+    posts = PostCorpus(feed.path, retention_hours=5)
+    assert posts.refresh() == 2
+    assert posts.stats()['expired'] == 1
+    assert 'gamma' not in posts
+
+    # Three hours later the #alpha post is too old to be in any timeline
+    monkeypatch.setattr(corpus.time, 'time', lambda: now + 3 * 3600)
+    posts.refresh()
+    assert 'alpha' not in posts
+    assert 'beta' in posts
+    assert posts.stats()['hashtags'] == 1
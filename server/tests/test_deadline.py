@@ -0,0 +1,71 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from analysis import analyze_long_text
+from deadline import Deadline, DeadlineExceeded, map_within
+
+
+def slow_double(batch):
+    time.sleep(0.05)
+    return [item * 2 for item in batch]
+
+
+def test_map_within_keeps_a_prefix_without_an_executor():
+    results = map_within(slow_double, list(range(10)), Deadline.after(0.12), size=2)
+    done = [result for result in results if result is not None]
+    assert 2 <= len(done) <= 6
+    assert results[:len(done)] == [item * 2 for item in range(len(done))]
+    assert results[len(done):] == [None] * (10 - len(done))
+
+
+def test_map_within_keeps_whatever_finished_with_an_executor():
+    def uneven(batch):
+        # The first slice takes far longer than the budget
+        time.sleep(2 if batch[0] == 0 else 0.01)
+        return [item * 2 for item in batch]
+
+    with ThreadPoolExecutor(4) as executor:
+        results = map_within(uneven, list(range(8)), Deadline.after(0.3), size=2, executor=executor)
+    assert results == [None, None, 4, 6, 8, 10, 12, 14]
+
+
+def test_map_within_runs_everything_in_time():
+    assert map_within(slow_double, [1, 2, 3], Deadline.after(5), size=2) == [2, 4, 6]
+
+
+def test_deadline_share_and_timeout():
+    deadline = Deadline.after(10)
+    assert deadline.share(0.5).remaining() == pytest.approx(5, abs=0.1)
+    assert deadline.timeout(2) == 2
+    assert Deadline.after(-1).timeout(2) == 0
+    with pytest.raises(DeadlineExceeded, match="before scoring"):
+        Deadline.after(-1).check('scoring')
+
+
+def test_long_text_past_its_deadline_scores_nothing(server):
+    with pytest.raises(DeadlineExceeded):
+        analyze_long_text("A fine sentence. " * 200, chunk_chars=100, deadline=Deadline.after(-1))
+
+
+def test_request_deadline_takes_the_shorter_budget(server, monkeypatch):
+    monkeypatch.setattr(server, 'REQUEST_DEADLINE', 30)
+    now = time.monotonic()
+    assert server.request_deadline(now, None, '500').remaining() == pytest.approx(0.5, abs=0.1)
+    assert server.request_deadline(now, None, '60000').remaining() == pytest.approx(30, abs=0.1)
+    # Time spent queueing in front of the process counts
+    assert server.request_deadline(now, 10.0, None).remaining() == pytest.approx(20, abs=0.1)
+    assert server.request_deadline(now, None, 'soon').remaining() == pytest.approx(30, abs=0.1)
+
+    monkeypatch.setattr(server, 'REQUEST_DEADLINE', 0)
+    assert server.request_deadline(now, None, None) is None
+
+
+def test_request_out_of_time_gets_504(server, monkeypatch):
+    monkeypatch.setattr(server, 'REQUEST_DEADLINE', 2)
+    client = server.app.test_client()
+    response = client.post('/analyze/text', json={"text": "A short and happy note."},
+                           headers={'X-Request-Start': f"t={time.time() - 3}"})
+    assert response.status_code == 504
+    assert 'Deadline exceeded' in response.json['error']
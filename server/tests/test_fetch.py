@@ -0,0 +1,84 @@
+import pytest
+
+import fetch
+from fetch import PageFetcher
+
+PAGE = b"<html><body><nav>Menu</nav><p>The food was great.</p><p>Friendly staff.</p></body></html>"
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    # Counts HTML parses in either extract mode
+    calls = []
+    for name in ('extract_paragraph_text', 'stream_paragraph_text'):
+        original = getattr(fetch, name)
+
+        def counted(*args, _original=original, **kwargs):
+            calls.append(1)
+            return _original(*args, **kwargs)
+        monkeypatch.setattr(fetch, name, counted)
+    return calls
+
+
+@pytest.mark.parametrize('extract_mode', fetch.EXTRACT_MODES)
+def test_etag_revalidation_skips_download_and_parse(page_server, parses, extract_mode):
+    page_server.pages['/a'] = (PAGE, {'ETag': '"v1"'})
+    fetcher = PageFetcher(extract_mode=extract_mode, max_bytes=1024 * 1024, max_chars=100000)
+
+    first = fetcher.fetch_text(page_server.url('/a'))
+    assert first.status == 'MISS'
+    assert first.text == "The food was great. Friendly staff."
+    assert len(parses) == 1
+
+    second = fetcher.fetch_text(page_server.url('/a'))
+    assert second == fetch.PageText(first.text, 'REVALIDATED', 0, 0.0, False)
+    assert len(parses) == 1
+    assert page_server.requests[1][1].get('If-None-Match') == '"v1"'
+
+
+def test_last_modified_is_sent_as_if_modified_since(page_server):
+    last_modified = 'Wed, 21 Oct 2015 07:28:00 GMT'
+    page_server.pages['/b'] = (PAGE, {'Last-Modified': last_modified})
+    fetcher = PageFetcher()
+
+    fetcher.fetch_text(page_server.url('/b'))
+    assert fetcher.fetch_text(page_server.url('/b')).status == 'REVALIDATED'
+    headers = page_server.requests[1][1]
+    assert headers.get('If-Modified-Since') == last_modified
+    assert 'If-None-Match' not in headers
+
+
+def test_changed_page_is_downloaded_again(page_server):
+    page_server.pages['/c'] = (PAGE, {'ETag': '"v1"'})
+    fetcher = PageFetcher()
+    fetcher.fetch_text(page_server.url('/c'))
+
+    page_server.pages['/c'] = (b"<p>Now it is terrible.</p>", {'ETag': '"v2"'})
+    page = fetcher.fetch_text(page_server.url('/c'))
+    assert page.status == 'MISS'
+    assert page.text == "Now it is terrible."
+
+
+def test_pages_without_validators_are_not_cached(page_server):
+    page_server.pages['/d'] = (PAGE, {})
+    fetcher = PageFetcher()
+    fetcher.fetch_text(page_server.url('/d'))
+
+    assert fetcher.fetch_text(page_server.url('/d')).status == 'MISS'
+    assert 'If-None-Match' not in page_server.requests[1][1]
+
+
+def test_truncated_extract_is_not_cached(page_server, parses):
+    body = b"<html><body>" + b"<p>A long and lovely paragraph.</p>" * 200 + b"</body></html>"
+    page_server.pages['/e'] = (body, {'ETag': '"v1"'})
+    fetcher = PageFetcher(extract_mode='stream', max_bytes=1024, max_chars=100000)
+
+    first = fetcher.fetch_text(page_server.url('/e'))
+    assert first.truncated
+    assert first.bytes_read <= 1024
+
+    # Nothing was remembered, so the next fetch is unconditional and parses again
+    second = fetcher.fetch_text(page_server.url('/e'))
+    assert second.status == 'MISS'
+    assert 'If-None-Match' not in page_server.requests[1][1]
+    assert len(parses) == 2
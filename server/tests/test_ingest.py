@@ -0,0 +1,110 @@
+import io
+import json
+import random
+import statistics
+from collections import Counter
+
+import pytest
+
+from ingest import LineSplitter, RunningStats, SpaceSaving, iter_lines
+
+
+def test_space_saving_is_exact_until_it_overflows():
+    words = SpaceSaving(capacity=10)
+    counts = Counter("the cat sat on the mat the end".split())
+    for word in "the cat sat on the mat the end".split():
+        words.add(word)
+    assert words.counts == dict(counts)
+    assert words.evictions == 0
+    assert words.top(1) == [{"word": "the", "count": 3}]
+
+
+def test_space_saving_keeps_frequent_words_within_its_error_bound():
+    rng = random.Random(7)
+    stream = ['common'] * 400 + ['often'] * 200 + [f"rare{rng.randrange(500)}" for _ in range(1400)]
+    rng.shuffle(stream)
+    words = SpaceSaving(capacity=20)
+    for word in stream:
+        words.add(word)
+
+    assert len(words.counts) == 20
+    assert words.evictions > 0
+    # Words seen more than N / capacity times are guaranteed a slot, with counts over by at most N / capacity
+    assert [entry["word"] for entry in words.top(2)] == ['common', 'often']
+    for word, true_count in (('common', 400), ('often', 200)):
+        assert true_count <= words.counts[word] <= true_count + len(stream) / 20
+
+
+def test_space_saving_update_adds_amounts():
+    words = SpaceSaving(capacity=2)
+    words.update({"a": 5, "b": 2})
+    words.update({"c": 1})
+    # "c" replaced "b" and inherited its count
+    assert words.counts == {"a": 5, "c": 3}
+
+
+def test_running_stats_match_statistics():
+    values = [0.5, -0.25, 0.75, 0.0, 1.0]
+    stats = RunningStats()
+    for value in values:
+        stats.add(value)
+    assert stats.mean == pytest.approx(statistics.mean(values))
+    assert stats.variance == pytest.approx(statistics.pvariance(values))
+    assert (stats.min, stats.max) == (-0.25, 1.0)
+    assert RunningStats().variance == 0.0
+
+
+def test_line_splitter_handles_lines_split_across_chunks():
+    splitter = LineSplitter(max_line_bytes=16)
+    assert splitter.feed(b'{"text": "a"}\n{"te') == [(1, b'{"text": "a"}')]
+    assert splitter.feed(b'xt": "b"}') == []
+    assert splitter.feed(b'\n\n') == [(2, b'{"text": "b"}'), (3, b'')]
+    assert splitter.feed(b'last') == []
+    assert splitter.close() == [(4, b'last')]
+    assert splitter.close() == []
+
+
+def test_line_splitter_drops_oversized_lines_without_buffering_them():
+    splitter = LineSplitter(max_line_bytes=8)
+    assert splitter.feed(b'0123456789') == []
+    assert splitter._partial == b''
+    assert splitter.feed(b'abcdef\nok\n') == [(1, None), (2, b'ok')]
+    assert splitter.feed(b'x' * 20) == []
+    assert splitter.close() == [(3, None)]
+
+
+def test_iter_lines_skips_oversized_lines():
+    body = b'short\n' + b'x' * 50 + b'\nafter\nno newline'
+    assert list(iter_lines(io.BytesIO(body), 16)) == [
+        (1, b'short\n'), (2, None), (3, b'after\n'), (4, b'no newline')
+    ]
+
+
+def test_stream_route_reports_per_line_results_and_summary(server, monkeypatch):
+    monkeypatch.setattr(server, 'STREAM_MAX_LINE_BYTES', 200)
+    lines = [
+        json.dumps({"id": "a", "text": "What a wonderful, happy day!"}),
+        json.dumps("This is terrible and awful."),
+        "not json",
+        "",
+        json.dumps({"text": "x" * 300}),
+        json.dumps({"id": "b"}),
+    ]
+    response = server.app.test_client().post('/analyze/stream?summaryEvery=2', data='\n'.join(lines) + '\n',
+                                             content_type='application/x-ndjson')
+    assert response.status_code == 200
+    out = [json.loads(line) for line in response.data.decode().splitlines()]
+
+    results = [item for item in out if 'line' in item]
+    assert [(item['line'], item.get('id'), item.get('error')) for item in results] == [
+        (1, 'a', None), (2, None, None), (3, None, "Invalid JSON"), (5, None, "Line too long"), (6, None, "Text is required")
+    ]
+    assert results[0]['sentiment'] == 'positive'
+    assert results[1]['sentiment'] == 'negative'
+    assert [item['final'] for item in out if 'summary' in item] == [False, False, False, True]
+
+    summary = out[-1]['summary']
+    assert summary['count'] == 5
+    assert summary['analyzed'] == 2
+    assert summary['errors'] == 3
+    assert summary['sentimentCounts'] == {"positive": 1, "negative": 1, "neutral": 0}
@@ -0,0 +1,134 @@
+import threading
+import time
+
+import pytest
+
+from jobs import JobFailed, JobQueue, MemoryJobBackend, QueueFull, SqliteJobBackend
+
+
+def handlers():
+    def fail(payload):
+        raise JobFailed("No text content found in the URL")
+
+    def crash(payload):
+        raise KeyError('text')
+    return {'echo': lambda payload: {"echo": payload}, 'fail': fail, 'crash': crash}
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, tmp_path):
+    return MemoryJobBackend() if request.param == 'memory' else SqliteJobBackend(str(tmp_path / 'jobs.sqlite3'))
+
+
+def run_next(jobs):
+    # What a worker thread does with the oldest queued job
+    job = jobs.backend.claim(timeout=0)
+    assert job is not None
+    jobs.run(job)
+
+
+def test_full_queue_rejects_submits(backend):
+    jobs = JobQueue(backend, handlers(), workers=0, max_queued=2)
+    jobs.submit('echo', {"n": 1})
+    jobs.submit('echo', {"n": 2})
+    with pytest.raises(QueueFull):
+        jobs.submit('echo', {"n": 3})
+    assert jobs.depth() == 2
+
+    # A claimed job no longer counts against the limit
+    backend.claim(timeout=0)
+    jobs.submit('echo', {"n": 3})
+
+    with pytest.raises(ValueError):
+        jobs.submit('unknown', {})
+
+
+def test_job_results_and_failures(backend):
+    finished = []
+    jobs = JobQueue(backend, handlers(), workers=0, on_finish=lambda kind, status, seconds: finished.append((kind, status)))
+    ids = [jobs.submit(kind, {"n": 1}) for kind in ('echo', 'fail', 'crash')]
+    assert jobs.get(ids[0])['status'] == 'queued'
+    for _ in ids:
+        run_next(jobs)
+
+    done, failed, crashed = [jobs.get(job_id) for job_id in ids]
+    assert done['status'] == 'done' and done['result'] == {"echo": {"n": 1}}
+    assert failed['status'] == 'failed' and failed['error'] == "No text content found in the URL"
+    assert crashed['status'] == 'failed' and crashed['error'] == "Error running job: 'text'"
+    assert 'result' not in failed
+    assert finished == [('echo', 'done'), ('fail', 'failed'), ('crash', 'failed')]
+    assert jobs.stats()['jobs'] == {'queued': 0, 'running': 0, 'done': 1, 'failed': 2}
+
+
+def test_finished_jobs_expire_after_their_ttl(backend):
+    jobs = JobQueue(backend, handlers(), workers=0, result_ttl=0.2)
+    job_id = jobs.submit('echo', {})
+    run_next(jobs)
+    assert jobs.get(job_id)['status'] == 'done'
+
+    time.sleep(0.3)
+    assert jobs.get(job_id) is None
+    assert backend.purge(time.time()) == 1
+    assert backend.get(job_id) is None
+
+
+def test_worker_threads_run_submitted_jobs(backend):
+    jobs = JobQueue(backend, handlers(), workers=2)
+    job_id = jobs.submit('echo', {"n": 7})
+    for _ in range(100):
+        if jobs.get(job_id)['status'] == 'done':
+            break
+        time.sleep(0.05)
+    assert jobs.get(job_id)['result'] == {"echo": {"n": 7}}
+
+
+def test_sqlite_jobs_are_claimed_once_across_processes(tmp_path):
+    # Each backend has its own connections, as each gunicorn worker would
+    path = str(tmp_path / 'jobs.sqlite3')
+    submitted = JobQueue(SqliteJobBackend(path), handlers(), workers=0, max_queued=100)
+    ids = {submitted.submit('echo', {"n": n}) for n in range(40)}
+
+    claimed, lock = [], threading.Lock()
+
+    def drain(backend):
+        while (job := backend.claim(timeout=0)) is not None:
+            with lock:
+                claimed.append(job['id'])
+
+    threads = [threading.Thread(target=drain, args=(SqliteJobBackend(path),)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(claimed) == sorted(ids)
+
+
+def test_sqlite_job_left_running_by_a_dead_worker_fails(tmp_path):
+    backend = SqliteJobBackend(str(tmp_path / 'jobs.sqlite3'))
+    jobs = JobQueue(backend, handlers(), workers=0)
+    job_id = jobs.submit('echo', {})
+    backend.claim(timeout=0)
+
+    backend.purge(stale_before=time.time() + 1)
+    job = jobs.get(job_id)
+    assert job['status'] == 'failed'
+    assert job['error'] == 'The worker running this job stopped before it finished'
+
+
+def test_job_routes(server, monkeypatch):
+    jobs = JobQueue(MemoryJobBackend(), dict(handlers(), text=server.text_job), workers=0, max_queued=1)
+    monkeypatch.setattr(server, 'job_queue', jobs)
+    client = server.app.test_client()
+
+    response = client.post('/jobs', json={"type": "text", "text": "A kind word."})
+    assert response.status_code == 202
+    assert response.headers['Location'] == f"/jobs/{response.json['id']}"
+    assert client.get(response.headers['Location']).json['status'] == 'queued'
+
+    response = client.post('/jobs', json={"type": "text", "text": "Another kind word."})
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == str(server.JOB_RETRY_AFTER)
+
+    assert client.post('/jobs', json={"type": "poem"}).status_code == 400
+    assert client.post('/jobs', json={"type": "text", "text": " "}).json == {"error": "Text is required"}
+    assert client.get('/jobs/missing').status_code == 404
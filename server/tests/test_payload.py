@@ -0,0 +1,110 @@
+import copy
+import gzip
+import json
+
+import pytest
+
+import payload
+from payload import FieldSelection, accepted_encoding, compress_body, dumps
+
+RESULT = {
+    "id": "doc-1",
+    "sentiment": "positive",
+    "score": 0.6,
+    "wordFrequency": [{"word": "great", "count": 2}],
+    "details": {"vader_scores": {"compound": 0.7, "pos": 0.5}, "tier": "full"},
+    "timeline": [{"time": "10:00", "sentiment": 0.1, "volume": 3}, {"time": "11:00", "sentiment": 0.2, "volume": 4}],
+}
+
+
+def test_fields_select_top_level_nested_and_list_paths():
+    fields = FieldSelection.parse("score, details.vader_scores.compound,timeline.sentiment", None)
+    assert fields.apply(RESULT) == {
+        "id": "doc-1",
+        "score": 0.6,
+        "details": {"vader_scores": {"compound": 0.7}},
+        "timeline": [{"sentiment": 0.1}, {"sentiment": 0.2}],
+    }
+
+
+def test_compact_drops_details_unless_asked_for():
+    assert 'details' not in FieldSelection.parse(None, True).apply(RESULT)
+    assert FieldSelection.parse(None, True).apply(RESULT)['timeline'] == RESULT['timeline']
+    assert FieldSelection.parse(['details.tier', 'score'], True).apply(RESULT) == {
+        "id": "doc-1", "score": 0.6, "details": {"tier": "full"}
+    }
+
+
+def test_apply_never_modifies_the_cached_result():
+    original = copy.deepcopy(RESULT)
+    FieldSelection.parse("details.tier,timeline.volume", True).apply(RESULT)
+    assert RESULT == original
+
+    everything = FieldSelection.parse(None, None)
+    assert everything.everything()
+    assert everything.apply(RESULT) is RESULT
+
+
+def test_unknown_fields_are_ignored_and_errors_kept():
+    fields = FieldSelection.parse("nothing,score.deeper", None)
+    assert fields.apply({"score": 0.6, "error": "Deadline exceeded"}) == {"score": 0.6, "error": "Deadline exceeded"}
+
+
+@pytest.mark.parametrize('fields, compact', [
+    (42, None),
+    (['score', 3], None),
+    ("score,,details..tier", None),
+    ("score", "yes"),
+])
+def test_malformed_selections_are_rejected(fields, compact):
+    with pytest.raises(ValueError):
+        FieldSelection.parse(fields, compact)
+
+
+def test_dumps_matches_the_json_module():
+    obj = {"b": [1, 2.5, None, True], "a": "café ✓", "c": {"z": 1, "y": 2}}
+    assert json.loads(dumps(obj)) == obj
+    assert dumps(obj) == json.dumps(obj, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode()
+    assert dumps({"big": 2 ** 70}) == b'{"big":1180591620717411303424}'
+
+
+@pytest.mark.parametrize('header, encoding', [
+    (None, None),
+    ('identity', None),
+    ('gzip', 'gzip'),
+    ('gzip;q=0, deflate', None),
+    ('*', 'br' if payload.brotli is not None else 'gzip'),
+    ('br;q=0.5, gzip', 'gzip'),
+    ('br, gzip', 'br' if payload.brotli is not None else 'gzip'),
+    ('GZIP;q=bad', None),
+])
+def test_accepted_encoding(header, encoding):
+    assert accepted_encoding(header) == encoding
+
+
+def test_compress_body_only_when_worth_it():
+    body = dumps([RESULT] * 50)
+    compressed, encoding = compress_body(body, 'gzip', min_bytes=1024)
+    assert encoding == 'gzip'
+    assert gzip.decompress(compressed) == body
+
+    assert compress_body(b'{"score":0.6}', 'gzip', min_bytes=1024) == (b'{"score":0.6}', None)
+    assert compress_body(body, 'gzip', min_bytes=0) == (body, None)
+    assert compress_body(body, None, min_bytes=1024) == (body, None)
+
+
+def test_text_route_applies_fields_and_compresses(server):
+    client = server.app.test_client()
+    body = {"text": "The staff were friendly and the food was great.", "fields": "sentiment,score", "compact": True}
+    response = client.post('/analyze/text', json=body)
+    assert set(response.json) == {"sentiment", "score"}
+
+    response = client.post('/analyze/text', json={"text": "Great food.", "fields": 7})
+    assert response.status_code == 400
+    assert response.json == {"error": server.FIELDS_ERROR}
+
+    documents = [{"id": n, "text": "The staff were friendly and the food was great."} for n in range(40)]
+    response = client.post('/analyze/text/batch', json={"documents": documents}, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert len(json.loads(gzip.decompress(response.data))['results']) == 40
@@ -0,0 +1,136 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from deadline import Deadline, DeadlineExceeded
+from singleflight import AsyncSingleFlight, SingleFlight, normalize_url
+
+
+def wait_for_joiners(flight, count):
+    while flight.stats()['coalesced'] < count:
+        time.sleep(0.005)
+
+
+def start_leader(flight, key, release, outcome):
+    # Runs a call for `key` that finishes with `outcome` (a value or an exception) once `release` is set
+    calls = []
+
+    def work():
+        calls.append(1)
+        release.wait(5)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    started = threading.Event()
+
+    def lead():
+        started.set()
+        return flight.do(key, work)
+    pool = ThreadPoolExecutor(8)
+    leader = pool.submit(lead)
+    started.wait()
+    while not flight.in_flight():
+        time.sleep(0.005)
+    return pool, leader, calls
+
+
+def test_concurrent_callers_share_one_run():
+    flight, release = SingleFlight(), threading.Event()
+    pool, leader, calls = start_leader(flight, 'k', release, {"score": 0.5})
+    joiners = [pool.submit(flight.do, 'k', lambda: pytest.fail("joiners must not run")) for _ in range(4)]
+    wait_for_joiners(flight, 4)
+    release.set()
+
+    assert leader.result() == ({"score": 0.5}, False)
+    assert [joiner.result() for joiner in joiners] == [({"score": 0.5}, True)] * 4
+    assert len(calls) == 1
+    assert flight.stats() == {"inFlight": 0, "leaders": 1, "coalesced": 4, "errors": 0}
+
+
+def test_leader_error_is_raised_in_every_caller():
+    flight, release = SingleFlight(), threading.Event()
+    pool, leader, _ = start_leader(flight, 'k', release, ValueError("bad page"))
+    joiners = [pool.submit(flight.do, 'k', lambda: None) for _ in range(3)]
+    wait_for_joiners(flight, 3)
+    release.set()
+
+    for future in [leader] + joiners:
+        with pytest.raises(ValueError, match="bad page"):
+            future.result()
+    assert flight.stats()['errors'] == 1
+
+    # Failures are not remembered: the next call runs again
+    assert flight.do('k', lambda: 'fresh') == ('fresh', False)
+
+
+def test_joiner_gives_up_at_its_own_deadline():
+    flight, release = SingleFlight(), threading.Event()
+    pool, leader, _ = start_leader(flight, 'k', release, 'slow result')
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        flight.do('k', lambda: None, deadline=Deadline.after(0.1))
+    assert time.monotonic() - start < 1
+
+    # The leader's run is not cut short for the joiner
+    release.set()
+    assert leader.result() == ('slow result', False)
+
+
+def test_different_keys_do_not_wait_for_each_other():
+    flight, release = SingleFlight(), threading.Event()
+    pool, leader, _ = start_leader(flight, 'a', release, 'a')
+    assert flight.do('b', lambda: 'b') == ('b', False)
+    release.set()
+    assert leader.result() == ('a', False)
+
+
+def test_waiter_takes_over_when_async_leader_is_cancelled():
+    async def scenario():
+        flight = AsyncSingleFlight()
+        runs = []
+
+        async def work():
+            runs.append(1)
+            await asyncio.sleep(0.05 if len(runs) > 1 else 5)
+            return 'done'
+
+        leader = asyncio.create_task(flight.do('k', work))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(flight.do('k', work))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await waiter, len(runs)
+
+    # The waiter ran the call itself, so its result is not a shared one
+    assert asyncio.run(scenario()) == (('done', False), 2)
+
+
+def test_async_joiner_gives_up_at_its_own_deadline():
+    async def scenario():
+        flight = AsyncSingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.3)
+            return 'done'
+
+        leader = asyncio.create_task(flight.do('k', work))
+        await asyncio.sleep(0.01)
+        with pytest.raises(DeadlineExceeded):
+            await flight.do('k', work, deadline=Deadline.after(0.05))
+        return await leader
+
+    assert asyncio.run(scenario()) == ('done', False)
+
+
+@pytest.mark.parametrize('url, key', [
+    ('  HTTP://Example.COM:80/Path?q=A#frag ', 'http://example.com/Path?q=A'),
+    ('https://example.com:443', 'https://example.com/'),
+    ('https://example.com:8443/a', 'https://example.com:8443/a'),
+])
+def test_normalize_url(url, key):
+    assert normalize_url(url) == key
@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+import cache
+from cache import ResultCache, digest
+from store import ResultStore
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / 'results.sqlite3')
+
+
+def test_results_are_shared_between_store_instances(store_path):
+    # Each gunicorn worker opens the same file through its own ResultStore
+    ResultStore(store_path).put('text:abc', {"score": 0.5}, ttl=60)
+    value, remaining = ResultStore(store_path).get('text:abc')
+    assert value == {"score": 0.5}
+    assert 59 < remaining <= 60
+    assert ResultStore(store_path).get('text:other') is None
+
+
+def test_expired_results_are_not_served_and_are_purged(store_path):
+    store = ResultStore(store_path)
+    store.put('text:old', {"score": 0.1}, ttl=0.1)
+    store.put('text:new', {"score": 0.2}, ttl=60)
+    time.sleep(0.2)
+
+    assert store.get('text:old') is None
+    assert store.purge_expired() == 1
+    assert store.stats()['entries'] == {"text": 1}
+
+
+def test_purge_runs_every_purge_interval_writes(store_path, monkeypatch):
+    store = ResultStore(store_path)
+    monkeypatch.setattr(ResultStore, 'PURGE_INTERVAL', 3)
+    store.put('text:a', {}, ttl=-1)
+    store.put('text:b', {}, ttl=-1)
+    assert store.stats()['entries'] == {"text": 2}
+    store.put('text:c', {}, ttl=60)
+    assert store.stats()['entries'] == {"text": 1}
+
+
+def test_expire_by_kind_and_age(store_path):
+    store = ResultStore(store_path)
+    store.put('text:a', {}, ttl=60)
+    store.put('hashtag:b', {}, ttl=60)
+    store.put('url:c', {}, ttl=60)
+
+    assert store.expire(kind='hashtag') == 1
+    assert store.expire(older_than=60) == 0
+    assert store.expire(kind='text', older_than=0) == 1
+    assert store.stats()['entries'] == {"url": 1}
+
+
+def test_result_version_is_part_of_every_key(monkeypatch):
+    key = digest('text', 'great food')
+    assert key.startswith('text:')
+    assert digest('text', 'great food') == key
+    assert digest('hashtag', 'great food') != key
+
+    monkeypatch.setattr(cache, 'RESULT_VERSION', cache.RESULT_VERSION + 1)
+    assert digest('text', 'great food') != key
+
+
+def test_text_route_reads_results_another_worker_stored(server, monkeypatch, store_path):
+    monkeypatch.setattr(server, 'result_store', ResultStore(store_path))
+    monkeypatch.setattr(server, 'result_cache', ResultCache())
+    client = server.app.test_client()
+    body = {"text": "The staff were friendly and the food was great."}
+
+    first = client.post('/analyze/text', json=body)
+    assert first.headers['X-Cache'] == 'MISS'
+
+    # Another worker: its own empty memory cache, the same store
+    monkeypatch.setattr(server, 'result_cache', ResultCache())
+    second = client.post('/analyze/text', json=body)
+    assert second.headers['X-Cache'] == 'STORE'
+    assert second.json == first.json
+    assert client.post('/analyze/text', json=body).headers['X-Cache'] == 'HIT'
@@ -0,0 +1,34 @@
+"""The fused cleaning stage must give exactly what the separate steps it replaced gave.
+
+bench/bench_textproc.py times the same comparison on bigger inputs.
+"""
+from conftest import require_nltk
+
+# Negations, contractions, caps, punctuation, emoticons and emoji
+TRICKY_SENTENCES = [
+    "The food is not good.",
+    "The food isn't really all that great.",
+    "The plot was good, but the characters are uncompelling and the dialog is not great.",
+    "The book was VERY GOOD!!!",
+    "Today SUX!",
+    "Make sure you :) or :D today!",
+    "Catch utf-8 emoji such as 💘 and 💋 and 😁",
+    "Not bad at all",
+    "The least good movie ever.",
+    "I kind of like it, never so happy.",
+    "He is the bomb, yeah right.",
+    "",
+    "?!?!",
+]
+
+
+def test_fused_cleaning_matches_original():
+    require_nltk('corpora/stopwords', 'tokenizers/punkt_tab')
+    from analysis import clean_and_count
+    from bench.bench_textproc import make_text, original_clean_text, original_get_word_frequency
+
+    for text in [make_text(0.05, seed) for seed in range(3)] + TRICKY_SENTENCES + [
+            "<a href='https://example.com/x'>Visit</a> www.example.org gonna wanna cannot",
+            "Café naïve über_cool résumé 2024 <p>split</p>word"]:
+        cleaned = original_clean_text(text)
+        assert clean_and_count(text) == (cleaned, original_get_word_frequency(cleaned))
@@ -0,0 +1,24 @@
+import pytest
+
+
+@pytest.mark.parametrize('options, error', [
+    ({"hours": True}, "hours must be an integer"),
+    ({"hours": 0}, "hours must be an integer"),
+    ({"hours": 24.0}, "hours must be an integer"),
+    ({"bucketMinutes": True}, "bucketMinutes must be a whole number"),
+    ({"bucketMinutes": 7}, "bucketMinutes must be a whole number"),
+])
+def test_hashtag_window_must_be_whole_numbers(server, options, error):
+    response = server.app.test_client().post('/analyze/hashtag', json=dict(hashtag="coffee", **options))
+    assert response.status_code == 400
+    assert response.json['error'].startswith(error)
+
+
+def test_hashtag_timeline_has_the_requested_buckets(server):
+    client = server.app.test_client()
+    body = {"hashtag": "coffee", "hours": 6, "bucketMinutes": 30}
+    first = client.post('/analyze/hashtag', json=body)
+    assert first.status_code == 200
+    assert len(first.json['timeline']) == 12
+    # The simulated timeline is deterministic per hashtag and bucket
+    assert client.post('/analyze/hashtag', json=body).json['timeline'] == first.json['timeline']
@@ -0,0 +1,37 @@
+"""The NumPy VADER scorer must give exactly what NLTK's analyzer gives.
+
+bench/bench_vader.py times the same comparison on bigger inputs.
+"""
+from bench.bench_batch import SAMPLE_SENTENCES, make_documents
+from conftest import require_nltk
+
+# Negation, contrast, boosters, caps, punctuation, idioms and "least" rules of VADER
+TRICKY_SENTENCES = [
+    "The food is not good.",
+    "The food isn't really all that great.",
+    "The plot was good, but the characters are uncompelling and the dialog is not great.",
+    "The book was VERY GOOD!!!",
+    "Today SUX!",
+    "Make sure you :) or :D today!",
+    "Catch utf-8 emoji such as 💘 and 💋 and 😁",
+    "Not bad at all",
+    "The least good movie ever.",
+    "I kind of like it, never so happy.",
+    "He is the bomb, yeah right.",
+    "",
+    "?!?!",
+]
+
+
+def test_numpy_vader_matches_nltk():
+    require_nltk('sentiment/vader_lexicon.zip')
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+    from vader_np import NumpyVader
+
+    texts = TRICKY_SENTENCES + SAMPLE_SENTENCES + [document["text"] for document in make_documents(300)]
+    nltk_vader = SentimentIntensityAnalyzer()
+    numpy_vader = NumpyVader(nltk_vader.lexicon, nltk_vader.constants)
+
+    expected = [nltk_vader.polarity_scores(text) for text in texts]
+    assert numpy_vader.polarity_scores_batch(texts) == expected
+    assert [numpy_vader.polarity_scores(text) for text in TRICKY_SENTENCES] == expected[:len(TRICKY_SENTENCES)]
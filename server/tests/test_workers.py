@@ -0,0 +1,59 @@
+import os
+import signal
+import time
+
+import pytest
+
+from analysis import analyze_long_text
+from conftest import require_nltk
+from deadline import Deadline
+from fetch import PageFetcher
+from multiurl import UrlBatchAnalyzer
+from workers import ScoringPool
+
+TEXT = "The food was great. The staff were friendly and kind. " * 40
+
+
+@pytest.fixture
+def scoring_pool():
+    require_nltk('sentiment/vader_lexicon.zip', 'corpora/stopwords', 'tokenizers/punkt_tab')
+    pool = ScoringPool(2)
+    yield pool
+    pool.executor.shutdown(wait=True, cancel_futures=True)
+
+
+def kill_a_scoring_process(pool):
+    # Wait for the pool's processes to be up, then kill one as the OOM killer would
+    executor = pool.executor
+    executor.submit(os.getpid).result()
+    os.kill(next(iter(executor._processes)), signal.SIGKILL)
+    while not executor._broken:
+        time.sleep(0.01)
+    return executor
+
+
+def test_long_text_is_scored_after_a_scoring_process_dies(scoring_pool):
+    expected = analyze_long_text(TEXT, chunk_chars=200)
+    broken = kill_a_scoring_process(scoring_pool)
+
+    assert analyze_long_text(TEXT, chunk_chars=200, scoring_pool=scoring_pool) == expected
+    assert scoring_pool.executor is not broken
+    assert analyze_long_text(TEXT, chunk_chars=200, scoring_pool=scoring_pool) == expected
+
+
+def test_deadline_scoring_recovers_after_a_scoring_process_dies(scoring_pool):
+    kill_a_scoring_process(scoring_pool)
+
+    result = analyze_long_text(TEXT, chunk_chars=200, scoring_pool=scoring_pool, deadline=Deadline.after(30))
+    assert result == analyze_long_text(TEXT, chunk_chars=200)
+
+
+def test_url_batch_recovers_after_a_scoring_process_dies(scoring_pool, page_server):
+    page_server.pages['/a'] = (b"<p>The food was great.</p>", {})
+    page_server.pages['/b'] = (b"<p>The service was terrible.</p>", {})
+    analyzer = UrlBatchAnalyzer(PageFetcher(), scoring_pool)
+    kill_a_scoring_process(scoring_pool)
+
+    results = list(analyzer.analyze([page_server.url('/a'), page_server.url('/b')]))
+    assert [result.get('error') for result in results] == [None, None]
+    assert sorted(result['index'] for result in results) == [0, 1]
@@ -0,0 +1,90 @@
+import hashlib
+import re
+from datetime import datetime
+
+import numpy as np
+
+# Activity multipliers by hour of day; the quiet night hours (23:00-04:59) are damped
+HOUR_FACTORS = np.ones(24)
+HOUR_FACTORS[[9, 12, 15, 19, 21]] = [1.2, 1.3, 1.2, 1.5, 1.4]
+HOUR_FACTORS[[23, 0, 1, 2, 3, 4]] = 0.3
+
+CAMEL_CASE_WORD = re.compile(r'[A-Z]?[a-z]+|[A-Z]{2,}(?=[A-Z][a-z]|\d|\W|$)|\d+')
+
+
+def hashtag_text(hashtag):
+    # Split snake_case, then camelCase, into lowercase words; fall back to the raw hashtag
+    words = [word for part in hashtag.split('_') for word in CAMEL_CASE_WORD.findall(part)]
+    return ' '.join(word.lower() for word in words if word) or hashtag.lower()
+
+
+def hashtag_seed(hashtag):
+    """Stable 128-bit key for a hashtag, identical in every worker and across restarts."""
+    return int.from_bytes(hashlib.blake2b(hashtag.encode('utf-8'), digest_size=16).digest(), 'big')
+
+
+def floor_time(moment, bucket_minutes):
+    # Snap a datetime down to the start of its bucket; bucket sizes divide a day
+    minutes = moment.hour * 60 + moment.minute
+    minutes -= minutes % bucket_minutes
+    return moment.replace(hour=minutes // 60, minute=minutes % 60, second=0, microsecond=0)
+
+
+def hashtag_timeline(hashtag, base_sentiment, end=None, hours=24, bucket_minutes=60):
+    """Simulated volume and sentiment for the ``hours`` ending at the bucket containing ``end``.
+
+    Every value is computed over whole arrays. The noise comes from a counter-based
+    generator keyed by the hashtag's digest and indexed by absolute bucket number,
+    so a bucket keeps the same values however the window is shifted or sized, and
+    no global random state is touched.
+
+    Returns ``(times, volume, sentiment)``: datetime64 bucket starts, integer
+    volumes per bucket and sentiments rounded to three decimals.
+    """
+    end = floor_time(end or datetime.now(), bucket_minutes)
+    buckets = max(1, hours * 60 // bucket_minutes)
+    step = np.timedelta64(bucket_minutes, 'm')
+    times = np.datetime64(end, 'm') - step * np.arange(buckets - 1, -1, -1)
+
+    key = hashtag_seed(hashtag)
+    base_volume = 50 + key % 450
+    trend_direction = 1 if (key >> 64) % 2 == 0 else -1
+
+    # Four draws per bucket (volume noise, sentiment noise and two spare), starting at this window's first bucket
+    first_bucket = int(times[0].astype(np.int64)) // bucket_minutes
+    generator = np.random.Generator(np.random.Philox(key=key, counter=first_bucket))
+    draws = generator.random((buckets, 4))
+
+    hour_of_day = (times.astype('datetime64[h]') - times.astype('datetime64[D]')).astype(np.int64)
+    bucket_volume = base_volume * bucket_minutes / 60
+    volume = (bucket_volume * HOUR_FACTORS[hour_of_day] * (0.8 + 0.4 * draws[:, 0])).astype(np.int64)
+
+    progress = np.arange(buckets) / max(1, buckets - 1)
+    trend = trend_direction * (progress - 0.5) * 0.3
+    noise = 0.3 * draws[:, 1] - 0.15
+    sentiment = np.round(np.clip(base_sentiment + trend + noise, -1, 1), 3)
+
+    return times, volume, sentiment
+
+
+def timeline_summary(volume, sentiment, base_sentiment, hours):
+    """Return ``(weighted_sentiment, sentiment_std, volume_factor)`` for a timeline."""
+    total_volume = int(volume.sum())
+    weighted_sentiment = float(np.dot(sentiment, volume) / total_volume) if total_volume > 0 else base_sentiment
+    sentiment_std = float(np.sqrt(np.mean((sentiment - weighted_sentiment) ** 2)))
+    volume_factor = min(1.0, total_volume / (500 * hours))
+    return weighted_sentiment, sentiment_std, volume_factor
+
+
+def timeline_points(times, volume, sentiment, hours):
+    # Clock times for a window of a day or less, dates as well beyond that
+    labels = np.datetime_as_string(times, unit='m')
+    labels = np.char.replace(labels, 'T', ' ')
+    if hours <= 24:
+        labels = np.char.partition(labels, ' ')[:, 2]
+    # Buckets without data (NaN sentiment) are sent as null
+    sentiment = np.where(np.isnan(sentiment), None, sentiment).tolist()
+    return [
+        {"time": label, "sentiment": score, "volume": count}
+        for label, score, count in zip(labels.tolist(), sentiment, volume.tolist())
+    ]
@@ -0,0 +1,287 @@
+"""NumPy implementation of VADER's ``polarity_scores`` for bulk workloads.
+
+Tokens are interned to integer ids and the lexicon valences, booster values and
+negation flags live in NumPy arrays indexed by id, so the per-token rules (caps
+emphasis, the three-word booster/negation window, "never so/this", idioms,
+"least", "kind of", the "but" shift) and the ``compound`` normalization are
+evaluated over every token of every document in a batch at once.
+
+Compatibility with ``SentimentIntensityAnalyzer.polarity_scores``: the rules are
+the same, so results match to the rounding VADER applies (``compound`` to 4
+decimals, ``pos``/``neu``/``neg`` to 3). Sums are accumulated in a different
+order, so a value sitting exactly on a rounding boundary can differ by one unit
+in the last place (1e-4 for ``compound``, 1e-3 for the others).
+"""
+import re
+import string
+
+import numpy as np
+from nltk.sentiment.vader import VaderConstants
+
+# Reserved token ids: anything not in the vocabulary maps to UNKNOWN, or to
+# NEGATED_UNKNOWN when it contains "n't" (which VADER treats as a negation)
+UNKNOWN = 0
+NEGATED_UNKNOWN = 1
+
+_CONTEXT_WORDS = ("but", "least", "at", "very", "never", "so", "this", "kind", "of")
+
+
+class NumpyVader:
+    def __init__(self, lexicon, constants=None):
+        self.constants = constants or VaderConstants()
+        c = self.constants
+
+        # Intern the lexicon plus every word the rules look at
+        words = list(lexicon)
+        words.extend(word for word in c.BOOSTER_DICT if ' ' not in word)
+        words.extend(c.NEGATE)
+        words.extend(_CONTEXT_WORDS)
+        for phrase in list(c.SPECIAL_CASE_IDIOMS) + [word for word in c.BOOSTER_DICT if ' ' in word]:
+            words.extend(phrase.split())
+
+        self.vocab = {}
+        for word in words:
+            if word not in self.vocab:
+                self.vocab[word] = len(self.vocab) + 2
+
+        # One extra slot at the end stands for "outside the document"
+        size = len(self.vocab) + 3
+        self.outside = size - 1
+        self.valence = np.zeros(size)
+        self.in_lexicon = np.zeros(size, dtype=bool)
+        self.booster = np.zeros(size)
+        self.negation = np.zeros(size, dtype=bool)
+        self.negation[NEGATED_UNKNOWN] = True
+        for word, token_id in self.vocab.items():
+            if word in lexicon:
+                self.valence[token_id] = lexicon[word]
+                self.in_lexicon[token_id] = True
+            self.booster[token_id] = c.BOOSTER_DICT.get(word, 0.0)
+            self.negation[token_id] = word in c.NEGATE or "n't" in word
+
+        self.ids = {word: self.vocab[word] for word in _CONTEXT_WORDS}
+        self.so_or_this = np.zeros(size, dtype=bool)
+        self.so_or_this[[self.ids['so'], self.ids['this']]] = True
+        self.at_or_very = np.zeros(size, dtype=bool)
+        self.at_or_very[[self.ids['at'], self.ids['very']]] = True
+        self.least = np.zeros(size, dtype=bool)
+        self.least[self.ids['least']] = not self.in_lexicon[self.ids['least']]
+
+        self.idioms = [
+            (tuple(self.vocab[word] for word in phrase.split()), value)
+            for phrase, value in c.SPECIAL_CASE_IDIOMS.items()
+        ]
+        self.booster_bigrams = [
+            tuple(self.vocab[word] for word in phrase.split())
+            for phrase in c.BOOSTER_DICT if ' ' in phrase
+        ]
+
+        # Strips one leading or trailing PUNC_LIST entry from an otherwise punctuation-free word
+        punc = '|'.join(re.escape(p) for p in sorted(c.PUNC_LIST, key=len, reverse=True))
+        word = r'([^\s%s]{2,})' % re.escape(string.punctuation)
+        self._edge_punctuation = re.compile(r'^(?:(?:%s)%s|%s(?:%s))$' % (punc, word, word, punc))
+        self._punctuation = frozenset(string.punctuation)
+
+    def _tokenize(self, text):
+        # Same result as SentiText.words_and_emoticons
+        tokens = [token for token in text.split() if len(token) > 1]
+        punctuation = self._punctuation
+        for index, token in enumerate(tokens):
+            if token[0] in punctuation or token[-1] in punctuation:
+                match = self._edge_punctuation.match(token)
+                if match:
+                    tokens[index] = match.group(1) or match.group(2)
+        return tokens
+
+    def polarity_scores(self, text):
+        return self.polarity_scores_batch([text])[0]
+
+    def polarity_scores_batch(self, texts):
+        c = self.constants
+        get = self.vocab.get
+
+        # Intern every token of every document into one flat id array
+        ids, upper_positions, lengths, amplifiers = [], [], [], []
+        # Mixed-case tokens get their own per-batch id so repeats are matched exactly
+        variants, variant_positions = {}, []
+        for text in texts:
+            tokens = self._tokenize(text)
+            offset = len(ids)
+            lowered = text.lower()
+            ids.extend(get(token.lower(), UNKNOWN) for token in tokens)
+            if "n't" in lowered:
+                for index, token in enumerate(tokens):
+                    if ids[offset + index] == UNKNOWN and "n't" in token.lower():
+                        ids[offset + index] = NEGATED_UNKNOWN
+            if lowered != text:
+                for index, token in enumerate(tokens):
+                    if token.lower() != token:
+                        variant_positions.append((offset + index, variants.setdefault(token, len(variants))))
+                        if token.isupper():
+                            upper_positions.append(offset + index)
+            lengths.append(len(tokens))
+            amplifiers.append(self._punctuation_amplifier(text))
+
+        docs = len(texts)
+        lengths = np.asarray(lengths, dtype=np.int64)
+        token_ids = np.asarray(ids, dtype=np.int64)
+        n = len(token_ids)
+        doc = np.repeat(np.arange(docs), lengths)
+        starts = np.cumsum(lengths) - lengths
+        pos = np.arange(n) - starts[doc]
+        length = lengths[doc]
+
+        upper = np.zeros(n, dtype=bool)
+        upper[upper_positions] = True
+        # Exact-case identity of each token; lowercase tokens keep their vocabulary id
+        exact_ids = token_ids.copy()
+        cased = np.zeros(n, dtype=bool)
+        if variant_positions:
+            positions, variant_ids = np.asarray(variant_positions, dtype=np.int64).T
+            exact_ids[positions] = len(self.valence) + variant_ids
+            cased[positions] = True
+        upper_count = np.bincount(doc, weights=upper, minlength=docs)
+        cap_diff = ((upper_count > 0) & (upper_count < lengths))[doc]
+
+        # Token ids at relative offsets -3..+2 within each document. ``exact`` only
+        # keeps ids of lowercase tokens, for the rules that compare exact strings
+        around = {0: token_ids}
+        exact = {0: np.where(cased, self.outside, token_ids)}
+        upper_around = {0: upper}
+        for d in (-3, -2, -1, 1, 2):
+            valid = np.nonzero((pos + d >= 0) & (pos + d < length))[0]
+            shifted = np.full(n, self.outside)
+            shifted[valid] = token_ids[valid + d]
+            around[d] = shifted
+            exact[d] = np.where(np.roll(cased, -d), self.outside, shifted)
+            shifted_upper = np.zeros(n, dtype=bool)
+            shifted_upper[valid] = upper[valid + d]
+            upper_around[d] = shifted_upper
+
+        lexical = self.in_lexicon[token_ids]
+        valence = self.valence[token_ids].copy()
+
+        # ALL CAPS emphasis on the sentiment word itself
+        emphasis = lexical & upper & cap_diff
+        valence = np.where(emphasis, valence + np.where(valence > 0, c.C_INCR, -c.C_INCR), valence)
+
+        for start_i, decay in ((0, 1.0), (1, 0.95), (2, 0.9)):
+            previous = around[-(start_i + 1)]
+            mask = lexical & (previous != self.outside) & ~self.in_lexicon[previous]
+
+            # Booster/dampener in the window, signed by the current valence
+            scalar = self.booster[previous]
+            scalar = np.where(valence < 0, -scalar, scalar)
+            caps_booster = (scalar != 0) & upper_around[-(start_i + 1)] & cap_diff
+            scalar = np.where(caps_booster, scalar + np.where(valence > 0, c.C_INCR, -c.C_INCR), scalar)
+            valence = np.where(mask, valence + scalar * decay, valence)
+
+            # Negation, and "never so/this" emphasis
+            if start_i == 0:
+                factor = np.where(self.negation[around[-1]], c.N_SCALAR, 1.0)
+            elif start_i == 1:
+                never_so = (exact[-2] == self.ids['never']) & self.so_or_this[exact[-1]]
+                factor = np.where(never_so, 1.5, np.where(self.negation[around[-2]], c.N_SCALAR, 1.0))
+            else:
+                never_so = ((exact[-3] == self.ids['never']) & self.so_or_this[exact[-2]]) | self.so_or_this[exact[-1]]
+                factor = np.where(never_so, 1.25, np.where(self.negation[around[-3]], c.N_SCALAR, 1.0))
+            valence = np.where(mask, valence * factor, valence)
+
+            if start_i == 2:
+                valence = self._idioms(valence, mask, exact)
+
+        # Negation via "least" (but not "at least" / "very least")
+        least = self.least[around[-1]] & ~self.at_or_very[around[-2]]
+        valence = np.where(lexical & least, valence * c.N_SCALAR, valence)
+
+        # Boosters and "kind of" carry no valence of their own
+        neutral = (self.booster[token_ids] != 0) | ((token_ids == self.ids['kind']) & (around[1] == self.ids['of']))
+        valence = np.where(neutral, 0.0, valence)
+
+        # NLTK scores every repeat of a token with the context of its first occurrence
+        if n:
+            key = doc * (len(self.valence) + len(variants)) + exact_ids
+            _, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+            valence = valence[first[inverse.ravel()]]
+
+        # Words before the first "but" count half, words after it 1.5 times
+        is_but = token_ids == self.ids['but']
+        but_docs, first_but = np.unique(doc[is_but], return_index=True)
+        but_pos = np.full(docs, -1)
+        but_pos[but_docs] = pos[np.nonzero(is_but)[0][first_but]]
+        token_but = but_pos[doc]
+        has_but = token_but >= 0
+        valence = np.where(has_but & (pos < token_but), valence * 0.5, valence)
+        valence = np.where(has_but & (pos > token_but), valence * 1.5, valence)
+
+        return self._score_valence(valence, doc, docs, lengths, np.asarray(amplifiers))
+
+    def _idioms(self, valence, mask, around):
+        c = self.constants
+
+        def phrase_value(offsets):
+            values = np.full(len(valence), np.nan)
+            for phrase, value in self.idioms:
+                if len(phrase) == len(offsets):
+                    hit = np.logical_and.reduce([around[o] == token_id for o, token_id in zip(offsets, phrase)])
+                    values[hit] = value
+            return values
+
+        # The first matching window wins, then following-word idioms override it
+        idiom = np.full(len(valence), np.nan)
+        for offsets in ((-1, 0), (-2, -1, 0), (-2, -1), (-3, -2, -1), (-3, -2)):
+            idiom = np.where(np.isnan(idiom), phrase_value(offsets), idiom)
+        for offsets in ((0, 1), (0, 1, 2)):
+            following = phrase_value(offsets)
+            idiom = np.where(np.isnan(following), idiom, following)
+        valence = np.where(mask & ~np.isnan(idiom), idiom, valence)
+
+        # Booster bigrams such as "kind of" right before the word
+        bigram = np.zeros(len(valence), dtype=bool)
+        for first, second in self.booster_bigrams:
+            bigram |= (around[-3] == first) & (around[-2] == second)
+            bigram |= (around[-2] == first) & (around[-1] == second)
+        return np.where(mask & bigram, valence + c.B_DECR, valence)
+
+    @staticmethod
+    def _punctuation_amplifier(text):
+        # Exclamation points (up to 4) and 2+ question marks add emphasis
+        ep_amplifier = min(text.count("!"), 4) * 0.292
+        qm_count = text.count("?")
+        qm_amplifier = 0
+        if qm_count > 1:
+            qm_amplifier = qm_count * 0.18 if qm_count <= 3 else 0.96
+        return ep_amplifier + qm_amplifier
+
+    def _score_valence(self, valence, doc, docs, lengths, amplifiers):
+        sum_s = np.bincount(doc, weights=valence, minlength=docs)
+        sum_s = np.where(sum_s > 0, sum_s + amplifiers, np.where(sum_s < 0, sum_s - amplifiers, sum_s))
+        compound = sum_s / np.sqrt(sum_s * sum_s + 15)
+
+        pos_sum = np.bincount(doc, weights=np.where(valence > 0, valence + 1, 0.0), minlength=docs)
+        neg_sum = np.bincount(doc, weights=np.where(valence < 0, valence - 1, 0.0), minlength=docs)
+        neu_count = np.bincount(doc, weights=valence == 0, minlength=docs)
+
+        pos_wins = pos_sum > np.abs(neg_sum)
+        neg_wins = pos_sum < np.abs(neg_sum)
+        pos_sum = np.where(pos_wins, pos_sum + amplifiers, pos_sum)
+        neg_sum = np.where(neg_wins, neg_sum - amplifiers, neg_sum)
+
+        total = pos_sum + np.abs(neg_sum) + neu_count
+        total = np.where(total == 0, 1.0, total)
+        pos = np.abs(pos_sum / total)
+        neg = np.abs(neg_sum / total)
+        neu = np.abs(neu_count / total)
+
+        results = []
+        for i in range(docs):
+            if lengths[i]:
+                results.append({
+                    "neg": round(float(neg[i]), 3),
+                    "neu": round(float(neu[i]), 3),
+                    "pos": round(float(pos[i]), 3),
+                    "compound": round(float(compound[i]), 4),
+                })
+            else:
+                results.append({"neg": 0.0, "neu": 0.0, "pos": 0.0, "compound": 0.0})
+        return results
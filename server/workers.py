@@ -0,0 +1,86 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from analysis import init_scoring_worker
+from logs import logger
+
+
+class ScoringPool:
+    """Process pool for CPU-bound scoring, shared by the routes that fan work out.
+
+    The executor is created lazily in each process so gunicorn's preloading
+    master never owns it, and its children are started with forkserver so they
+    do not inherit a forked copy of a threaded worker. With ``workers=0`` there
+    is no pool and callers score inline.
+
+    If a scoring process dies (killed for memory, a crash in native code) the
+    executor is broken for good; ``replace`` swaps in a new one and ``call``
+    retries work once on it, so one lost process does not fail every later request.
+    """
+
+    def __init__(self, workers, engine_options=None):
+        self.workers = workers
+        self.engine_options = engine_options or {}
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        if not self.workers:
+            return None
+        with self._lock:
+            if self._pid != os.getpid():
+                self._executor = self._create()
+                self._pid = os.getpid()
+            return self._executor
+
+    def _create(self):
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else None)
+        return ProcessPoolExecutor(
+            self.workers,
+            mp_context=context,
+            initializer=init_scoring_worker,
+            initargs=(self.engine_options,)
+        )
+
+    def replace(self, broken):
+        """Swap a new executor in for ``broken`` and return it.
+
+        Threads that saw the same executor break all get the one replacement.
+        """
+        with self._lock:
+            if self._executor is broken and self._pid == os.getpid():
+                logger.warning("A scoring process died; starting a new scoring pool")
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._create()
+            return self._executor
+
+    def call(self, func):
+        """``func(executor)``, run once more on a new executor if a scoring process died during it."""
+        executor = self.executor
+        try:
+            return func(executor)
+        except BrokenProcessPool:
+            if executor is None:
+                raise
+            return func(self.replace(executor))
+
+    def map_chunks(self, func, items):
+        """Apply ``func`` (which takes a list) to ``items`` split into one contiguous slice per worker."""
+        if self.executor is None or len(items) < 2:
+            return func(items)
+
+        size = -(-len(items) // self.workers)
+
+        def run(executor):
+            futures = [executor.submit(func, items[i:i + size]) for i in range(0, len(items), size)]
+            results = []
+            for future in futures:
+                results.extend(future.result())
+            return results
+        return self.call(run)